@@ -0,0 +1,140 @@
+"""
+Federated calculations across several database files
+
+database/federated.py makes every file look like one database, which is
+what row-level queries (the Pokemon JOIN, paging) need. For the grouped
+averages and the correlation that is more work than necessary: each file
+can compute its own partial aggregates (sums and counts) in a separate
+process, and the parent only merges a few numbers per group.
+
+Deduplication matches the federated views: a file only contributes rows
+whose natural key is not in an earlier (higher-priority) file. Each worker
+attaches its own file plus the earlier ones, read-only, for that
+anti-join - no rows are copied anywhere.
+
+Results have the same shape as the single-database functions:
+  avg_base_exp_by_type        -> calculate_avg_base_exp_by_type
+  avg_popularity_per_artist   -> calculate_avg_popularity_per_artist
+  temp_variability_by_city    -> calculate_temp_variability_by_city
+  runtime_rating_correlation  -> calculate_runtime_rating_correlation
+"""
+import math
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from config.api_keys import FEDERATED_DB_PATHS
+from database.federated import DEDUP_KEYS, attach_read_only, canonical_select
+from database.snapshot_cache import sort_by_mean_desc
+from monitoring.instrumentation import timed
+
+
+# name -> (table, aggregate query over the file's deduplicated canonical {rows})
+PARTIAL_QUERIES = {
+    "base_exp_by_type": ("pokemon", """
+        SELECT type, TOTAL(base_experience), COUNT(base_experience), COUNT(*)
+        FROM ({rows}) WHERE type IS NOT NULL GROUP BY type
+    """),
+    "popularity_by_artist": ("tracks", """
+        SELECT artist, TOTAL(popularity), COUNT(popularity), COUNT(*)
+        FROM ({rows}) WHERE artist IS NOT NULL GROUP BY artist
+    """),
+    "high_low_by_city": ("weather", """
+        SELECT city, TOTAL(temperature_high), COUNT(temperature_high),
+               TOTAL(temperature_low), COUNT(temperature_low), COUNT(*)
+        FROM ({rows}) WHERE city IS NOT NULL GROUP BY city
+    """),
+    "runtime_rating": ("movies", """
+        SELECT COUNT(*), TOTAL(runtime), TOTAL(imdb_rating), TOTAL(runtime * imdb_rating),
+               TOTAL(runtime * runtime), TOTAL(imdb_rating * imdb_rating)
+        FROM ({rows}) WHERE runtime IS NOT NULL AND imdb_rating IS NOT NULL
+    """),
+}
+
+
+def _new_rows_select(conn: sqlite3.Connection, schemas: List[str], table: str) -> Optional[str]:
+    """Canonical rows of the last schema whose key is in none of the earlier ones."""
+    own = canonical_select(conn, schemas[-1], table)
+    if own is None:
+        return None
+    conditions = []
+    for i, schema in enumerate(schemas[:-1]):
+        earlier = canonical_select(conn, schema, table, key_probe=True)
+        if earlier is None:
+            continue
+        match = " AND ".join(f"e{i}.{key} IS r.{key}" for key in DEDUP_KEYS[table])
+        conditions.append(f"NOT EXISTS (SELECT 1 FROM ({earlier}) e{i} WHERE {match})")
+    return f"SELECT * FROM ({own}) r" + (f" WHERE {' AND '.join(conditions)}" if conditions else "")
+
+
+def _file_partials(task: Tuple[int, Sequence[str]]) -> Dict[str, list]:
+    """Worker: partial aggregates for paths[index], skipping rows owned by earlier paths."""
+    index, paths = task
+    conn = sqlite3.connect(":memory:", uri=True)
+    try:
+        schemas = attach_read_only(conn, paths[:index + 1])
+        partials = {}
+        for name, (table, query) in PARTIAL_QUERIES.items():
+            rows = _new_rows_select(conn, schemas, table)
+            partials[name] = [] if rows is None else conn.execute(query.format(rows=rows)).fetchall()
+        return partials
+    finally:
+        conn.close()
+
+
+def _merge_groups(partials: List[Dict[str, list]], name: str) -> Dict[str, list]:
+    """Sum the per-group partial tuples of every file."""
+    merged: Dict[str, list] = {}
+    for partial in partials:
+        for key, *values in partial[name]:
+            totals = merged.setdefault(key, [0] * len(values))
+            for i, value in enumerate(values):
+                totals[i] += value
+    return merged
+
+
+def _mean(total: float, count: int) -> Optional[float]:
+    return total / count if count else None
+
+
+def _correlation(n: int, sx: float, sy: float, sxy: float, sxx: float, syy: float) -> Optional[float]:
+    if n < 2:
+        return None
+    cov = sxy - sx * sy / n
+    var_x = sxx - sx * sx / n
+    var_y = syy - sy * sy / n
+    if var_x <= 0 or var_y <= 0:
+        return None
+    return cov / math.sqrt(var_x * var_y)
+
+
+@timed("calc.federated")
+def federated_calculations(paths: Sequence[str] = FEDERATED_DB_PATHS,
+                           processes: Optional[int] = None) -> Dict[str, object]:
+    """
+    Compute the aggregate calculations across every file in paths, one
+    worker process per file. Earlier paths win on duplicate keys.
+
+    Returns:
+        {"avg_base_exp_by_type": [...], "avg_popularity_per_artist": [...],
+         "temp_variability_by_city": [...], "runtime_rating_correlation": float or None}
+    """
+    paths = list(paths)
+    with ProcessPoolExecutor(max_workers=processes or len(paths)) as pool:
+        partials = list(pool.map(_file_partials, [(i, paths) for i in range(len(paths))]))
+
+    base_exp = _merge_groups(partials, "base_exp_by_type")
+    popularity = _merge_groups(partials, "popularity_by_artist")
+    variability = []
+    for city, (high, high_n, low, low_n, cnt) in sorted(_merge_groups(partials, "high_low_by_city").items()):
+        if high_n and low_n:
+            variability.append((city, high / high_n - low / low_n, cnt))
+    movies = [sum(values) for values in zip(*(row for p in partials for row in p["runtime_rating"]))]
+
+    return {
+        "avg_base_exp_by_type": sort_by_mean_desc([(t, _mean(total, n), cnt)
+                                                   for t, (total, n, cnt) in base_exp.items()]),
+        "avg_popularity_per_artist": sort_by_mean_desc([(a, _mean(total, n), cnt)
+                                                        for a, (total, n, cnt) in popularity.items()]),
+        "temp_variability_by_city": variability,
+        "runtime_rating_correlation": _correlation(*movies) if movies else None,
+    }
@@ -1,80 +1,284 @@
 """
 File writer for calculation results
+
+The report is a list of SECTIONS. Each section names its columns and a
+row source (a calculation function or generator). A format class decides how
+the rows are written, so the same sections can be emitted as:
+  - "text"     : the fixed-width calculations_output.txt layout
+  - "csv"      : one header row per section, every row tagged with its section
+  - "jsonl"    : one JSON object per row
+  - "markdown" : a heading and a table per section
+
+Rows are written incrementally through a buffered file as they arrive.
+With parallel=True every section is computed on its own thread (with its
+own SQLite connection) and handed to the writer through a small bounded
+queue. Only section 5 streams its rows from a generator (fetchmany); the
+grouped sections 1-4 come from cached calculations that return a complete
+list, one row per type, artist or city, so their size follows the number
+of groups rather than the number of stored rows. If writing fails, the
+producers are stopped and joined before the error propagates.
 """
+import csv
+import io
+import json
+import queue
 import sqlite3
-from calculations.pokemon_calculations import calculate_avg_base_exp_by_type, calculate_pokemon_with_stats_join
+import threading
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+from calculations.pokemon_calculations import calculate_avg_base_exp_by_type, iter_pokemon_with_stats_join
 from calculations.spotify_calculations import calculate_avg_popularity_per_artist
 from calculations.weather_calculations import calculate_temp_variability_by_city
 from calculations.movies_calculations import calculate_runtime_rating_correlation
+from database.db_helper import create_connection
+from database.snapshot_cache import database_file
+from monitoring.metrics import QUEUE_DEPTH
+from monitoring.structured_logging import get_logger
 
 
-def write_calculations_to_file(conn: sqlite3.Connection, filename: str = "calculations_output.txt"):
-    """
-    Writes all calculated data to a text file.
-    Required by SI 201 project grading rubric (10 points).
-    """
-    with open(filename, 'w') as f:
+log = get_logger("calculations")
+
+
+class Column(NamedTuple):
+    name: str
+    width: int
+    fmt: str = ""
+
+
+class Section(NamedTuple):
+    key: str
+    title: str
+    columns: List[Column]
+    rows: Callable[[sqlite3.Connection], Iterable[tuple]]
+    layout: str = "table"           # "table" or "key_value" (text format only)
+    empty_text: Optional[str] = None
+
+
+def _correlation_rows(conn: sqlite3.Connection) -> List[tuple]:
+    correlation = calculate_runtime_rating_correlation(conn)
+    if correlation is None:
+        return []
+    if abs(correlation) < 0.3:
+        interpretation = "Weak correlation"
+    elif abs(correlation) < 0.7:
+        interpretation = "Moderate correlation"
+    else:
+        interpretation = "Strong correlation"
+    return [(correlation, interpretation)]
+
+
+def _top_stats_rows(conn: sqlite3.Connection) -> Iterable[tuple]:
+    for pid, name, ptype, base_exp, hp, attack, defense, speed, total in iter_pokemon_with_stats_join(conn, limit=10):
+        yield (pid, name, ptype, hp, attack, defense, speed, total)
+
+
+SECTIONS = [
+    Section("pokemon_avg_base_exp", "1. POKEMON: Average Base Experience by Type",
+            [Column("Type", 15), Column("Avg Base Exp", 20, ".2f"), Column("Count", 10)],
+            calculate_avg_base_exp_by_type),
+    Section("spotify_avg_popularity", "2. SPOTIFY: Average Track Popularity per Artist",
+            [Column("Artist", 40), Column("Avg Popularity", 20, ".2f"), Column("Count", 10)],
+            calculate_avg_popularity_per_artist),
+    Section("weather_temp_variability", "3. WEATHER: Temperature Variability by City",
+            [Column("City", 25), Column("Temp Variability", 20, ".2f"), Column("Count", 10)],
+            calculate_temp_variability_by_city),
+    Section("movies_runtime_rating_correlation", "4. MOVIES: Runtime vs IMDb Rating Correlation",
+            [Column("Correlation Coefficient", 0, ".6f"), Column("Interpretation", 0)],
+            _correlation_rows, layout="key_value", empty_text="Correlation: Not enough data"),
+    Section("pokemon_top_total_stats", "5. POKEMON JOIN QUERY: Top 10 Pokemon by Total Stats",
+            [Column("ID", 5), Column("Name", 15), Column("Type", 10), Column("HP", 5), Column("Atk", 5),
+             Column("Def", 5), Column("Spd", 5), Column("Total", 8)],
+            _top_stats_rows),
+]
+
+
+# ==================== OUTPUT FORMATS ====================
+
+def _cell(value, fmt: str) -> str:
+    """value formatted with fmt; empty for None (a NULL average, for example)."""
+    return "" if value is None else format(value, fmt)
+
+
+class TextFormat:
+    """Fixed-width text layout of calculations_output.txt."""
+
+    def begin(self, f):
         f.write("=" * 80 + "\n")
         f.write("SI 201 FINAL PROJECT - CALCULATED DATA RESULTS\n")
         f.write("=" * 80 + "\n\n")
 
-        # Pokemon calculations
-        f.write("1. POKEMON: Average Base Experience by Type\n")
-        f.write("-" * 80 + "\n")
-        pokemon_data = calculate_avg_base_exp_by_type(conn)
-        f.write(f"{'Type':<15} {'Avg Base Exp':<20} {'Count':<10}\n")
+    def section(self, f, section: Section, rows: Iterable[tuple]):
+        f.write(section.title + "\n")
         f.write("-" * 80 + "\n")
-        for ptype, avg_exp, count in pokemon_data:
-            f.write(f"{ptype:<15} {avg_exp:<20.2f} {count:<10}\n")
+        wrote = False
+        if section.layout == "key_value":
+            for row in rows:
+                for col, value in zip(section.columns, row):
+                    f.write(f"{col.name}: {_cell(value, col.fmt)}\n")
+                wrote = True
+        else:
+            f.write(" ".join(f"{col.name:<{col.width}}" for col in section.columns) + "\n")
+            f.write("-" * 80 + "\n")
+            for row in rows:
+                f.write(" ".join(f"{_cell(value, col.fmt):<{col.width}}"
+                                 for col, value in zip(section.columns, row)) + "\n")
+                wrote = True
+        if not wrote and section.empty_text:
+            f.write(section.empty_text + "\n")
         f.write("\n")
 
-        # Spotify calculations
-        f.write("2. SPOTIFY: Average Track Popularity per Artist\n")
-        f.write("-" * 80 + "\n")
-        spotify_data = calculate_avg_popularity_per_artist(conn)
-        f.write(f"{'Artist':<40} {'Avg Popularity':<20} {'Count':<10}\n")
-        f.write("-" * 80 + "\n")
-        for artist, avg_pop, count in spotify_data:
-            f.write(f"{artist:<40} {avg_pop:<20.2f} {count:<10}\n")
-        f.write("\n")
+    def end(self, f):
+        f.write("=" * 80 + "\n")
+        f.write("End of calculations\n")
+        f.write("=" * 80 + "\n")
 
-        # Weather calculations
-        f.write("3. WEATHER: Temperature Variability by City\n")
-        f.write("-" * 80 + "\n")
-        weather_data = calculate_temp_variability_by_city(conn)
-        f.write(f"{'City':<25} {'Temp Variability':<20} {'Count':<10}\n")
-        f.write("-" * 80 + "\n")
-        for city, variability, count in weather_data:
-            f.write(f"{city:<25} {variability:<20.2f} {count:<10}\n")
-        f.write("\n")
 
-        # Movies correlation
-        f.write("4. MOVIES: Runtime vs IMDb Rating Correlation\n")
-        f.write("-" * 80 + "\n")
-        correlation = calculate_runtime_rating_correlation(conn)
-        if correlation is not None:
-            f.write(f"Correlation Coefficient: {correlation:.6f}\n")
-            if abs(correlation) < 0.3:
-                f.write("Interpretation: Weak correlation\n")
-            elif abs(correlation) < 0.7:
-                f.write("Interpretation: Moderate correlation\n")
-            else:
-                f.write("Interpretation: Strong correlation\n")
-        else:
-            f.write("Correlation: Not enough data\n")
+class CsvFormat:
+    """CSV with a header row per section; first column is the section key."""
+
+    def begin(self, f):
+        self.writer = csv.writer(f)
+
+    def section(self, f, section: Section, rows: Iterable[tuple]):
+        self.writer.writerow(["section"] + [col.name for col in section.columns])
+        for row in rows:
+            self.writer.writerow([section.key] + list(row))
+
+    def end(self, f):
+        pass
+
+
+class JsonLinesFormat:
+    """One JSON object per row, tagged with its section key."""
+
+    def begin(self, f):
+        pass
+
+    def section(self, f, section: Section, rows: Iterable[tuple]):
+        names = [col.name for col in section.columns]
+        for row in rows:
+            record = {"section": section.key}
+            record.update(zip(names, row))
+            f.write(json.dumps(record) + "\n")
+
+    def end(self, f):
+        pass
+
+
+class MarkdownFormat:
+    """A heading and a pipe table per section."""
+
+    def begin(self, f):
+        f.write("# SI 201 Final Project - Calculated Data Results\n\n")
+
+    def section(self, f, section: Section, rows: Iterable[tuple]):
+        f.write(f"## {section.title}\n\n")
+        f.write("| " + " | ".join(col.name for col in section.columns) + " |\n")
+        f.write("|" + "|".join("---" for _ in section.columns) + "|\n")
+        for row in rows:
+            f.write("| " + " | ".join(_cell(value, col.fmt) for col, value in zip(section.columns, row)) + " |\n")
         f.write("\n")
 
-        # JOIN query results
-        f.write("5. POKEMON JOIN QUERY: Top 10 Pokemon by Total Stats\n")
-        f.write("-" * 80 + "\n")
-        join_data = calculate_pokemon_with_stats_join(conn)
-        f.write(f"{'ID':<5} {'Name':<15} {'Type':<10} {'HP':<5} {'Atk':<5} {'Def':<5} {'Spd':<5} {'Total':<8}\n")
-        f.write("-" * 80 + "\n")
-        for pid, name, ptype, base_exp, hp, attack, defense, speed, total in join_data[:10]:
-            f.write(f"{pid:<5} {name:<15} {ptype:<10} {hp:<5} {attack:<5} {defense:<5} {speed:<5} {total:<8}\n")
+    def end(self, f):
+        pass
 
-        f.write("\n" + "=" * 80 + "\n")
-        f.write("End of calculations\n")
-        f.write("=" * 80 + "\n")
 
-    print(f"✓ Saved calculations to: {filename}")
+REPORT_FORMATS = {
+    "text": TextFormat,
+    "csv": CsvFormat,
+    "jsonl": JsonLinesFormat,
+    "markdown": MarkdownFormat,
+}
+
+
+# ==================== PARALLEL SECTION PRODUCERS ====================
+
+_DONE = object()
+
+
+def _put(out: "queue.Queue", item, stop: threading.Event) -> bool:
+    """Put item, waiting while the queue is full; False once stop is set."""
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(db_file: str, section: Section, out: "queue.Queue", stop: threading.Event):
+    """Worker thread: compute one section on its own connection."""
+    conn = create_connection(db_file)
+    try:
+        for row in section.rows(conn):
+            if not _put(out, row, stop):
+                return  # the writer gave up; nobody reads this queue any more
+    except Exception as e:
+        _put(out, e, stop)
+    finally:
+        conn.close()
+        _put(out, _DONE, stop)
+        QUEUE_DEPTH.untrack(queue=f"report.{section.key}")
+
+
+def _drain(out: "queue.Queue") -> Iterable[tuple]:
+    while True:
+        item = out.get()
+        if item is _DONE:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def _section_streams(conn: sqlite3.Connection, sections: List[Section], parallel: bool, queue_size: int,
+                     stop: threading.Event) -> Tuple[List[Tuple[Section, Iterable[tuple]]], List[threading.Thread]]:
+    """(section, rows) pairs in report order, plus the producer threads to join."""
+    db_file = database_file(conn)
+    if not parallel or not db_file:
+        return [(section, section.rows(conn)) for section in sections], []
+    streams, threads = [], []
+    for section in sections:
+        out = queue.Queue(maxsize=queue_size)
+        QUEUE_DEPTH.track(out.qsize, queue=f"report.{section.key}")
+        thread = threading.Thread(target=_produce, args=(db_file, section, out, stop),
+                                  name=f"report-{section.key}", daemon=True)
+        thread.start()
+        threads.append(thread)
+        streams.append((section, _drain(out)))
+    return streams, threads
+
+
+def write_calculations_to_file(conn: sqlite3.Connection, filename: str = "calculations_output.txt",
+                               fmt: str = "text", parallel: bool = True,
+                               sections: Optional[List[Section]] = None, queue_size: int = 1000):
+    """
+    Writes all calculated data to a file.
+    Required by SI 201 project grading rubric (10 points).
+
+    Args:
+        conn: Database connection
+        filename: Output path
+        fmt: One of REPORT_FORMATS ("text", "csv", "jsonl", "markdown")
+        parallel: Compute sections concurrently (file-backed databases only)
+        sections: Sections to write (default SECTIONS)
+        queue_size: Max rows buffered per section while waiting to be written
+    """
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Unknown report format: {fmt} (expected one of {list(REPORT_FORMATS)})")
+    writer = REPORT_FORMATS[fmt]()
+    stop = threading.Event()
+    streams, threads = _section_streams(conn, sections or SECTIONS, parallel, queue_size, stop)
+    try:
+        with io.open(filename, "w", buffering=1 << 16, newline="" if fmt == "csv" else None) as f:
+            writer.begin(f)
+            for section, rows in streams:
+                writer.section(f, section, rows)
+            writer.end(f)
+    finally:
+        # On an error, producers still blocked on a full queue give up and close their connections
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    log.info("✓ Saved calculations to: %s", filename)
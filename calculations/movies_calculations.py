@@ -3,11 +3,32 @@ Movies calculation functions
 """
 import sqlite3
 import math
-from typing import Optional
+from typing import Optional, Sequence, Tuple
+from calculations.result_cache import cached_calculation
+from database.snapshot_cache import load_columns
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def load_runtime_rating_pairs(conn: sqlite3.Connection) -> Tuple[Sequence[float], Sequence[float]]:
+    """
+    Return (runtimes, ratings) for movies that have both values.
+    Reads the memory-mapped snapshot when one exists (NumPy arrays),
+    otherwise SQL (lists).
+
+    Not cached: this is raw column data, and caching it would copy the
+    snapshot into the memory LRU and pickle it into <db>.calc_cache. Only
+    the correlation computed from it is cached.
+    """
+    cols = load_columns(conn, "movies", ["runtime", "imdb_rating"])
+    if cols is not None:
+        runtime, rating = cols["runtime"], cols["imdb_rating"]
+        keep = (runtime == runtime) & (rating == rating)  # drop NaN (NULL) rows
+        return runtime[keep], rating[keep]
 
-def calculate_runtime_rating_correlation(conn: sqlite3.Connection) -> Optional[float]:
-    """Calculate correlation coefficient between movie runtime and IMDb rating."""
     c = conn.cursor()
     q = """
     SELECT runtime, imdb_rating FROM movies
@@ -15,10 +36,21 @@ def calculate_runtime_rating_correlation(conn: sqlite3.Connection) -> Optional[f
     """
     c.execute(q)
     rows = c.fetchall()
-    if len(rows) < 2:
+    return [r["runtime"] for r in rows], [r["imdb_rating"] for r in rows]
+
+
+@cached_calculation(tables=["movies"])
+def calculate_runtime_rating_correlation(conn: sqlite3.Connection) -> Optional[float]:
+    """Calculate correlation coefficient between movie runtime and IMDb rating."""
+    runtimes, ratings = load_runtime_rating_pairs(conn)
+    if len(runtimes) < 2:
         return None
-    runtimes = [r["runtime"] for r in rows]
-    ratings = [r["imdb_rating"] for r in rows]
+    if np is not None:
+        dx = np.asarray(runtimes, dtype="float64")
+        dy = np.asarray(ratings, dtype="float64")
+        dx, dy = dx - dx.mean(), dy - dy.mean()
+        den = math.sqrt(float(dx @ dx) * float(dy @ dy))
+        return float(dx @ dy) / den if den else None
     n = len(runtimes)
     mean_x = sum(runtimes) / n
     mean_y = sum(ratings) / n
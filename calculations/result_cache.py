@@ -0,0 +1,151 @@
+"""
+Result cache for calculation functions
+
+example_run(), write_calculations_to_file() and the visualizations all call
+the same calculation functions on unchanged data. The @cached_calculation
+decorator memoizes results keyed on:
+  - the function name and its extra arguments
+  - the database file the connection points at
+  - a fingerprint of every table the calculation reads
+    (see database/snapshot_cache.py: cached_fingerprint)
+
+When any of those tables change, the fingerprint changes and the old entry
+simply stops matching - no manual invalidation needed.
+
+Two levels:
+  1. an in-process LRU (bounded by CALC_CACHE_MAX_ENTRIES)
+  2. a small SQLite file next to the database (<db>.calc_cache) so results
+     are shared across processes (also bounded, oldest entries evicted)
+
+Callers get their own copy of every list, tuple and dict in a result, so
+mutating one (e.g. sorting a cached list in place) cannot change what later
+hits return. NumPy arrays are shared instead of copied, but marked read-only.
+
+cache_stats() reports hits and misses for both levels.
+"""
+import functools
+import hashlib
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from typing import Callable, Dict, List
+from config.api_keys import CALC_CACHE_ENABLED, CALC_CACHE_MAX_ENTRIES
+from database.snapshot_cache import cached_fingerprint, database_file
+from monitoring.instrumentation import timed
+from monitoring.structured_logging import get_logger
+
+
+log = get_logger("calculations")
+_memory: "OrderedDict[str, object]" = OrderedDict()
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+# Report sections are computed from worker threads (see file_writer.py)
+_lock = threading.Lock()
+
+
+def _disk_connection(db_file: str) -> sqlite3.Connection:
+    disk = sqlite3.connect(db_file + ".calc_cache", timeout=5)
+    disk.execute("""
+    CREATE TABLE IF NOT EXISTS calc_cache (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        created_at REAL NOT NULL
+    )
+    """)
+    return disk
+
+
+def _disk_get(db_file: str, key: str):
+    """Return (found, value); found is False on a miss or unreadable store."""
+    try:
+        with closing(_disk_connection(db_file)) as disk:
+            row = disk.execute("SELECT value FROM calc_cache WHERE key = ?", (key,)).fetchone()
+        return (False, None) if row is None else (True, pickle.loads(row[0]))
+    except sqlite3.Error:
+        return False, None
+
+
+def _disk_put(db_file: str, key: str, value):
+    try:
+        with closing(_disk_connection(db_file)) as disk, disk:
+            disk.execute("INSERT OR REPLACE INTO calc_cache (key, value, created_at) VALUES (?, ?, ?)",
+                         (key, pickle.dumps(value), time.time()))
+            disk.execute("""
+                DELETE FROM calc_cache WHERE key NOT IN (
+                    SELECT key FROM calc_cache ORDER BY created_at DESC LIMIT ?
+                )
+            """, (CALC_CACHE_MAX_ENTRIES,))
+    except sqlite3.Error as e:
+        log.warning("Calculation cache write error: %s", e)
+
+
+def _detached(value):
+    """Copy value's containers so the cached original stays untouched."""
+    if isinstance(value, list):
+        return [_detached(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_detached(v) for v in value)
+    if isinstance(value, dict):
+        return {k: _detached(v) for k, v in value.items()}
+    if hasattr(value, "setflags"):  # NumPy array
+        value.setflags(write=False)
+    return value
+
+
+def cached_calculation(tables: List[str]) -> Callable:
+    """
+    Decorator for calculation functions whose first argument is the connection.
+
+    Args:
+        tables: Every table the calculation reads (data and lookup tables)
+
+    Example:
+        @cached_calculation(tables=["pokemon", "types_lookup"])
+        def calculate_avg_base_exp_by_type(conn): ...
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        @timed(f"calc.{func.__name__}")
+        def wrapper(conn: sqlite3.Connection, *args, **kwargs):
+            db_file = database_file(conn)
+            if not CALC_CACHE_ENABLED or not db_file:
+                return func(conn, *args, **kwargs)
+
+            fingerprints = [cached_fingerprint(conn, table) for table in tables]
+            raw_key = repr((func.__module__, func.__qualname__, db_file, args,
+                            sorted(kwargs.items()), fingerprints))
+            key = hashlib.sha1(raw_key.encode()).hexdigest()
+
+            with _lock:
+                if key in _memory:
+                    _memory.move_to_end(key)
+                    _stats["memory_hits"] += 1
+                    return _detached(_memory[key])
+
+            found, result = _disk_get(db_file, key)
+            if not found:
+                result = func(conn, *args, **kwargs)
+                _disk_put(db_file, key, result)
+
+            with _lock:
+                _stats["disk_hits" if found else "misses"] += 1
+                _memory[key] = result
+                if len(_memory) > CALC_CACHE_MAX_ENTRIES:
+                    _memory.popitem(last=False)
+            return _detached(result)
+        return wrapper
+    return decorator
+
+
+def cache_stats() -> Dict[str, float]:
+    """Hit/miss counters plus the overall hit rate for this process."""
+    total = sum(_stats.values())
+    hits = _stats["memory_hits"] + _stats["disk_hits"]
+    return dict(_stats, hit_rate=(hits / total) if total else 0.0)
+
+
+def clear_memory_cache():
+    """Drop the in-process LRU (the on-disk store is left alone)."""
+    _memory.clear()
@@ -7,15 +7,26 @@ Main tracks table stores only artist_id integers.
 """
 import sqlite3
 from typing import List, Tuple
+from calculations.result_cache import cached_calculation
+from database.snapshot_cache import grouped_mean, load_columns, lookup_names, sort_by_mean_desc
 
 
+@cached_calculation(tables=["tracks", "artists_lookup"])
 def calculate_avg_popularity_per_artist(conn: sqlite3.Connection) -> List[Tuple[str, float, int]]:
     """
     Calculate average track popularity per artist.
 
     STRING-TO-INTEGER MAPPING:
     JOINs tracks table with artists_lookup table to get artist names.
+    Reads the memory-mapped snapshot when one exists (same result).
     """
+    cols = load_columns(conn, "tracks", ["artist_id", "popularity"])
+    if cols is not None:
+        names = lookup_names(conn, "artists_lookup")
+        results = [(names[k], avg, cnt) for k, avg, cnt in grouped_mean(cols["artist_id"], cols["popularity"])
+                   if k in names]
+        return sort_by_mean_desc(results)
+
     c = conn.cursor()
     q = """
     SELECT a.artist_name, AVG(t.popularity) as avg_pop, COUNT(*) as cnt
@@ -23,7 +34,7 @@ def calculate_avg_popularity_per_artist(conn: sqlite3.Connection) -> List[Tuple[
     INNER JOIN artists_lookup a ON t.artist_id = a.id
     WHERE t.artist_id IS NOT NULL
     GROUP BY a.artist_name
-    ORDER BY avg_pop DESC
+    ORDER BY avg_pop DESC, a.artist_name DESC
     """
     c.execute(q)
     return [(row["artist_name"], row["avg_pop"], row["cnt"]) for row in c.fetchall()]
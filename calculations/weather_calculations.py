@@ -6,16 +6,29 @@ Weather table uses cities_lookup, dates_lookup, and forecasts_lookup tables.
 All string values mapped to integers - no duplicate strings stored.
 """
 import sqlite3
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+from calculations.result_cache import cached_calculation
+from database.snapshot_cache import grouped_mean, load_columns, lookup_names
 
 
-def calculate_temp_variability_by_city(conn: sqlite3.Connection) -> List[Tuple[str, float, int]]:
+@cached_calculation(tables=["weather", "cities_lookup"])
+def calculate_avg_high_low_by_city(conn: sqlite3.Connection) -> List[Tuple[str, Optional[float], Optional[float], int]]:
     """
-    Calculate temperature difference between high and low per city.
+    Calculate average high and low temperature per city.
 
     STRING-TO-INTEGER MAPPING:
     JOINs weather table with cities_lookup table to get city names.
+    Reads the memory-mapped snapshot when one exists (same result).
     """
+    cols = load_columns(conn, "weather", ["city_id", "temperature_high", "temperature_low"])
+    if cols is not None:
+        names = lookup_names(conn, "cities_lookup")
+        highs = grouped_mean(cols["city_id"], cols["temperature_high"])
+        lows = grouped_mean(cols["city_id"], cols["temperature_low"])
+        results = [(names[k], avg_high, avg_low, cnt)
+                   for (k, avg_high, cnt), (_, avg_low, _) in zip(highs, lows) if k in names]
+        return sorted(results, key=lambda r: r[0])
+
     c = conn.cursor()
     q = """
     SELECT c.city_name, AVG(w.temperature_high) as avg_high, AVG(w.temperature_low) as avg_low, COUNT(*) as cnt
@@ -23,12 +36,24 @@ def calculate_temp_variability_by_city(conn: sqlite3.Connection) -> List[Tuple[s
     INNER JOIN cities_lookup c ON w.city_id = c.id
     WHERE w.city_id IS NOT NULL
     GROUP BY c.city_name
+    ORDER BY c.city_name
     """
     c.execute(q)
+    return [(row["city_name"], row["avg_high"], row["avg_low"], row["cnt"]) for row in c.fetchall()]
+
+
+@cached_calculation(tables=["weather", "cities_lookup"])
+def calculate_temp_variability_by_city(conn: sqlite3.Connection) -> List[Tuple[str, float, int]]:
+    """
+    Calculate temperature difference between high and low per city.
+
+    STRING-TO-INTEGER MAPPING:
+    JOINs weather table with cities_lookup table to get city names.
+    """
     results = []
-    for row in c.fetchall():
-        if row["avg_high"] is None or row["avg_low"] is None:
+    for city_name, avg_high, avg_low, cnt in calculate_avg_high_low_by_city(conn):
+        if avg_high is None or avg_low is None:
             continue
-        variability = row["avg_high"] - row["avg_low"]
-        results.append((row["city_name"], variability, row["cnt"]))
+        variability = avg_high - avg_low
+        results.append((city_name, variability, cnt))
     return results
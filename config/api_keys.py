@@ -10,6 +10,16 @@ OMDB_API_KEY = os.getenv("OMDB_API_KEY", "664d8386")
 # Spotify API Keys
 SPOTIPY_CLIENT_ID = os.getenv("SPOTIPY_CLIENT_ID", "fc80ead3b4f0410da95885d93e837534")
 SPOTIPY_CLIENT_SECRET = os.getenv("SPOTIPY_CLIENT_SECRET", "2535128eadda464c8890983d1ac28786")
+# Token shared by every thread/process (see data_collection/spotify_auth.py)
+SPOTIFY_TOKEN_CACHE = os.getenv("SPOTIFY_TOKEN_CACHE", ".spotify_token.json")
+SPOTIFY_TOKEN_REFRESH_MARGIN = int(os.getenv("SPOTIFY_TOKEN_REFRESH_MARGIN", "300"))  # seconds before expiry
+# Override both to point the Spotify client at a local stub server
+SPOTIFY_API_PREFIX = os.getenv("SPOTIFY_API_PREFIX", "https://api.spotify.com/v1/")
+SPOTIFY_TOKEN_URL = os.getenv("SPOTIFY_TOKEN_URL", "https://accounts.spotify.com/api/token")
+# Batch enrichment (see data_collection/spotify_enrichment.py): IDs per request
+SPOTIFY_ARTIST_BATCH = int(os.getenv("SPOTIFY_ARTIST_BATCH", "50"))  # /artists?ids= maximum
+SPOTIFY_AUDIO_FEATURES_BATCH = int(os.getenv("SPOTIFY_AUDIO_FEATURES_BATCH", "100"))  # /audio-features maximum
+SPOTIFY_TRACK_BATCH = int(os.getenv("SPOTIFY_TRACK_BATCH", "50"))  # /tracks?ids= maximum (popularity refresh)
 
 # Database path
 DB_PATH = "si201_project.db"
@@ -18,3 +28,86 @@ DB_PATH = "si201_project.db"
 POKEAPI_BASE = "https://pokeapi.co/api/v2"
 OMDB_BASE = "http://www.omdbapi.com/"
 WEATHER_BASE = "https://api.weather.gov"
+
+# Refresh mode: rows older than these thresholds are re-polled (in hours)
+REFRESH_STALE_HOURS = {
+    "tracks": int(os.getenv("REFRESH_TRACKS_HOURS", "24")),
+    "movies": int(os.getenv("REFRESH_MOVIES_HOURS", "168")),
+    "weather": int(os.getenv("REFRESH_WEATHER_HOURS", "1")),
+}
+
+# Calculation result cache (see calculations/result_cache.py)
+CALC_CACHE_ENABLED = os.getenv("CALC_CACHE_ENABLED", "1") == "1"
+CALC_CACHE_MAX_ENTRIES = int(os.getenv("CALC_CACHE_MAX_ENTRIES", "256"))
+
+# Charts switch to scalable rendering above these point counts
+# (density raster for scatters, LTTB downsampling for line series)
+CHART_SCATTER_MAX_POINTS = int(os.getenv("CHART_SCATTER_MAX_POINTS", "5000"))
+CHART_LINE_MAX_POINTS = int(os.getenv("CHART_LINE_MAX_POINTS", "200"))
+
+# Dashboard Server-Sent Events: one shared broadcaster feeds at most this many clients
+DASHBOARD_MAX_SSE_CLIENTS = int(os.getenv("DASHBOARD_MAX_SSE_CLIENTS", "32"))
+
+# Logging (see monitoring/structured_logging.py)
+LOG_LEVEL = os.getenv("SI201_LOG_LEVEL", "INFO")
+LOG_CONSOLE_LEVEL = os.getenv("SI201_LOG_CONSOLE", "INFO")
+LOG_JSON_PATH = os.getenv("SI201_LOG_JSON", "pipeline_log.jsonl")
+
+# Daemon mode (see data_collection/scheduler.py): interval per job in hours
+SCHEDULE_INTERVALS = {
+    "weather": float(os.getenv("SCHEDULE_WEATHER_HOURS", "1")),
+    "spotify_popularity": float(os.getenv("SCHEDULE_SPOTIFY_POPULARITY_HOURS", "24")),
+    "spotify_tracks": float(os.getenv("SCHEDULE_SPOTIFY_TRACKS_HOURS", "24")),
+    "movies": float(os.getenv("SCHEDULE_MOVIES_HOURS", "24")),
+    "pokemon": float(os.getenv("SCHEDULE_POKEMON_HOURS", "168")),
+}
+SCHEDULE_JITTER = float(os.getenv("SCHEDULE_JITTER", "0.1"))
+SCHEDULE_MAX_NEW = int(os.getenv("SCHEDULE_MAX_NEW", "25"))
+
+# Async collectors (see data_collection/sources.py): per-host limits
+SOURCE_CONCURRENCY = {
+    "pokeapi.co": 4,
+    "api.spotify.com": 2,
+    "api.weather.gov": 2,
+    "www.omdbapi.com": 2,
+}
+# Minimum seconds between request starts to one host (the old per-row sleeps)
+SOURCE_MIN_INTERVAL = {
+    "pokeapi.co": 0.15,
+    "api.spotify.com": 0.2,
+    "api.weather.gov": 0.25,
+    "www.omdbapi.com": 0.2,
+}
+SOURCE_BATCH_SIZE = int(os.getenv("SOURCE_BATCH_SIZE", "50"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+
+# Ids per /pokemon?limit= page when PokemonSource lists ids instead of probing them
+POKEAPI_LIST_PAGE = int(os.getenv("POKEAPI_LIST_PAGE", "500"))
+# OmdbSearchSource (see data_collection/omdb_api.py): search words and page cap per word
+OMDB_SEARCH_TERMS = os.getenv("OMDB_SEARCH_TERMS", "night,love,war,star,king,city,dead,life,man,world").split(",")
+OMDB_SEARCH_MAX_PAGES = int(os.getenv("OMDB_SEARCH_MAX_PAGES", "10"))
+
+# Streaming input files (see data_collection/input_files.py)
+INPUT_CHUNK_SIZE = int(os.getenv("INPUT_CHUNK_SIZE", "10000"))  # records read per chunk
+# Distinct values the dedupe Bloom filter is sized for, and its false-positive rate
+INPUT_DEDUPE_CAPACITY = int(os.getenv("INPUT_DEDUPE_CAPACITY", "1000000"))
+INPUT_DEDUPE_ERROR_RATE = float(os.getenv("INPUT_DEDUPE_ERROR_RATE", "0.001"))
+# Minimum tracks the Spotify collector's Bloom filter is sized for (grows with the table)
+TRACK_DEDUPE_CAPACITY = int(os.getenv("TRACK_DEDUPE_CAPACITY", "100000"))
+
+# Staged ingest pipeline (see data_collection/pipeline.py)
+PIPELINE_PARSE_WORKERS = int(os.getenv("PIPELINE_PARSE_WORKERS", "2"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "100"))
+PIPELINE_WRITER_BATCH = int(os.getenv("PIPELINE_WRITER_BATCH", "500"))
+PIPELINE_WRITER_INTERVAL = float(os.getenv("PIPELINE_WRITER_INTERVAL", "1.0"))
+
+# Raw payload archive (see data_collection/raw_store.py)
+RAW_STORE_ENABLED = os.getenv("SI201_RAW_STORE", "1") == "1"
+RAW_STORE_DIR = os.getenv("SI201_RAW_DIR", "raw_payloads")
+RAW_SEGMENT_BYTES = int(os.getenv("SI201_RAW_SEGMENT_BYTES", str(16 * 1024 * 1024)))
+
+# Sharded storage (see database/sharding.py): one file per source + lookups
+SHARD_DIR = os.getenv("SI201_SHARD_DIR", "shards")
+
+# Federated analytics (see database/federated.py): earlier files win on duplicates
+FEDERATED_DB_PATHS = os.getenv("SI201_FEDERATED_DBS", "si201_project.db,si201_project_old.db,archive.db").split(",")
@@ -0,0 +1,109 @@
+"""
+Streaming readers for large collector inputs
+
+The collectors' inputs live in main.py as literals (ARTIST_LIST, TITLE_LIST,
+CITY_COORDS). To feed millions of titles or thousands of coordinates, read
+them from files instead:
+
+  .csv    header row; pick the column(s) with fields
+  .jsonl  one JSON object (pick keys with fields) or plain JSON string per line
+  .txt    one value per line
+
+each optionally gzip-compressed (titles.csv.gz, cities.jsonl.gz, ...).
+
+Files are read lazily, INPUT_CHUNK_SIZE records at a time, and the Sources
+pull their items through an iterator, so memory holds one chunk plus the
+requests in flight - not the whole file. Repeated values are dropped with a
+fixed-size BloomFilter (database/existence.py), so deduplication memory
+does not grow with the input either. The price is that about
+INPUT_DEDUPE_ERROR_RATE of the values are skipped as false duplicates once
+INPUT_DEDUPE_CAPACITY distinct values have been read.
+
+Example:
+    titles = stream_inputs("titles.csv.gz", fields=["title"])
+    cities = stream_inputs("cities.jsonl", fields=["name", "lat", "lon"])
+    run_sources(conn, [OmdbSource(titles, max_new=1000), WeatherSource(cities, 500)])
+"""
+import csv
+import gzip
+import io
+import json
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Sequence
+from config.api_keys import INPUT_CHUNK_SIZE, INPUT_DEDUPE_CAPACITY, INPUT_DEDUPE_ERROR_RATE
+from database.existence import BloomFilter
+
+
+def open_text(path: str) -> io.TextIOBase:
+    """Open path for reading as text, decompressing .gz files on the fly."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def _file_format(path: str) -> str:
+    name = path[:-len(".gz")] if path.endswith(".gz") else path
+    ext = name.rsplit(".", 1)[-1].lower() if "." in name else "txt"
+    if ext not in ("csv", "jsonl", "txt"):
+        raise ValueError(f"Unsupported input file type: {path} (use .csv, .jsonl or .txt, optionally .gz)")
+    return ext
+
+
+def _pick(record, fields: Optional[Sequence[str]]):
+    """One field -> its value, several -> a tuple, none -> the record's first value."""
+    if not isinstance(record, dict):
+        return record
+    if not fields:
+        return next(iter(record.values()), None)
+    if len(fields) == 1:
+        return record.get(fields[0])
+    return tuple(record.get(field) for field in fields)
+
+
+def read_records(path: str, fields: Optional[Sequence[str]] = None) -> Iterator:
+    """Yield one value (or tuple of values) per record of path, lazily."""
+    fmt = _file_format(path)
+    with open_text(path) as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                yield _pick(row, fields)
+        elif fmt == "jsonl":
+            for line in f:
+                if line.strip():
+                    yield _pick(json.loads(line), fields)
+        else:
+            for line in f:
+                if line.strip():
+                    yield line.strip()
+
+
+def read_chunks(path: str, fields: Optional[Sequence[str]] = None,
+                chunk_size: int = INPUT_CHUNK_SIZE) -> Iterator[List]:
+    """read_records() in lists of up to chunk_size values."""
+    records = read_records(path, fields)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def dedupe(values: Iterable, capacity: int = INPUT_DEDUPE_CAPACITY,
+           error_rate: float = INPUT_DEDUPE_ERROR_RATE) -> Iterator:
+    """Yield each value the first time it is seen, in bounded memory (BloomFilter)."""
+    seen = BloomFilter(capacity, error_rate)
+    for value in values:
+        if seen.add(value):
+            yield value
+
+
+def stream_inputs(path: str, fields: Optional[Sequence[str]] = None, chunk_size: int = INPUT_CHUNK_SIZE,
+                  unique: bool = True) -> Iterator:
+    """
+    Lazily yield collector inputs from a file: empty values dropped and,
+    with unique=True, repeats dropped too. Pass the result straight to a
+    Source (SpotifySource, OmdbSource, WeatherSource, ...).
+    """
+    values = (value for chunk in read_chunks(path, fields, chunk_size) for value in chunk
+              if value not in (None, "") and not (isinstance(value, tuple) and None in value))
+    return dedupe(values) if unique else values
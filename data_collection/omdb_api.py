@@ -8,24 +8,133 @@ STRING-TO-INTEGER MAPPING:
 This eliminates ALL duplicate strings in movie data.
 Note: Movies may have multiple genres (e.g., "Action, Drama"), we store the full string
 as a single lookup entry to maintain the original genre combination.
+
+SEARCH DISCOVERY:
+OmdbSource needs an exact title list and makes one ?t= lookup per title,
+which misses or picks the wrong film for short titles ("It", "Up", "Her").
+OmdbSearchSource instead pages the search endpoint (?s=term&type=&y=&page=,
+10 results per page) to collect imdbIDs, skips those already in movies, and
+fetches the rest concurrently by ?i=imdbID. Paging stops as soon as enough
+new ids are found, so the request count follows max_new, not the size of
+any list. Search pages go through the same host limiter as the fetches.
 """
-import requests
 import sqlite3
-import time
-from typing import List
-from config.api_keys import OMDB_BASE, OMDB_API_KEY
-from database.db_helper import get_or_create_lookup_id
+from typing import Dict, Iterable, List, Optional
+import requests
+from config.api_keys import OMDB_BASE, OMDB_API_KEY, OMDB_SEARCH_MAX_PAGES
+from database.existence import load_existing_keys
+from data_collection.records import Movie
+from data_collection.sources import Source, run_sources
+from monitoring.structured_logging import get_logger
+
+
+log = get_logger("omdb")
+
+
+class OmdbSource(Source):
+    """Movies looked up by title (?t=), skipping imdb_ids already stored."""
+
+    name = "OMDb"
+    host = "www.omdbapi.com"
+    table = "movies"
+    columns = ("imdb_id", "title", "year", "genre_id", "runtime", "imdb_rating", "box_office_id", "updated_at")
+    lookups = {
+        "genre": ("genres_lookup", "genre_name", "genre_id"),
+        "box_office": ("box_office_lookup", "box_office_value", "box_office_id"),
+    }
+    noun = "movies"
 
+    def __init__(self, title_list: Iterable[str] = (), max_new: int = 25):
+        super().__init__(max_new)
+        self.title_list = title_list
+        self.known_ids = set()
 
-def already_exists(conn: sqlite3.Connection, table: str, where_clause: str, params=()) -> bool:
-    """Check if a record already exists in the database."""
-    c = conn.cursor()
-    q = f"SELECT 1 FROM {table} WHERE {where_clause} LIMIT 1"
-    c.execute(q, params)
-    return c.fetchone() is not None
+    def discover(self, conn: sqlite3.Connection) -> Iterable[str]:
+        # Load all known imdb_ids once; membership is then checked in memory
+        self.known_ids = load_existing_keys(conn, "movies", "imdb_id")
+        return self.title_list
 
+    async def fetch(self, title: str) -> Optional[dict]:
+        return await self.get_json(OMDB_BASE, params={"t": title, "apikey": OMDB_API_KEY})
 
-def fetch_movies_by_title_list(conn: sqlite3.Connection, title_list: List[str], max_new: int = 25):
+    def parse(self, data: dict) -> List[Movie]:
+        if data.get("Response") == "False":
+            return []
+        imdb_id = data.get("imdbID")
+        if not imdb_id or imdb_id in self.known_ids:
+            return []
+        return [Movie.from_payload(data)]
+
+    def insert_row(self, c: sqlite3.Cursor, row: Movie) -> bool:
+        if not super().insert_row(c, row):
+            return False
+        self.known_ids.add(row["imdb_id"])
+        return True
+
+    def describe(self, row: Movie) -> str:
+        return f"{row['title']} (genre_id={row['genre_id']}, box_office_id={row['box_office_id']})"
+
+
+def search_page(source: Source, term: str, page: int = 1, kind: Optional[str] = "movie",
+                year: Optional[int] = None) -> Dict:
+    """
+    One page (up to 10 results) of ?s= search results, requested through
+    source.get_pages() so it shares the host limiter, retries and archive
+    with the ?i= fetches. Raises requests.RequestException on failure.
+    """
+    params = {"s": term, "page": page, "apikey": OMDB_API_KEY}
+    if kind:
+        params["type"] = kind
+    if year:
+        params["y"] = year
+    # Archive key without the API key
+    key = "|".join(str(v) for v in (term, page, kind or "", year or ""))
+    data, = source.get_pages([(OMDB_BASE, params, key)])
+    return data
+
+
+class OmdbSearchSource(OmdbSource):
+    """Movies found with the search endpoint (?s=), fetched by imdbID (?i=)."""
+
+    def __init__(self, search_terms: List[str] = (), max_new: int = 25, kind: Optional[str] = "movie",
+                 year: Optional[int] = None, max_pages: int = OMDB_SEARCH_MAX_PAGES):
+        super().__init__((), max_new)
+        self.search_terms = search_terms
+        self.kind = kind
+        self.year = year
+        self.max_pages = max_pages
+        self.search_requests = 0
+
+    def discover(self, conn: sqlite3.Connection) -> List[str]:
+        self.known_ids = load_existing_keys(conn, "movies", "imdb_id")
+        candidates: Dict[str, None] = {}  # insertion-ordered set
+        for term in self.search_terms:
+            for page in range(1, self.max_pages + 1):
+                if len(candidates) >= self.remaining():
+                    break
+                try:
+                    data = search_page(self, term, page, self.kind, self.year)
+                except requests.RequestException as e:
+                    self.log.warning("[%s] Search error for %s: %s", self.name, term, e, extra={"event": "error"})
+                    break
+                self.search_requests += 1
+                if data.get("Response") != "True":
+                    break  # "Movie not found!" past the last page, or "Too many results."
+                for result in data.get("Search", []):
+                    imdb_id = result.get("imdbID")
+                    if imdb_id and imdb_id not in self.known_ids:
+                        candidates[imdb_id] = None
+                if page * 10 >= int(data.get("totalResults", 0)):
+                    break
+        self.log.info("[%s] %d search requests found %d new imdbIDs.", self.name, self.search_requests,
+                      len(candidates), extra={"event": "discovered"})
+        return list(candidates)
+
+    async def fetch(self, imdb_id: str) -> Optional[dict]:
+        return await self.get_json(OMDB_BASE, params={"i": imdb_id, "apikey": OMDB_API_KEY})
+
+
+def fetch_movies_by_title_list(conn: sqlite3.Connection, title_list: Iterable[str], max_new: int = 25):
     """
     Fetch movie data from OMDb API (limited to 25 new entries per run).
 
@@ -36,61 +145,27 @@ def fetch_movies_by_title_list(conn: sqlite3.Connection, title_list: List[str],
 
     Args:
         conn: Database connection
-        title_list: List of movie titles to fetch
+        title_list: Movie titles to fetch (any iterable, e.g. stream_inputs())
+        max_new: Maximum number of new movies to insert (default 25)
+    """
+    if not OMDB_API_KEY:
+        log.warning("OMDB_API_KEY not set. Skipping OMDb fetch.")
+        return
+    run_sources(conn, [OmdbSource(title_list, max_new)])
+
+
+def fetch_movies_by_search(conn: sqlite3.Connection, search_terms: List[str], max_new: int = 25,
+                           year: Optional[int] = None):
+    """
+    Fetch movies found through OMDb's search endpoint (see OmdbSearchSource).
+
+    Args:
+        conn: Database connection
+        search_terms: Words to search titles for (e.g. "night", "love")
         max_new: Maximum number of new movies to insert (default 25)
+        year: Only search movies released in this year
     """
     if not OMDB_API_KEY:
-        print("OMDB_API_KEY not set. Skipping OMDb fetch.")
+        log.warning("OMDB_API_KEY not set. Skipping OMDb fetch.")
         return
-    inserted = 0
-    c = conn.cursor()
-    for title in title_list:
-        if inserted >= max_new:
-            break
-        params = {"t": title, "apikey": OMDB_API_KEY}
-        try:
-            resp = requests.get(OMDB_BASE, params=params, timeout=10)
-            if resp.status_code != 200:
-                continue
-            data = resp.json()
-            if data.get("Response") == "False":
-                continue
-            imdb_id = data.get("imdbID")
-            if not imdb_id or already_exists(conn, "movies", "imdb_id = ?", (imdb_id,)):
-                continue
-            title_ret = data.get("Title")
-            year = None
-            try:
-                year = int(data.get("Year", "").split("–")[0]) if data.get("Year") else None
-            except:
-                year = None
-            genre_str = data.get("Genre")
-            box_office_str = data.get("BoxOffice")
-
-            # Convert genre and box_office strings to integer IDs using lookup tables
-            genre_id = get_or_create_lookup_id(conn, 'genres_lookup', 'genre_name', genre_str)
-            box_office_id = get_or_create_lookup_id(conn, 'box_office_lookup', 'box_office_value', box_office_str)
-
-            runtime = None
-            rt = data.get("Runtime")
-            try:
-                runtime = int(rt.replace(" min", "")) if rt and "min" in rt else None
-            except:
-                runtime = None
-            imdb_rating = None
-            try:
-                imdb_rating = float(data.get("imdbRating")) if data.get("imdbRating") and data.get("imdbRating") != "N/A" else None
-            except:
-                imdb_rating = None
-
-            c.execute("""
-                INSERT OR IGNORE INTO movies (imdb_id, title, year, genre_id, runtime, imdb_rating, box_office_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (imdb_id, title_ret, year, genre_id, runtime, imdb_rating, box_office_id))
-            conn.commit()
-            inserted += 1
-            print(f"[OMDb] Inserted {title_ret} (genre_id={genre_id}, box_office_id={box_office_id}) ({inserted}/{max_new})")
-            time.sleep(0.2)
-        except Exception as e:
-            print("OMDb error:", e)
-    print(f"[OMDb] Finished run: inserted {inserted} new movies.")
+    run_sources(conn, [OmdbSearchSource(search_terms, max_new, year=year)])
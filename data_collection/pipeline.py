@@ -0,0 +1,236 @@
+"""
+Staged producer/consumer ingest pipeline
+
+run_sources() (data_collection/sources.py) still fetches, parses and writes
+from one thread, so SQLite sits idle while requests are in flight and the
+network sits idle during a write. run_pipeline() splits the same Sources
+into three stages connected by bounded queues:
+
+  fetch  : one thread running an asyncio loop; per-host limits as in run_sources()
+     |  parse_queue (payloads)
+  parse  : parse_workers threads calling source.parse()
+     |  write_queue (rows)
+  write  : ONE writer thread with its own connection; commits every
+           writer_batch rows (or writer_interval seconds), not per row
+
+When a queue is full the stage in front of it blocks (backpressure), so a
+slow database slows fetching down instead of piling rows up in memory.
+
+If the fetch or write stage fails, it sets a shared stop event: fetching
+stops launching requests, parsers discard what is queued and the writer
+keeps draining its queue until every parser has finished, so no stage is
+left blocked on a full queue. run_pipeline() then re-raises the error.
+
+Per-stage throughput is counted in si201_pipeline_items_total{stage,source}
+and queue depths are reported as si201_queue_depth{queue="pipeline.*"}.
+
+Example:
+    run_pipeline(conn, [PokemonSource(500, 1025), WeatherSource(cities, 500)])
+"""
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+from config.api_keys import (PIPELINE_PARSE_WORKERS, PIPELINE_QUEUE_SIZE, PIPELINE_WRITER_BATCH,
+                             PIPELINE_WRITER_INTERVAL)
+from database.db_helper import create_connection
+from database.snapshot_cache import database_file
+from data_collection.raw_store import archive
+from data_collection.sources import HostLimiter, Source
+from monitoring.metrics import PIPELINE_ITEMS, QUEUE_DEPTH
+from monitoring.structured_logging import Progress, get_logger
+
+
+log = get_logger("pipeline")
+
+_DONE = object()
+
+
+async def _fetch_source(source: Source, items: Iterator, limiter: HostLimiter, parse_queue: "queue.Queue",
+                        stop: threading.Event):
+    in_flight = set()
+
+    async def fetch_one(item):
+        try:
+            async with limiter:
+                payload = await source.fetch(item)
+        except Exception as e:
+            source.log.warning("[%s] Error for %s: %s", source.name, item, e, extra={"event": "error"})
+            return
+        if payload is not None and not stop.is_set():
+            await asyncio.to_thread(archive, source.name, item, payload)
+            PIPELINE_ITEMS.inc(stage="fetch", source=source.name)
+            # Blocks (off the loop) while the parse queue is full
+            await asyncio.to_thread(parse_queue.put, (source, payload))
+
+    for item in items:
+        # The writer updates source.inserted; stop fetching once the limit is reached
+        if source.remaining() <= 0 or stop.is_set():
+            break
+        if len(in_flight) >= limiter.concurrency:
+            _, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        in_flight.add(asyncio.ensure_future(fetch_one(item)))
+    if in_flight:
+        await asyncio.wait(in_flight)
+
+
+def _fetch_stage(work: Dict[Source, Iterator], parse_queue: "queue.Queue", parse_workers: int,
+                 stop: threading.Event, errors: List[BaseException]):
+    async def fetch_all():
+        limiters: Dict[str, HostLimiter] = {}
+        for source in work:
+            limiters.setdefault(source.host, HostLimiter(source.host))
+        await asyncio.gather(*(_fetch_source(s, items, limiters[s.host], parse_queue, stop)
+                               for s, items in work.items()))
+
+    try:
+        asyncio.run(fetch_all())
+    except Exception as e:
+        log.error("[Pipeline] Fetch stage failed: %s", e, extra={"event": "error", "stage": "fetch"})
+        errors.append(e)
+        stop.set()
+    finally:
+        for _ in range(parse_workers):
+            parse_queue.put(_DONE)
+
+
+def _parse_stage(parse_queue: "queue.Queue", write_queue: "queue.Queue", stop: threading.Event):
+    while True:
+        item = parse_queue.get()
+        if item is _DONE:
+            write_queue.put(_DONE)
+            return
+        if stop.is_set():
+            continue  # keep draining so the fetch stage never blocks on a full queue
+        source, payload = item
+        try:
+            rows = source.parse(payload)
+        except Exception as e:
+            source.log.warning("[%s] Parse error: %s", source.name, e, extra={"event": "error"})
+            continue
+        PIPELINE_ITEMS.inc(stage="parse", source=source.name)
+        if rows:
+            write_queue.put((source, rows))
+
+
+def _write_stage(db_file: str, write_queue: "queue.Queue", parse_workers: int,
+                 writer_batch: int, writer_interval: float, progress: Dict[Source, Progress],
+                 stop: threading.Event, errors: List[BaseException]):
+    conn: Optional[sqlite3.Connection] = None
+    pending: Dict[Source, List[dict]] = {}
+    pending_rows = 0
+    last_commit = time.monotonic()
+    finished_parsers = 0
+
+    def commit():
+        nonlocal pending_rows, last_commit
+        for source, rows in pending.items():
+            new = source.write(conn, rows)
+            PIPELINE_ITEMS.inc(new, stage="write", source=source.name)
+            progress[source].update(source.inserted)
+        conn.commit()
+        pending.clear()
+        pending_rows = 0
+        last_commit = time.monotonic()
+
+    try:
+        conn = create_connection(db_file)
+        while finished_parsers < parse_workers:
+            try:
+                item = write_queue.get(timeout=writer_interval)
+            except queue.Empty:
+                item = None
+            if item is _DONE:
+                finished_parsers += 1
+            elif item is not None:
+                source, rows = item
+                if source.remaining() > 0:
+                    pending.setdefault(source, []).extend(rows)
+                    pending_rows += len(rows)
+            if pending_rows and (pending_rows >= writer_batch
+                                 or time.monotonic() - last_commit >= writer_interval
+                                 or any(len(rows) >= s.remaining() for s, rows in pending.items())):
+                commit()
+        if pending_rows:
+            commit()
+    except Exception as e:
+        log.error("[Pipeline] Write stage failed: %s", e, extra={"event": "error", "stage": "write"})
+        errors.append(e)
+        stop.set()
+        if conn is not None:
+            conn.rollback()
+        # Parsers may be blocked on put(); consume until every one of them is done
+        while finished_parsers < parse_workers:
+            if write_queue.get() is _DONE:
+                finished_parsers += 1
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+def run_pipeline(conn: sqlite3.Connection, sources: List[Source],
+                 parse_workers: int = PIPELINE_PARSE_WORKERS, queue_size: int = PIPELINE_QUEUE_SIZE,
+                 writer_batch: int = PIPELINE_WRITER_BATCH,
+                 writer_interval: float = PIPELINE_WRITER_INTERVAL) -> Dict[str, int]:
+    """
+    Run sources through the fetch -> parse -> write pipeline.
+
+    Args:
+        conn: Connection to a file-backed database (the writer opens its own)
+        sources: Source instances (see data_collection/sources.py)
+        parse_workers: Number of parse threads
+        queue_size: Capacity of each inter-stage queue
+        writer_batch: Rows per commit
+        writer_interval: Max seconds between commits while rows are pending
+
+    Returns:
+        {source name: rows inserted}
+
+    Raises:
+        The first exception from the fetch or write stage, after every
+        stage has shut down (batches committed before it are kept)
+    """
+    db_file = database_file(conn)
+    if not db_file:
+        raise ValueError("run_pipeline needs a file-backed database (the writer opens its own connection)")
+
+    # discover() runs here, on the caller's connection, before any thread starts;
+    # items stay lazy iterators, so streamed inputs are never loaded whole
+    work = {source: iter(source.discover(conn)) for source in sources}
+    conn.commit()  # don't hold discover()'s read lock while the writer commits
+    progress = {source: Progress(source.log, source.name, source.max_new) for source in sources}
+
+    parse_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    write_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    QUEUE_DEPTH.track(parse_queue.qsize, queue="pipeline.parse")
+    QUEUE_DEPTH.track(write_queue.qsize, queue="pipeline.write")
+
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    threads = [threading.Thread(target=_fetch_stage, args=(work, parse_queue, parse_workers, stop, errors),
+                                name="pipeline-fetch")]
+    threads += [threading.Thread(target=_parse_stage, args=(parse_queue, write_queue, stop),
+                                 name=f"pipeline-parse-{i}") for i in range(parse_workers)]
+    threads.append(threading.Thread(target=_write_stage, name="pipeline-write",
+                                    args=(db_file, write_queue, parse_workers, writer_batch,
+                                          writer_interval, progress, stop, errors)))
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    QUEUE_DEPTH.untrack(queue="pipeline.parse")
+    QUEUE_DEPTH.untrack(queue="pipeline.write")
+    if errors:
+        raise errors[0]
+
+    elapsed = time.perf_counter() - start
+    for source in sources:
+        progress[source].done(source.inserted)
+        source.log.info("[%s] Finished run: inserted %d new %s.", source.name, source.inserted, source.noun,
+                        extra={"event": "finished", "inserted": source.inserted})
+    log.info("[Pipeline] %d rows in %.1fs", sum(s.inserted for s in sources), elapsed,
+             extra={"event": "pipeline_done", "seconds": round(elapsed, 3)})
+    return {source.name: source.inserted for source in sources}
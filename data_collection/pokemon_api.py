@@ -5,23 +5,127 @@ Author: Zanesha Chowdhury
 STRING-TO-INTEGER MAPPING:
 Pokemon types (fire, water, etc.) are mapped to integers using the types_lookup table.
 This eliminates duplicate type strings in the database.
+
+LIST DISCOVERY:
+By default the collector probes ids 1..max_id. With list_discovery=True it
+instead pages /pokemon?limit=&offset= (POKEAPI_LIST_PAGE ids per call) to
+learn every id that exists, and reads each /type/{name} membership list
+(~20 calls) to get every Pokemon's primary type in bulk. Detail fetches
+then only go to ids that are not in the pokemon table yet. The list and
+type pages go through Source.get_pages(), so they count against the same
+per-host limit, retries and raw archive as the detail fetches.
 """
-import requests
 import sqlite3
-import time
-from config.api_keys import POKEAPI_BASE
-from database.db_helper import get_or_create_lookup_id
+from typing import Dict, List, Optional
+import requests
+from config.api_keys import POKEAPI_BASE, POKEAPI_LIST_PAGE
+from database.db_helper import get_or_create_lookup_ids
+from database.existence import filter_new_keys, load_existing_bitmap
+from data_collection.records import Pokemon
+from data_collection.sources import Source, run_sources
+from monitoring.metrics import ROWS_INSERTED
+
+
+def _id_from_url(url: str) -> int:
+    """https://pokeapi.co/api/v2/pokemon/25/ -> 25"""
+    return int(url.rstrip("/").rsplit("/", 1)[1])
 
 
-def already_exists(conn: sqlite3.Connection, table: str, where_clause: str, params=()) -> bool:
-    """Check if a record already exists in the database."""
+def list_pokemon_ids(source: Source, page_size: int = POKEAPI_LIST_PAGE) -> List[int]:
+    """Every Pokemon id PokeAPI knows, following the list endpoint's "next" links."""
+    ids = []
+    url, params = f"{POKEAPI_BASE}/pokemon", {"limit": page_size, "offset": 0}
+    while url:
+        page, = source.get_pages([(url, params, None)])
+        ids += [_id_from_url(p["url"]) for p in page.get("results", [])]
+        url, params = page.get("next"), None  # "next" already carries limit/offset
+    return ids
+
+
+def list_primary_types(source: Source) -> Dict[int, str]:
+    """Pokemon id -> primary (slot 1) type, from one /type/{name} call per type."""
+    index, = source.get_pages([(f"{POKEAPI_BASE}/type", {"limit": 100}, None)])
+    types = index.get("results", [])
+    # Requested together; the host limiter decides how many run at once
+    members = source.get_pages([(t["url"], None, None) for t in types])
+    primary = {}
+    for t, data in zip(types, members):
+        for entry in data.get("pokemon", []):
+            if entry.get("slot") == 1:
+                primary[_id_from_url(entry["pokemon"]["url"])] = t["name"]
+    return primary
+
+
+def backfill_types(conn: sqlite3.Connection, primary_types: Dict[int, str]) -> int:
+    """Set type_id on stored Pokemon that have none. Returns rows updated."""
+    ids = get_or_create_lookup_ids(conn, "types_lookup", "type_name", primary_types.values())
     c = conn.cursor()
-    q = f"SELECT 1 FROM {table} WHERE {where_clause} LIMIT 1"
-    c.execute(q, params)
-    return c.fetchone() is not None
+    c.executemany("UPDATE pokemon SET type_id = ? WHERE id = ? AND type_id IS NULL",
+                  ((ids[name], pid) for pid, name in primary_types.items()))
+    updated = c.rowcount
+    conn.commit()
+    return updated
+
 
+class PokemonSource(Source):
+    """Pokemon ids 1..max_id (or every listed id) that are not in the pokemon table yet."""
 
-def fetch_pokemon_up_to_limit(conn: sqlite3.Connection, target_new: int = 25, max_id: int = 151):
+    name = "PokeAPI"
+    host = "pokeapi.co"
+    table = "pokemon"
+    columns = ("id", "name", "base_experience", "height", "weight", "type_id")
+    lookups = {"primary_type": ("types_lookup", "type_name", "type_id")}
+
+    def __init__(self, target_new: int = 25, max_id: Optional[int] = 151, list_discovery: bool = False):
+        super().__init__(target_new)
+        self.max_id = max_id
+        self.list_discovery = list_discovery
+        self.primary_types: Dict[int, str] = {}
+
+    def discover(self, conn: sqlite3.Connection) -> List[int]:
+        if self.list_discovery:
+            try:
+                return self.discover_from_lists(conn)
+            except (requests.RequestException, ValueError) as e:
+                self.log.warning("[%s] List discovery failed (%s). Probing ids 1..%s instead.",
+                                 self.name, e, self.max_id or 151, extra={"event": "error"})
+        # One range query up front instead of one existence check per id
+        return load_existing_bitmap(conn, "pokemon", "id", 1, self.max_id or 151).missing()
+
+    def discover_from_lists(self, conn: sqlite3.Connection) -> List[int]:
+        ids = list_pokemon_ids(self)
+        if self.max_id is not None:
+            ids = [pid for pid in ids if pid <= self.max_id]
+        self.primary_types = list_primary_types(self)
+        backfilled = backfill_types(conn, self.primary_types)
+        # Listed ids are sparse (alternate forms start at 10001), so no bitmap; one anti-join instead
+        todo = filter_new_keys(conn, "pokemon", "id", ids)
+        self.log.info("[%s] Listed %d ids, %d not stored yet; %d types backfilled.",
+                      self.name, len(ids), len(todo), backfilled, extra={"event": "discovered"})
+        return todo
+
+    async def fetch(self, pid: int) -> Optional[dict]:
+        return await self.get_json(f"{POKEAPI_BASE}/pokemon/{pid}")
+
+    def parse(self, data: dict) -> List[Pokemon]:
+        return [Pokemon.from_payload(data, self.primary_types.get(data.get("id")))]
+
+    def insert_row(self, c: sqlite3.Cursor, row: Pokemon) -> bool:
+        if not super().insert_row(c, row):
+            return False
+        c.execute("""
+            INSERT OR IGNORE INTO pokemon_stats (pokemon_id, hp, attack, defense, speed)
+            VALUES (?, ?, ?, ?, ?)
+        """, row.stats.values())
+        ROWS_INSERTED.inc(table="pokemon_stats")
+        return True
+
+    def describe(self, row: Pokemon) -> str:
+        return f"{row['id']} {row['name']} (type_id={row['type_id']})"
+
+
+def fetch_pokemon_up_to_limit(conn: sqlite3.Connection, target_new: int = 25, max_id: Optional[int] = 151,
+                              list_discovery: bool = False):
     """
     Fetch Pokemon data from PokeAPI (limited to 25 new entries per run).
 
@@ -32,51 +136,7 @@ def fetch_pokemon_up_to_limit(conn: sqlite3.Connection, target_new: int = 25, ma
     Args:
         conn: Database connection
         target_new: Maximum number of new Pokemon to insert (default 25)
-        max_id: Maximum Pokemon ID to fetch (default 151 for Gen 1)
+        max_id: Maximum Pokemon ID to fetch (default 151 for Gen 1; None = no limit)
+        list_discovery: Enumerate ids through the list/type endpoints instead of probing
     """
-    inserted = 0
-    c = conn.cursor()
-    for pid in range(1, max_id + 1):
-        if inserted >= target_new:
-            break
-        if already_exists(conn, "pokemon", "id = ?", (pid,)):
-            continue
-        url = f"{POKEAPI_BASE}/pokemon/{pid}"
-        try:
-            resp = requests.get(url, timeout=10)
-            if resp.status_code != 200:
-                continue
-            data = resp.json()
-            name = data.get("name")
-            base_experience = data.get("base_experience")
-            height = data.get("height")
-            weight = data.get("weight")
-            types = data.get("types", [])
-            primary_type = types[0]["type"]["name"] if types else None
-
-            # Convert type string to integer ID using lookup table
-            type_id = get_or_create_lookup_id(conn, 'types_lookup', 'type_name', primary_type)
-
-            c.execute("""
-                INSERT OR IGNORE INTO pokemon (id, name, base_experience, height, weight, type_id)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (pid, name, base_experience, height, weight, type_id))
-
-            stats_map = {s["stat"]["name"]: s["base_stat"] for s in data.get("stats", [])}
-            hp = stats_map.get("hp")
-            attack = stats_map.get("attack")
-            defense = stats_map.get("defense")
-            speed = stats_map.get("speed")
-
-            c.execute("""
-                INSERT OR IGNORE INTO pokemon_stats (pokemon_id, hp, attack, defense, speed)
-                VALUES (?, ?, ?, ?, ?)
-            """, (pid, hp, attack, defense, speed))
-
-            conn.commit()
-            inserted += 1
-            print(f"[PokeAPI] Inserted {pid} {name} (type_id={type_id}) ({inserted}/{target_new})")
-            time.sleep(0.15)
-        except Exception as e:
-            print("Error:", e)
-    print(f"[PokeAPI] Finished run: inserted {inserted} new rows.")
+    run_sources(conn, [PokemonSource(target_new, max_id, list_discovery)])
@@ -0,0 +1,272 @@
+"""
+Raw payload landing zone
+
+Every collector keeps only a few fields of each API response (four of the
+six Pokemon base stats, one type, one shortForecast, ...). To be able to
+re-derive rows after a schema or parser change without re-downloading,
+run_sources() and run_pipeline() also append every raw payload here.
+
+LAYOUT (RAW_STORE_DIR, default raw_payloads/):
+    raw_payloads/
+        PokeAPI/index.sqlite          <- item_key -> segment, offset, length
+        PokeAPI/segment-000001.bin
+        PokeAPI/segment-000002.bin    <- rotated after RAW_SEGMENT_BYTES
+        Weather/index.sqlite
+        Weather/segment-000001.bin
+        ...
+
+Each source has its own index, so sources archiving from separate
+processes (sharded collection) never wait on each other's index lock.
+
+Segments are append-only. Each record is a 4-byte little-endian length
+followed by a zlib-compressed JSON object {"key", "ts", "payload"}, so a
+segment can be read front to back without the index, and any single record
+can be read with one seek using the index.
+
+REPLAY:
+    python3 main.py --replay [--rebuild]
+re-runs the current parse() of every Source over the archive - one segment
+per worker process, no network - and writes the rows through the normal
+sink (INSERT OR IGNORE, lookups interned in batches). On its own that only
+fills in rows that are missing; rows already stored are left as they are.
+To re-derive them after a parser change, --rebuild first deletes the rows of
+every replayed source's tables (REBUILD_TABLES), so rows that are not in the
+archive are lost, and history rows keyed on renumbered ids are cleared.
+"""
+import atexit
+import importlib
+import json
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from config.api_keys import RAW_SEGMENT_BYTES, RAW_STORE_DIR, RAW_STORE_ENABLED
+from monitoring.structured_logging import get_logger
+
+
+log = get_logger("replay")
+
+_HEADER = struct.Struct("<I")
+
+# Source name -> "module:Class", used to rebuild parsers in replay workers.
+# List/search pages are archived as "<name>-pages" and are not replayed.
+SOURCE_CLASSES = {
+    "PokeAPI": "data_collection.pokemon_api:PokemonSource",
+    "Spotify": "data_collection.spotify_api:SpotifySource",
+    "Weather": "data_collection.weather_api:WeatherSource",
+    "OMDb": "data_collection.omdb_api:OmdbSource",
+}
+
+# Source name -> tables replay(rebuild=True) empties first, dependents first.
+# Tracks and weather get new surrogate ids, so their history rows go too;
+# movies keep their imdb_id key, so movies_history stays.
+REBUILD_TABLES = {
+    "PokeAPI": ["pokemon_stats", "pokemon"],
+    "Spotify": ["track_artists", "tracks_history", "tracks"],
+    "Weather": ["weather_history", "weather"],
+    "OMDb": ["movies"],
+}
+
+
+class RawStore:
+    """Append-only, segment-rotated, compressed payload archive with an offset index."""
+
+    def __init__(self, root: str = RAW_STORE_DIR, segment_bytes: int = RAW_SEGMENT_BYTES):
+        self.root = root
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        # source -> its index connection and uncommitted insert count
+        self._indexes: Dict[str, sqlite3.Connection] = {}
+        self._pending: Dict[str, int] = {}
+        # source -> open handle of its current (newest) segment
+        self._files: Dict[str, object] = {}
+
+    def _connect_index(self, source: str) -> sqlite3.Connection:
+        index = self._indexes.get(source)
+        if index is None:
+            os.makedirs(os.path.join(self.root, source), exist_ok=True)
+            index = self._indexes[source] = sqlite3.connect(os.path.join(self.root, source, "index.sqlite"),
+                                                            check_same_thread=False)
+            index.execute("""
+            CREATE TABLE IF NOT EXISTS payloads (
+                source TEXT NOT NULL,
+                item_key TEXT NOT NULL,
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+            """)
+            index.execute("CREATE INDEX IF NOT EXISTS idx_payloads_key ON payloads(source, item_key)")
+        return index
+
+    def segments(self, source: str) -> List[str]:
+        """Segment paths for one source, oldest first."""
+        directory = os.path.join(self.root, source)
+        if not os.path.isdir(directory):
+            return []
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                if name.startswith("segment-")]
+
+    def sources(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+
+    def _segment_file(self, source: str):
+        """Open handle for the segment to append to, rotating when it is full."""
+        f = self._files.get(source)
+        if f is not None and f.tell() < self.segment_bytes:
+            return f
+        if f is not None:
+            f.close()
+        existing = self.segments(source)
+        if existing and os.path.getsize(existing[-1]) < self.segment_bytes:
+            path = existing[-1]
+        else:
+            number = int(os.path.basename(existing[-1])[8:14]) + 1 if existing else 1
+            os.makedirs(os.path.join(self.root, source), exist_ok=True)
+            path = os.path.join(self.root, source, f"segment-{number:06d}.bin")
+        f = self._files[source] = open(path, "ab")
+        return f
+
+    def append(self, source: str, key, payload):
+        """Archive one payload under (source, str(key))."""
+        record = zlib.compress(json.dumps({"key": str(key), "ts": time.time(), "payload": payload}).encode())
+        with self._lock:
+            index = self._connect_index(source)
+            f = self._segment_file(source)
+            offset = f.tell()
+            f.write(_HEADER.pack(len(record)) + record)
+            f.flush()
+            index.execute("INSERT INTO payloads VALUES (?, ?, ?, ?, ?, ?)",
+                          (source, str(key), os.path.relpath(f.name, self.root), offset,
+                           _HEADER.size + len(record), time.time()))
+            self._pending[source] = self._pending.get(source, 0) + 1
+            if self._pending[source] >= 100:
+                index.commit()
+                self._pending[source] = 0
+
+    def get(self, source: str, key) -> Optional[dict]:
+        """Latest archived payload for (source, key), or None."""
+        with self._lock:
+            index = self._connect_index(source)
+            index.commit()
+            row = index.execute("""
+                SELECT segment, offset FROM payloads WHERE source = ? AND item_key = ?
+                ORDER BY fetched_at DESC LIMIT 1
+            """, (source, str(key))).fetchone()
+        if row is None:
+            return None
+        with open(os.path.join(self.root, row[0]), "rb") as f:
+            f.seek(row[1])
+            (length,) = _HEADER.unpack(f.read(_HEADER.size))
+            return json.loads(zlib.decompress(f.read(length)))["payload"]
+
+    def close(self):
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+            self._files.clear()
+            for index in self._indexes.values():
+                index.commit()
+                index.close()
+            self._indexes.clear()
+            self._pending.clear()
+
+
+def read_segment(path: str) -> Iterator[dict]:
+    """Yield every {"key", "ts", "payload"} record in one segment, in order."""
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            (length,) = _HEADER.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                return  # torn write at the end of the segment
+            yield json.loads(zlib.decompress(data))
+
+
+RAW_STORE = RawStore()
+atexit.register(RAW_STORE.close)
+
+
+def archive(source: str, key, payload):
+    """Append a payload to RAW_STORE unless archiving is disabled."""
+    if RAW_STORE_ENABLED:
+        RAW_STORE.append(source, key, payload)
+
+
+def _load_source_class(source_name: str):
+    module_name, class_name = SOURCE_CLASSES[source_name].split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def _parse_segment(task: Tuple[str, str]) -> Tuple[str, List[dict]]:
+    """Replay worker: parse every record of one segment with the current parser."""
+    source_name, path = task
+    source = _load_source_class(source_name)()
+    rows = []
+    for record in read_segment(path):
+        try:
+            rows.extend(source.parse(record["payload"]))
+        except Exception as e:
+            log.warning("[Replay] %s %s: parse error: %s", source_name, record["key"], e,
+                        extra={"event": "error"})
+    return source_name, rows
+
+
+def replay(conn: sqlite3.Connection, store: RawStore = RAW_STORE, sources: Optional[List[str]] = None,
+           processes: Optional[int] = None, rebuild: bool = False) -> Dict[str, int]:
+    """
+    Re-parse archived payloads and insert the rows (no network).
+
+    Args:
+        conn: Database connection (rows go through each Source's sink)
+        store: Archive to read
+        sources: Source names to replay (default: every source in the archive)
+        processes: Worker processes (default: CPU count)
+        rebuild: Empty each replayed source's REBUILD_TABLES first, so
+                 existing rows are re-derived instead of skipped
+
+    Returns:
+        {source name: new rows inserted}
+    """
+    names = [name for name in (sources or store.sources()) if name in SOURCE_CLASSES]
+    tasks = [(name, path) for name in names for path in store.segments(name)]
+    sinks = {}
+    for name in names:
+        sink = _load_source_class(name)()
+        sink.max_new = sys.maxsize
+        sinks[name] = sink
+
+    start = time.perf_counter()
+    try:
+        if rebuild:
+            # Not committed until the first batch is, so a failed parse leaves the tables alone
+            for name in sorted({name for name, _ in tasks}):
+                for table in REBUILD_TABLES[name]:
+                    deleted = conn.execute(f"DELETE FROM {table}").rowcount
+                    log.info("[Replay] %s: cleared %d rows from %s", name, deleted, table,
+                             extra={"event": "rebuild", "table": table, "deleted": deleted})
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            # Segments are parsed in parallel; results are written in archive order
+            for name, rows in pool.map(_parse_segment, tasks):
+                sinks[name].sink(conn, rows)
+    except BaseException:
+        conn.rollback()
+        raise
+
+    elapsed = time.perf_counter() - start
+    for name, sink in sinks.items():
+        log.info("[Replay] %s: inserted %d new rows.", name, sink.inserted,
+                 extra={"event": "finished", "inserted": sink.inserted})
+    log.info("✓ Replayed %d segments in %.1fs", len(tasks), elapsed)
+    return {name: sink.inserted for name, sink in sinks.items()}
@@ -0,0 +1,153 @@
+"""
+Compact record types for parsed API rows
+
+parse() used to return one dict per row. A dict carries a hash table and
+per-row copies of its keys' slots, which adds up once hundreds of thousands
+of rows are batched in the pipeline queues or a replay. These classes use
+__slots__ instead: fixed fields, no per-instance __dict__.
+
+Each record
+  - parses straight from the API payload (from_payload)
+  - gives the parameter tuple for a column list with one attrgetter call
+    (params), so inserts never build an intermediate dict or list
+  - still supports row["field"] and row["field"] = value, so the shared
+    Source code (resolve_lookups, describe) reads and fills it like before
+
+Lookup id fields (type_id, artist_id, ...) start as None and are filled in
+by Source.resolve_lookups().
+"""
+import time
+from functools import lru_cache
+from operator import attrgetter
+from typing import Optional, Sequence, Tuple
+
+
+@lru_cache(maxsize=None)
+def _getter(columns: Tuple[str, ...]):
+    get = attrgetter(*columns)
+    return get if len(columns) > 1 else lambda record: (get(record),)
+
+
+class Record:
+    """Base class: every field in __slots__, defaulting to None."""
+
+    __slots__ = ()
+
+    def __init__(self, *values, **fields):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+        for name in self.__slots__[len(values):]:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"{type(self).__name__} has no fields {sorted(fields)}")
+
+    def __getitem__(self, name: str):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __setitem__(self, name: str, value):
+        setattr(self, name, value)
+
+    def get(self, name: str, default=None):
+        return getattr(self, name, default)
+
+    def params(self, columns: Sequence[str]) -> tuple:
+        """Values of columns, in order - ready for execute()/executemany()."""
+        return _getter(tuple(columns))(self)
+
+    def values(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.values() == other.values()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class PokemonStats(Record):
+    """One pokemon_stats row; fields in column order."""
+
+    __slots__ = ("pokemon_id", "hp", "attack", "defense", "speed")
+
+    @classmethod
+    def from_payload(cls, data: dict) -> "PokemonStats":
+        stats = {s["stat"]["name"]: s["base_stat"] for s in data.get("stats", [])}
+        return cls(data.get("id"), stats.get("hp"), stats.get("attack"), stats.get("defense"), stats.get("speed"))
+
+
+class Pokemon(Record):
+    """One /pokemon/{id} payload: the pokemon row plus its stats."""
+
+    __slots__ = ("id", "name", "base_experience", "height", "weight", "primary_type", "type_id", "stats")
+
+    @classmethod
+    def from_payload(cls, data: dict, fallback_type: Optional[str] = None) -> "Pokemon":
+        types = data.get("types", [])
+        return cls(data.get("id"), data.get("name"), data.get("base_experience"), data.get("height"),
+                   data.get("weight"), types[0]["type"]["name"] if types else fallback_type, None,
+                   PokemonStats.from_payload(data))
+
+
+class Track(Record):
+    """One track from a Spotify search result."""
+
+    __slots__ = ("title", "artist_names", "popularity", "updated_at", "spotify_id", "artist_spotify_ids",
+                 "artist_id", "spotify_ref", "artist_refs", "title_hash")
+
+    @classmethod
+    def from_payload(cls, track: dict, now: Optional[int] = None) -> "Track":
+        artists = track["artists"]
+        return cls(track["name"], ", ".join([a["name"] for a in artists]), track.get("popularity") or 0,
+                   now or int(time.time()), track.get("id"), [a["id"] for a in artists if a.get("id")])
+
+
+class WeatherPeriod(Record):
+    """One Weather.gov forecast period for a city."""
+
+    __slots__ = ("city", "date", "temperature_high", "temperature_low", "wind_speed", "short_forecast",
+                 "updated_at", "city_id", "date_id", "forecast_id")
+
+    @classmethod
+    def from_payload(cls, city: str, period: dict, now: Optional[int] = None) -> "WeatherPeriod":
+        temp = period.get("temperature")
+        return cls(city, period.get("startTime", "").split("T")[0], temp, temp, period.get("windSpeed", None),
+                   period.get("shortForecast"), now or int(time.time()))
+
+
+def _parse_year(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value.split("–")[0]) if value else None
+    except ValueError:
+        return None
+
+
+def _parse_runtime(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value.replace(" min", "")) if value and "min" in value else None
+    except ValueError:
+        return None
+
+
+def _parse_rating(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value and value != "N/A" else None
+    except ValueError:
+        return None
+
+
+class Movie(Record):
+    """One OMDb title payload (?t= or ?i=)."""
+
+    __slots__ = ("imdb_id", "title", "year", "genre", "runtime", "imdb_rating", "box_office", "updated_at",
+                 "genre_id", "box_office_id")
+
+    @classmethod
+    def from_payload(cls, data: dict, now: Optional[int] = None) -> "Movie":
+        return cls(data.get("imdbID"), data.get("Title"), _parse_year(data.get("Year")), data.get("Genre"),
+                   _parse_runtime(data.get("Runtime")), _parse_rating(data.get("imdbRating")),
+                   data.get("BoxOffice"), now or int(time.time()))
+
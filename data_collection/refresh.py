@@ -0,0 +1,264 @@
+"""
+Refresh mode for volatile metrics
+
+The normal collectors use INSERT OR IGNORE, so Spotify popularity, IMDb
+ratings and forecast temperatures are frozen the first time a row is seen.
+Refresh mode re-polls ONLY rows whose updated_at is older than a staleness
+threshold (see REFRESH_STALE_HOURS in config/api_keys.py) and writes them back
+with INSERT ... ON CONFLICT DO UPDATE in batches. Refresh cost is therefore
+proportional to the stale set, not to the full dataset.
+
+Previous values are kept in the append-only *_history tables, which are
+filled by triggers created in database/db_helper.py.
+
+Rows the API answered for but had no match for (a track ID or search Spotify
+no longer returns, an imdb_id OMDb no longer knows, a date missing from the
+forecast)
+only get updated_at stamped, so they wait a full staleness period before
+being tried again instead of being re-polled on every run. Failed requests
+are not stamped.
+"""
+import requests
+import sqlite3
+import time
+from typing import Dict, List, Optional
+from config.api_keys import OMDB_BASE, OMDB_API_KEY, REFRESH_STALE_HOURS, SPOTIFY_TRACK_BATCH
+from database.db_helper import get_or_create_lookup_id
+from data_collection.records import _parse_rating
+from data_collection.spotify_api import spotify_client
+from data_collection.weather_api import CITY_COORDS, fetch_forecast_periods
+from monitoring.instrumentation import throttle, timed
+from monitoring.structured_logging import get_logger
+
+
+log = get_logger("refresh")
+
+
+def find_stale_rows(conn: sqlite3.Connection, query: str, max_age_hours: int,
+                    limit: Optional[int] = None) -> List[sqlite3.Row]:
+    """
+    Run a stale-row query. The query must contain one "?" placeholder for the
+    cutoff timestamp, e.g. "... WHERE updated_at IS NULL OR updated_at < ?".
+    Rows that were never refreshed (updated_at IS NULL) come first.
+    """
+    cutoff = int(time.time()) - max_age_hours * 3600
+    # "+" keeps SQLite from walking the whole updated_at index just for the
+    # ordering; it then looks up the NULL and < cutoff ranges and sorts only those
+    q = query + " ORDER BY +updated_at"
+    params = [cutoff]
+    if limit is not None:
+        q += " LIMIT ?"
+        params.append(limit)
+    c = conn.cursor()
+    c.execute(q, params)
+    return c.fetchall()
+
+
+def upsert_in_batches(conn: sqlite3.Connection, upsert_sql: str, rows: List[tuple],
+                      batch_size: int = 100) -> int:
+    """Write rows with executemany, committing once per batch. Returns row count."""
+    c = conn.cursor()
+    for start in range(0, len(rows), batch_size):
+        c.executemany(upsert_sql, rows[start:start + batch_size])
+        conn.commit()
+    return len(rows)
+
+
+def stamp_unmatched(conn: sqlite3.Connection, table: str, key_columns: List[str], keys: List[tuple],
+                    batch_size: int = 100) -> int:
+    """Set updated_at to now for the rows with these key values, leaving their metrics as they are."""
+    match = " AND ".join(f"{col} = ?" for col in key_columns)
+    now = int(time.time())
+    return upsert_in_batches(conn, f"UPDATE {table} SET updated_at = ? WHERE {match}",
+                             [(now, *key) for key in keys], batch_size)
+
+
+def refresh_track_popularity(conn: sqlite3.Connection, max_age_hours: int = REFRESH_STALE_HOURS["tracks"],
+                             max_rows: Optional[int] = None, batch_size: int = 100,
+                             ids_per_request: int = SPOTIFY_TRACK_BATCH) -> int:
+    """
+    Re-poll Spotify popularity for tracks older than max_age_hours.
+
+    Tracks with a stored Spotify ID (tracks.spotify_ref) are read through the
+    /tracks?ids= batch endpoint, ids_per_request per call; only tracks
+    stored before IDs were collected fall back to one search each.
+    """
+    if spotify_client is None:
+        log.warning("Spotify client not initialized. Skipping track refresh.")
+        return 0
+    stale = find_stale_rows(conn, """
+        SELECT t.title, t.artist_id, a.artist_name, s.spotify_id, t.updated_at
+        FROM tracks t
+        INNER JOIN artists_lookup a ON t.artist_id = a.id
+        LEFT JOIN spotify_ids_lookup s ON s.id = t.spotify_ref
+        WHERE t.updated_at IS NULL OR t.updated_at < ?
+    """, max_age_hours, max_rows)
+
+    rows, unmatched = [], []
+    by_id = [row for row in stale if row["spotify_id"] is not None]
+    for start in range(0, len(by_id), ids_per_request):
+        batch = by_id[start:start + ids_per_request]
+        try:
+            with timed("http.api.spotify.com"):
+                results = spotify_client.tracks([row["spotify_id"] for row in batch])
+            popularity = {t["id"]: t.get("popularity") or 0 for t in results.get("tracks", []) if t}
+            for row in batch:
+                if row["spotify_id"] in popularity:
+                    rows.append((row["title"], row["artist_id"], popularity[row["spotify_id"]], int(time.time())))
+                else:
+                    unmatched.append((row["title"], row["artist_id"]))
+        except Exception as e:
+            log.warning("Spotify API error: %s", e, extra={"event": "error"})
+        finally:
+            throttle("spotify", 0.2)
+
+    for row in stale:
+        if row["spotify_id"] is not None:
+            continue
+        primary_artist = row["artist_name"].split(", ")[0]
+        try:
+            with timed("http.api.spotify.com"):
+                results = spotify_client.search(q=f'track:"{row["title"]}" artist:"{primary_artist}"',
+                                                type="track", limit=5)
+            for track in results.get("tracks", {}).get("items", []):
+                if track["name"] == row["title"]:
+                    rows.append((row["title"], row["artist_id"], track.get("popularity") or 0, int(time.time())))
+                    break
+            else:
+                unmatched.append((row["title"], row["artist_id"]))
+        except Exception as e:
+            log.warning("Spotify API error: %s", e, extra={"event": "error"})
+        finally:
+            throttle("spotify", 0.2)
+
+    updated = upsert_in_batches(conn, """
+        INSERT INTO tracks (title, artist_id, popularity, updated_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(title, artist_id) DO UPDATE SET
+            popularity = excluded.popularity,
+            updated_at = excluded.updated_at
+    """, rows, batch_size)
+    stamp_unmatched(conn, "tracks", ["title", "artist_id"], unmatched, batch_size)
+    log.info("[Refresh] Tracks: %d stale, %d refreshed, %d unmatched.", len(stale), updated, len(unmatched),
+             extra={"event": "refreshed", "table": "tracks", "stale": len(stale), "refreshed": updated})
+    return updated
+
+
+def refresh_movie_ratings(conn: sqlite3.Connection, max_age_hours: int = REFRESH_STALE_HOURS["movies"],
+                          max_rows: Optional[int] = None, batch_size: int = 100) -> int:
+    """Re-poll OMDb ratings (by imdb_id) for movies older than max_age_hours."""
+    if not OMDB_API_KEY:
+        log.warning("OMDB_API_KEY not set. Skipping movie refresh.")
+        return 0
+    stale = find_stale_rows(conn, """
+        SELECT imdb_id, updated_at FROM movies
+        WHERE updated_at IS NULL OR updated_at < ?
+    """, max_age_hours, max_rows)
+
+    rows, unmatched = [], []
+    for row in stale:
+        try:
+            with timed("http.omdbapi.com"):
+                resp = requests.get(OMDB_BASE, params={"i": row["imdb_id"], "apikey": OMDB_API_KEY}, timeout=10)
+            if resp.status_code != 200:
+                continue
+            data = resp.json()
+            if data.get("Response") == "False":
+                unmatched.append((row["imdb_id"],))
+                continue
+            rows.append((row["imdb_id"], _parse_rating(data.get("imdbRating")), int(time.time())))
+        except Exception as e:
+            log.warning("OMDb error: %s", e, extra={"event": "error"})
+        finally:
+            # Also after errors and non-200 responses, so a failing API is not hammered
+            throttle("omdb", 0.2)
+
+    updated = upsert_in_batches(conn, """
+        INSERT INTO movies (imdb_id, imdb_rating, updated_at)
+        VALUES (?, ?, ?)
+        ON CONFLICT(imdb_id) DO UPDATE SET
+            imdb_rating = excluded.imdb_rating,
+            updated_at = excluded.updated_at
+    """, rows, batch_size)
+    stamp_unmatched(conn, "movies", ["imdb_id"], unmatched, batch_size)
+    log.info("[Refresh] Movies: %d stale, %d refreshed, %d unmatched.", len(stale), updated, len(unmatched),
+             extra={"event": "refreshed", "table": "movies", "stale": len(stale), "refreshed": updated})
+    return updated
+
+
+def refresh_weather_forecasts(conn: sqlite3.Connection, max_age_hours: int = REFRESH_STALE_HOURS["weather"],
+                              max_rows: Optional[int] = None, batch_size: int = 100) -> int:
+    """
+    Re-poll forecasts for stale weather rows dated today or later.
+
+    Past dates no longer appear in the Weather.gov forecast, so they are
+    never re-polled. Each city is fetched once no matter how many of its
+    rows are stale.
+    """
+    stale = find_stale_rows(conn, """
+        SELECT w.city_id, c.city_name, c.latitude, c.longitude, w.date_id, d.date_value, w.updated_at
+        FROM weather w
+        INNER JOIN cities_lookup c ON w.city_id = c.id
+        INNER JOIN dates_lookup d ON w.date_id = d.id
+        WHERE d.date_value >= date('now')
+          AND (w.updated_at IS NULL OR w.updated_at < ?)
+    """, max_age_hours, max_rows)
+
+    stale_by_city: Dict[str, Dict[str, tuple]] = {}
+    coords: Dict[str, tuple] = {}
+    for row in stale:
+        stale_by_city.setdefault(row["city_name"], {})[row["date_value"]] = (row["city_id"], row["date_id"])
+        if row["latitude"] is not None and row["longitude"] is not None:
+            coords[row["city_name"]] = (row["latitude"], row["longitude"])
+
+    rows, unmatched = [], []
+    for city, stale_dates in stale_by_city.items():
+        # Stored by WeatherSource (covers cities streamed from a file); older rows fall back to CITY_COORDS
+        if city not in coords and city not in CITY_COORDS:
+            log.warning("[Refresh] No coordinates for %s; stamping its %d stale rows.", city, len(stale_dates),
+                        extra={"event": "error", "table": "weather"})
+            unmatched += stale_dates.values()
+            continue
+        lat, lon = coords.get(city) or CITY_COORDS[city]
+        try:
+            periods = fetch_forecast_periods(lat, lon)
+            if periods is None:
+                continue
+            seen_dates = set()
+            for p in periods:
+                date_str = p.get("startTime", "").split("T")[0]
+                # Keep the first period per date, matching the collector
+                if date_str not in stale_dates or date_str in seen_dates:
+                    continue
+                seen_dates.add(date_str)
+                city_id, date_id = stale_dates[date_str]
+                temp = p.get("temperature")
+                forecast_id = get_or_create_lookup_id(conn, 'forecasts_lookup', 'forecast_description', p.get("shortForecast"))
+                rows.append((city_id, date_id, temp, temp, p.get("windSpeed", None), forecast_id, int(time.time())))
+            unmatched += [ids for date_str, ids in stale_dates.items() if date_str not in seen_dates]
+        except Exception as e:
+            log.warning("Weather API error: %s", e, extra={"event": "error"})
+        finally:
+            throttle("weather", 0.25)
+
+    updated = upsert_in_batches(conn, """
+        INSERT INTO weather (city_id, date_id, temperature_high, temperature_low, wind_speed, forecast_id, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(city_id, date_id) DO UPDATE SET
+            temperature_high = excluded.temperature_high,
+            temperature_low = excluded.temperature_low,
+            wind_speed = excluded.wind_speed,
+            forecast_id = excluded.forecast_id,
+            updated_at = excluded.updated_at
+    """, rows, batch_size)
+    stamp_unmatched(conn, "weather", ["city_id", "date_id"], unmatched, batch_size)
+    log.info("[Refresh] Weather: %d stale, %d refreshed, %d unmatched.", len(stale), updated, len(unmatched),
+             extra={"event": "refreshed", "table": "weather", "stale": len(stale), "refreshed": updated})
+    return updated
+
+
+def refresh_stale_metrics(conn: sqlite3.Connection, max_rows: Optional[int] = None):
+    """Refresh every volatile metric using the configured staleness thresholds."""
+    refresh_track_popularity(conn, max_rows=max_rows)
+    refresh_movie_ratings(conn, max_rows=max_rows)
+    refresh_weather_forecasts(conn, max_rows=max_rows)
@@ -0,0 +1,121 @@
+"""
+Scheduler for daemon mode
+
+Instead of re-running main.py by hand, `python3 main.py --daemon` keeps one
+warm process (one connection, warm lookup/fingerprint/result caches) and
+runs each source on its own interval (see SCHEDULE_INTERVALS in
+config/api_keys.py), e.g. Weather.gov hourly, Spotify popularity daily,
+PokeAPI weekly.
+
+Every run time gets +/- SCHEDULE_JITTER of random jitter so jobs that share
+an interval drift apart instead of all hitting at the same moment.
+
+SIGTERM / SIGINT only set a stop flag: the job that is running finishes
+(and commits) and the loop then exits, so a shutdown never cuts an insert
+batch in half.
+"""
+import heapq
+import random
+import signal
+import threading
+import time
+from typing import Callable, List, Optional, Sequence
+from config.api_keys import SCHEDULE_JITTER
+from monitoring.metrics import JOB_RUNS, JOB_SECONDS
+from monitoring.structured_logging import get_logger
+
+
+log = get_logger("scheduler")
+
+
+class Job:
+    """
+    One scheduled source: run fn() every interval_s seconds (jittered).
+    tables lists the data tables fn() writes, for after_job hooks.
+    """
+
+    def __init__(self, name: str, interval_s: float, fn: Callable[[], None],
+                 jitter: float = SCHEDULE_JITTER, run_at_start: bool = True, tables: Sequence[str] = ()):
+        self.name = name
+        self.interval_s = interval_s
+        self.fn = fn
+        self.tables = list(tables)
+        self.jitter = jitter
+        self.run_at_start = run_at_start
+
+    def next_delay(self) -> float:
+        return self.interval_s * (1 + random.uniform(-self.jitter, self.jitter))
+
+
+class Scheduler:
+    """
+    Runs Jobs one at a time from a single thread, in next-run-time order.
+
+    Example:
+        scheduler = Scheduler([Job("weather", 3600, lambda: run_sources(conn, [WeatherSource(cities)]),
+                                   tables=["weather"])])
+        scheduler.run()   # blocks until SIGTERM / Ctrl+C
+    """
+
+    def __init__(self, jobs: List[Job], after_job: Optional[Callable[[Job], None]] = None):
+        self.jobs = jobs
+        self.after_job = after_job
+        self.stop_event = threading.Event()
+
+    def stop(self, *_):
+        if not self.stop_event.is_set():
+            log.info("[Scheduler] Stop requested; finishing the current job.")
+        self.stop_event.set()
+
+    def install_signal_handlers(self):
+        """Route SIGTERM and SIGINT to stop() (main thread only)."""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+    def run_job(self, job: Job):
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            job.fn()
+        except Exception as e:
+            status = "error"
+            log.error("[Scheduler] Job %s failed: %s", job.name, e, extra={"event": "job_error", "job": job.name})
+        elapsed = time.perf_counter() - start
+        JOB_RUNS.inc(job=job.name, status=status)
+        JOB_SECONDS.observe(elapsed, job=job.name)
+        log.info("[Scheduler] %s finished in %.1fs", job.name, elapsed,
+                 extra={"event": "job_done", "job": job.name, "status": status, "seconds": round(elapsed, 3)})
+        if self.after_job is not None:
+            # A failing hook (e.g. a snapshot write on a full disk) must not stop the daemon either
+            try:
+                self.after_job(job)
+            except Exception as e:
+                log.error("[Scheduler] After-job hook for %s failed: %s", job.name, e,
+                          extra={"event": "job_error", "job": job.name})
+
+    def run(self, max_runs: Optional[int] = None):
+        """
+        Block running jobs until stop() is called (or max_runs jobs have run).
+        """
+        now = time.monotonic()
+        heap = []
+        for order, job in enumerate(self.jobs):
+            first = now if job.run_at_start else now + job.next_delay()
+            heapq.heappush(heap, (first, order, job))
+
+        runs = 0
+        while heap and not self.stop_event.is_set():
+            due, order, job = heap[0]
+            # Event.wait wakes up immediately on stop()
+            if self.stop_event.wait(max(0.0, due - time.monotonic())):
+                break
+            heapq.heappop(heap)
+            self.run_job(job)
+            runs += 1
+            if max_runs is not None and runs >= max_runs:
+                break
+            heapq.heappush(heap, (time.monotonic() + job.next_delay(), order, job))
+            next_due, _, next_job = heap[0]
+            if not self.stop_event.is_set():
+                log.info("[Scheduler] Next: %s in %.0fs", next_job.name, max(0.0, next_due - time.monotonic()))
+        log.info("[Scheduler] Stopped after %d job runs.", runs)
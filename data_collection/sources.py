@@ -0,0 +1,462 @@
+"""
+Common Source interface and asyncio runner for the collectors
+
+Every collector used to hand-roll the same loop: walk a list, call an API,
+sleep, check limits, intern lookup strings, insert, commit, print. A Source
+now only describes what is specific to one API:
+
+  discover(conn)    -> items to fetch (ids, artist names, cities, titles)
+  async fetch(item) -> raw payload (or None to skip the item)
+  parse(payload)    -> list of rows (data_collection/records.py)
+  sink(conn, rows)  -> inserts rows, returns how many were new
+
+and run_sources() supplies the rest for free:
+  - all sources multiplexed over ONE asyncio event loop
+  - per-host concurrency limits and minimum spacing between requests
+    (SOURCE_CONCURRENCY / SOURCE_MIN_INTERVAL in config/api_keys.py)
+  - retries with exponential backoff on errors, 429 and 5xx responses
+  - lookup strings interned per batch with get_or_create_lookup_ids()
+  - one commit per batch instead of one per row
+  - max_new limits, progress bars, metrics and the "Finished run" summary
+  - every raw payload archived for offline replay (data_collection/raw_store.py)
+
+The HTTP clients (requests, spotipy) are synchronous, so fetch() runs them
+with asyncio.to_thread(). discover() runs on a dedicated worker thread with
+its own connection (see _Discovery) and payloads are archived from worker
+threads, so neither list requests nor archive I/O stall the other sources;
+the sink's SQLite work stays on the event-loop thread. List and search pages
+requested from discover() go through get_pages(), which hands them to the
+event loop, so they share the host limiter and retries with the fetches.
+
+Example:
+    run_sources(conn, [PokemonSource(target_new=25), WeatherSource(cities)])
+"""
+import asyncio
+import itertools
+import multiprocessing
+import multiprocessing.connection
+import random
+import signal
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import requests
+from config.api_keys import (HTTP_MAX_RETRIES, SHARD_DIR, SOURCE_BATCH_SIZE, SOURCE_CONCURRENCY,
+                             SOURCE_MIN_INTERVAL)
+from database.db_helper import create_connection, get_or_create_lookup_ids
+from database.sharding import open_shard
+from database.snapshot_cache import database_file
+from monitoring.instrumentation import record, timed
+from monitoring.metrics import HTTP_RETRIES, ROWS_INSERTED
+from monitoring.structured_logging import Progress, flush_logging, get_logger
+from data_collection.raw_store import RAW_STORE, archive
+from data_collection.records import Record
+
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class HostLimiter:
+    """Caps concurrent requests to one host and spaces their start times."""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.concurrency = SOURCE_CONCURRENCY.get(host, 2)
+        self.min_interval = SOURCE_MIN_INTERVAL.get(host, 0.2)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._spacing = asyncio.Lock()
+        self._last_start = 0.0
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        async with self._spacing:
+            wait = self._last_start + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                record(f"sleep.{self.host}", wait)
+            self._last_start = time.monotonic()
+        return self
+
+    async def __aexit__(self, *exc):
+        self._semaphore.release()
+        return False
+
+
+class Source:
+    """
+    Base class for one API. Subclasses set the class attributes and
+    implement discover(), fetch() and parse().
+
+    Class attributes:
+        name:     label used in log lines, e.g. "PokeAPI"
+        host:     host name for rate limiting and metrics
+        table:    data table rows are inserted into
+        columns:  columns written by the default sink (row dict keys)
+        lookups:  row key -> (lookup table, name column, id key); the string
+                  under row key is replaced by its integer id under id key
+        noun:     what the "Finished run" line counts ("rows", "tracks", ...)
+    """
+
+    name = "Source"
+    host = ""
+    table = ""
+    columns: Tuple[str, ...] = ()
+    lookups: Dict[str, Tuple[str, str, str]] = {}
+    noun = "rows"
+
+    def __init__(self, max_new: int = 25):
+        self.max_new = max_new
+        self.inserted = 0
+        self.log = get_logger(self.name.lower())
+        # Set by _run_source() for the duration of a run (see get_pages())
+        self.limiter: Optional[HostLimiter] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def remaining(self) -> int:
+        return self.max_new - self.inserted
+
+    def discover(self, conn: sqlite3.Connection) -> Iterable:
+        raise NotImplementedError
+
+    async def fetch(self, item):
+        raise NotImplementedError
+
+    def parse(self, payload) -> List[dict]:
+        raise NotImplementedError
+
+    def describe(self, row: dict) -> str:
+        """Text for the per-row DEBUG event."""
+        return str(row)
+
+    # ---------- helpers for subclasses ----------
+
+    async def get_json(self, url: str, params: Optional[dict] = None,
+                       headers: Optional[dict] = None) -> Optional[dict]:
+        """GET url in a worker thread with retries; None on a non-200 response."""
+        resp = await self.with_retries(requests.get, url, params=params, headers=headers, timeout=10)
+        if resp is None or resp.status_code != 200:
+            return None
+        return resp.json()
+
+    async def get_page(self, url: str, params: Optional[dict] = None, key: Optional[str] = None,
+                       limiter: Optional[HostLimiter] = None) -> dict:
+        """
+        GET a list/search page through the host limiter with retries and
+        archive it as "<name>-pages" (replay skips those). key names the
+        archived record (default: the request URL, query included).
+
+        Raises:
+            requests.HTTPError on a non-2xx response
+        """
+        async with limiter or self.limiter:
+            resp = await self.with_retries(requests.get, url, params=params, timeout=10)
+        resp.raise_for_status()
+        payload = resp.json()
+        await asyncio.to_thread(archive, f"{self.name}-pages", key or resp.url, payload)
+        return payload
+
+    def get_pages(self, pages: Sequence[Tuple[str, Optional[dict], Optional[str]]]) -> List[dict]:
+        """
+        Blocking get_page() for every (url, params, key) in pages, for use in
+        discover(). Pages are requested concurrently, up to the host limit.
+
+        During run_sources() the requests run on the run's event loop, sharing
+        its limiter with fetch(), while the discover thread waits. Anywhere
+        else (run_pipeline() discovers before its loop starts; in-memory
+        databases discover on the loop itself) they run on a private loop
+        with a limiter of their own.
+        """
+        async def get_all(limiter: HostLimiter) -> List[dict]:
+            return list(await asyncio.gather(*(self.get_page(url, params, key, limiter)
+                                               for url, params, key in pages)))
+
+        async def get_all_private() -> List[dict]:
+            return await get_all(HostLimiter(self.host))
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if self.loop is not None and self.limiter is not None and running is not self.loop:
+            return asyncio.run_coroutine_threadsafe(get_all(self.limiter), self.loop).result()
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"pages-{self.host}") as pool:
+            return pool.submit(asyncio.run, get_all_private()).result()
+
+    async def with_retries(self, fn, *args, **kwargs):
+        """
+        Call fn(*args, **kwargs) in a worker thread, retrying exceptions and
+        429/5xx responses with exponential backoff (HTTP_MAX_RETRIES).
+        """
+        for attempt in range(HTTP_MAX_RETRIES + 1):
+            try:
+                with timed(f"http.{self.host}"):
+                    result = await asyncio.to_thread(fn, *args, **kwargs)
+                status = getattr(result, "status_code", None)
+                if status not in RETRY_STATUS or attempt == HTTP_MAX_RETRIES:
+                    return result
+                retry_after = result.headers.get("Retry-After", "")
+                delay = float(retry_after) if retry_after.isdigit() else 2 ** attempt
+            except Exception as e:
+                if attempt == HTTP_MAX_RETRIES:
+                    raise
+                self.log.debug("[%s] Retrying after error: %s", self.name, e, extra={"event": "retry"})
+                delay = 2 ** attempt
+            HTTP_RETRIES.inc(host=self.host)
+            await asyncio.sleep(delay * (0.5 + random.random()))
+
+    # ---------- default sink ----------
+
+    def resolve_lookups(self, conn: sqlite3.Connection, rows: List[dict]):
+        """Replace lookup strings with integer ids, one batch query per lookup table."""
+        for key, (table, name_column, id_key) in self.lookups.items():
+            ids = get_or_create_lookup_ids(conn, table, name_column, (row[key] for row in rows))
+            for row in rows:
+                row[id_key] = ids.get(row[key])
+
+    def insert_row(self, c: sqlite3.Cursor, row: Union[Record, dict]) -> bool:
+        """Insert one row into self.table; True if it was new."""
+        placeholders = ", ".join("?" for _ in self.columns)
+        params = row.params(self.columns) if isinstance(row, Record) else [row[col] for col in self.columns]
+        c.execute(f"INSERT OR IGNORE INTO {self.table} ({', '.join(self.columns)}) VALUES ({placeholders})",
+                  params)
+        return c.rowcount > 0
+
+    def sink(self, conn: sqlite3.Connection, rows: List[dict]) -> int:
+        """Insert up to remaining() new rows in one transaction and commit once."""
+        new = self.write(conn, rows)
+        conn.commit()
+        return new
+
+    def write(self, conn: sqlite3.Connection, rows: List[dict]) -> int:
+        """Insert up to remaining() new rows without committing; returns how many were new."""
+        if not rows or self.remaining() <= 0:
+            return 0
+        self.resolve_lookups(conn, rows)
+        c = conn.cursor()
+        new = 0
+        for row in rows:
+            if new >= self.remaining():
+                break
+            if self.insert_row(c, row):
+                new += 1
+                ROWS_INSERTED.inc(table=self.table)
+                self.log.debug("[%s] Inserted %s (%d/%d)", self.name, self.describe(row),
+                               self.inserted + new, self.max_new,
+                               extra={"event": "insert", "table": self.table})
+        self.inserted += new
+        return new
+
+
+async def _fetch_and_parse(source: Source, limiter: HostLimiter, item) -> List[dict]:
+    try:
+        async with limiter:
+            payload = await source.fetch(item)
+        if payload is None:
+            return []
+        await asyncio.to_thread(archive, source.name, item, payload)
+        return source.parse(payload)
+    except Exception as e:
+        source.log.warning("[%s] Error for %s: %s", source.name, item, e, extra={"event": "error"})
+        return []
+
+
+class _Discovery:
+    """
+    Pulls items from source.discover() in chunks on one dedicated worker
+    thread, so list/search requests and existence queries never block the
+    event loop.
+
+    sqlite3 connections belong to the thread that opened them, so the worker
+    opens its own connection to the same database file (committed after
+    every chunk, e.g. for backfills) and lazy discover() generators are
+    always resumed on that thread. An in-memory database can't be reopened;
+    its discover() runs on the loop as before.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, source: Source, chunk: int = 64):
+        self.conn = conn
+        self.source = source
+        self.chunk = chunk
+        self.db_file = database_file(conn)
+        self.executor = (ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"discover-{source.table}")
+                         if self.db_file else None)
+        self.reader: Optional[sqlite3.Connection] = None
+        self.items = None
+
+    def _take(self) -> List:
+        if self.items is None:
+            if self.db_file:
+                self.reader = create_connection(self.db_file)
+            self.items = iter(self.source.discover(self.reader or self.conn))
+        chunk = list(itertools.islice(self.items, self.chunk))
+        if self.reader is not None:
+            # Ends any read transaction discover() left open, which would block the sink's commits
+            self.reader.commit()
+        return chunk
+
+    def _close_reader(self):
+        if self.reader is not None:
+            self.reader.commit()
+            self.reader.close()
+            self.reader = None
+
+    async def take(self) -> List:
+        """Next chunk of items; empty once discover() is exhausted."""
+        if self.executor is None:
+            return self._take()
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._take)
+
+    async def close(self):
+        if self.executor is not None:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self._close_reader)
+            self.executor.shutdown(wait=False)
+
+
+async def _run_source(conn: sqlite3.Connection, source: Source, limiter: HostLimiter, batch_size: int):
+    progress = Progress(source.log, source.name, source.max_new)
+    source.limiter, source.loop = limiter, asyncio.get_running_loop()
+    discovery = _Discovery(conn, source)
+    pending: Deque = deque()
+    exhausted = False
+    in_flight = set()
+    buffer: List[dict] = []
+
+    def flush():
+        source.sink(conn, buffer)
+        buffer.clear()
+        progress.update(source.inserted)
+
+    try:
+        while True:
+            # Keep the host busy, but stop launching once buffered rows could fill the limit
+            while not exhausted and len(in_flight) < limiter.concurrency and len(buffer) < source.remaining():
+                if not pending:
+                    pending.extend(await discovery.take())
+                    if not pending:
+                        exhausted = True
+                        break
+                in_flight.add(asyncio.ensure_future(_fetch_and_parse(source, limiter, pending.popleft())))
+            if not in_flight:
+                if buffer and source.remaining() > 0:
+                    flush()
+                    continue
+                break
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                buffer.extend(task.result())
+            if buffer and len(buffer) >= min(batch_size, source.remaining()):
+                flush()
+            if source.remaining() <= 0:
+                break
+    finally:
+        for task in in_flight:
+            task.cancel()
+        await discovery.close()
+        source.limiter = source.loop = None
+    progress.done(source.inserted)
+    source.log.info("[%s] Finished run: inserted %d new %s.", source.name, source.inserted, source.noun,
+                    extra={"event": "finished", "inserted": source.inserted})
+
+
+async def run_sources_async(conn: sqlite3.Connection, sources: List[Source],
+                            batch_size: int = SOURCE_BATCH_SIZE):
+    limiters: Dict[str, HostLimiter] = {}
+    for source in sources:
+        if source.host not in limiters:
+            limiters[source.host] = HostLimiter(source.host)
+    await asyncio.gather(*(_run_source(conn, s, limiters[s.host], batch_size) for s in sources))
+
+
+def run_sources(conn: sqlite3.Connection, sources: List[Source],
+                batch_size: int = SOURCE_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Run every source concurrently on one event loop.
+
+    Returns:
+        {source name: rows inserted}
+    """
+    asyncio.run(run_sources_async(conn, sources, batch_size))
+    return {source.name: source.inserted for source in sources}
+
+
+def _stop_on_sigterm(signum, frame):
+    raise SystemExit(128 + signum)
+
+
+def _run_in_shard(source: Source, shard_dir: str, batch_size: int, results):
+    """Child process body for run_sources_sharded()."""
+    # terminate() from the parent unwinds through the finally below instead
+    # of killing the process in the middle of a transaction
+    signal.signal(signal.SIGTERM, _stop_on_sigterm)
+    conn = open_shard(source.table, shard_dir)
+    try:
+        run_sources(conn, [source], batch_size)
+        results.put((source.name, source.inserted, None))
+    except BaseException as e:
+        conn.rollback()  # committed batches stay; only the unfinished one is dropped
+        results.put((source.name, source.inserted, f"{type(e).__name__}: {e}"))
+        raise
+    finally:
+        conn.close()
+        # Children end with os._exit(), which skips the atexit flushes
+        RAW_STORE.close()
+        flush_logging()
+
+
+def run_sources_sharded(sources: List[Source], shard_dir: str = SHARD_DIR,
+                        batch_size: int = SOURCE_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Run each source in its own process, writing only to its own shard
+    (database/sharding.py), so no source waits on another's write lock.
+
+    If a worker fails, the others are stopped (their open transaction is
+    rolled back, committed batches are kept) and RuntimeError is raised.
+
+    Returns:
+        {source name: rows inserted}
+    """
+    context = multiprocessing.get_context("fork")
+    results = context.SimpleQueue()
+    flush_logging()  # don't let children inherit (and repeat) queued records
+    processes = [context.Process(target=_run_in_shard, args=(source, shard_dir, batch_size, results),
+                                 name=f"shard-{source.table}") for source in sources]
+    for process in processes:
+        process.start()
+    running, failed, stopped = list(processes), [], []
+    while running:
+        ready = multiprocessing.connection.wait([process.sentinel for process in running])
+        for process in [p for p in running if p.sentinel in ready]:
+            process.join()
+            running.remove(process)
+            if process.exitcode != 0:
+                failed.append(process)
+        if failed and running:
+            for process in running:
+                process.terminate()
+            for process in running:
+                process.join(10)
+                if process.is_alive():
+                    process.kill()
+                    process.join()
+            stopped, running = running, []
+
+    inserted = {source.name: 0 for source in sources}
+    errors = {}
+    while not results.empty():
+        name, count, error = results.get()
+        inserted[name] = count
+        if error:
+            errors[name] = error
+    if failed:
+        log = get_logger("sources")
+        for process in failed:
+            log.error("[Shards] %s exited with code %s", process.name, process.exitcode,
+                      extra={"event": "error"})
+        details = "; ".join(f"{name}: {error}" for name, error in errors.items()
+                            if not error.startswith("SystemExit"))
+        raise RuntimeError(f"Shard worker(s) {', '.join(p.name for p in failed)} failed"
+                           + (f" ({details})" if details else "")
+                           + (f"; stopped {', '.join(p.name for p in stopped)}" if stopped else ""))
+    return inserted
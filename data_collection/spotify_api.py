@@ -5,29 +5,138 @@ Author: Kevin Zang
 STRING-TO-INTEGER MAPPING:
 Artist names are mapped to integers using the artists_lookup table.
 This eliminates duplicate artist name strings in the database.
+Spotify track and artist IDs go into spotify_ids_lookup (tracks.spotify_ref,
+track_artists) so data_collection/spotify_enrichment.py can fetch artist
+details and audio features later through the batch endpoints.
+
+DEDUPLICATION:
+Searches for popular artists return the same songs again and again. Rows
+are keyed by tracks.title_hash (hash of normalized title + artist names)
+and checked against a Bloom filter seeded from the table, BEFORE any lookup
+interning or INSERT. A Bloom miss means the track is new; a hit is
+confirmed with one probe of the title_hash index. Tracks stored without a
+Spotify ID are left out of the filter, so they still get it backfilled.
 """
 import sqlite3
 import time
-from typing import List
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
-from config.api_keys import SPOTIPY_CLIENT_ID, SPOTIPY_CLIENT_SECRET
-from database.db_helper import get_or_create_lookup_id
-
-
-# Initialize Spotify client
-spotify_client = None
-if SPOTIPY_CLIENT_ID and SPOTIPY_CLIENT_SECRET:
-    auth_manager = SpotifyClientCredentials(
-        client_id=SPOTIPY_CLIENT_ID,
-        client_secret=SPOTIPY_CLIENT_SECRET
-    )
-    spotify_client = spotipy.Spotify(auth_manager=auth_manager)
-else:
-    print("Spotify credentials not set. Skipping Spotify fetch.")
-
-
-def fetch_tracks_for_artist_list(conn: sqlite3.Connection, artist_list: List[str], max_new: int = 25):
+from typing import Iterable, List, Optional
+from config.api_keys import INPUT_DEDUPE_ERROR_RATE, TRACK_DEDUPE_CAPACITY
+from database.db_helper import get_or_create_lookup_ids
+from database.existence import BloomFilter, track_title_hash
+from data_collection.records import Track
+from data_collection.sources import Source, run_sources
+from data_collection.spotify_auth import make_spotify_client
+from monitoring.metrics import DEDUPE_CHECKS
+from monitoring.structured_logging import get_logger
+
+
+log = get_logger("spotify")
+
+
+# Initialize Spotify client (token shared across threads and processes)
+spotify_client = make_spotify_client()
+if spotify_client is None:
+    log.warning("Spotify credentials not set. Skipping Spotify fetch.")
+
+
+class SpotifySource(Source):
+    """Top search results (10 per artist) for each artist in the list."""
+
+    name = "Spotify"
+    host = "api.spotify.com"
+    table = "tracks"
+    columns = ("title", "artist_id", "popularity", "updated_at", "spotify_ref", "title_hash")
+    lookups = {"artist_names": ("artists_lookup", "artist_name", "artist_id"),
+               "spotify_id": ("spotify_ids_lookup", "spotify_id", "spotify_ref")}
+    noun = "tracks"
+
+    def __init__(self, artist_list: Iterable[str] = (), max_new: int = 25):
+        super().__init__(max_new)
+        self.artist_list = artist_list
+        self.seen: Optional[BloomFilter] = None
+
+    def discover(self, conn: sqlite3.Connection) -> Iterable[str]:
+        return self.artist_list
+
+    def seed_seen(self, conn: sqlite3.Connection) -> BloomFilter:
+        """Bloom filter over the title_hash of every track that already has its Spotify ID."""
+        c = conn.cursor()
+        c.execute("SELECT title_hash FROM tracks WHERE spotify_ref IS NOT NULL AND title_hash IS NOT NULL")
+        hashes = [row[0] for row in c.fetchall()]
+        seen = BloomFilter(max(TRACK_DEDUPE_CAPACITY, 2 * len(hashes)), INPUT_DEDUPE_ERROR_RATE)
+        for h in hashes:
+            seen.add_hash(h)
+        return seen
+
+    def drop_known(self, conn: sqlite3.Connection, rows: List[Track]) -> List[Track]:
+        """Rows whose track is not stored yet (and not repeated within rows)."""
+        if self.seen is None:
+            # Seeded here rather than in discover(): write() may run on another connection
+            self.seen = self.seed_seen(conn)
+        c = conn.cursor()
+        fresh, batch = [], set()
+        for row in rows:
+            h = row["title_hash"] = track_title_hash(row["title"], row["artist_names"])
+            if h in batch:
+                DEDUPE_CHECKS.inc(table=self.table, result="duplicate")
+                continue
+            if self.seen.contains_hash(h):
+                c.execute("SELECT 1 FROM tracks WHERE title_hash = ? AND spotify_ref IS NOT NULL LIMIT 1", (h,))
+                if c.fetchone() is not None:
+                    DEDUPE_CHECKS.inc(table=self.table, result="duplicate")
+                    continue
+                DEDUPE_CHECKS.inc(table=self.table, result="false_positive")
+            else:
+                DEDUPE_CHECKS.inc(table=self.table, result="new")
+            batch.add(h)
+            fresh.append(row)
+        return fresh
+
+    def write(self, conn: sqlite3.Connection, rows: List[Track]) -> int:
+        return super().write(conn, self.drop_known(conn, rows))
+
+    async def fetch(self, artist_name: str) -> Optional[dict]:
+        return await self.with_retries(spotify_client.search, q=f"artist:{artist_name}", type="track", limit=10)
+
+    def parse(self, results: dict) -> List[Track]:
+        now = int(time.time())
+        return [Track.from_payload(track, now) for track in results.get("tracks", {}).get("items", [])]
+
+    def resolve_lookups(self, conn: sqlite3.Connection, rows: List[Track]):
+        super().resolve_lookups(conn, rows)
+        ids = get_or_create_lookup_ids(conn, "spotify_ids_lookup", "spotify_id",
+                                       (a for row in rows for a in row["artist_spotify_ids"]))
+        for row in rows:
+            row["artist_refs"] = [ids[a] for a in row["artist_spotify_ids"]]
+
+    def insert_row(self, c: sqlite3.Cursor, row: Track) -> bool:
+        new = super().insert_row(c, row)
+        if new:
+            track_id = c.lastrowid
+        else:
+            # Tracks stored before IDs (or hashes) were collected get theirs now
+            c.execute("""
+                UPDATE tracks SET spotify_ref = COALESCE(spotify_ref, ?), title_hash = COALESCE(title_hash, ?)
+                WHERE title = ? AND artist_id IS ? AND (spotify_ref IS NULL OR title_hash IS NULL)
+            """, (row["spotify_ref"], row["title_hash"], row["title"], row["artist_id"]))
+            # IS, not =: a NULL artist_id must match NULL too
+            c.execute("SELECT track_id FROM tracks WHERE title = ? AND artist_id IS ?",
+                      (row["title"], row["artist_id"]))
+            stored = c.fetchone()
+            if stored is None:
+                return new  # the INSERT was ignored for a constraint, not because the track exists
+            track_id = stored[0]
+        c.executemany("INSERT OR IGNORE INTO track_artists (track_id, artist_ref, position) VALUES (?, ?, ?)",
+                      ((track_id, ref, position) for position, ref in enumerate(row["artist_refs"])))
+        if row["spotify_ref"] is not None:
+            self.seen.add_hash(row["title_hash"])
+        return new
+
+    def describe(self, row: Track) -> str:
+        return f"track: {row['title']} - {row['artist_names']} (artist_id={row['artist_id']})"
+
+
+def fetch_tracks_for_artist_list(conn: sqlite3.Connection, artist_list: Iterable[str], max_new: int = 25):
     """
     Fetch Spotify tracks for a list of artists (limited to 25 new entries per run).
 
@@ -38,44 +147,10 @@ def fetch_tracks_for_artist_list(conn: sqlite3.Connection, artist_list: List[str
 
     Args:
         conn: Database connection
-        artist_list: List of artist names to search for
+        artist_list: Artist names to search for (any iterable, e.g. stream_inputs())
         max_new: Maximum number of new tracks to insert (default 25)
     """
     if spotify_client is None:
-        print("Spotify client not initialized. Skipping track fetch.")
+        log.warning("Spotify client not initialized. Skipping track fetch.")
         return
-
-    c = conn.cursor()
-    inserted = 0
-
-    for artist_name in artist_list:
-        if inserted >= max_new:
-            break
-        try:
-            results = spotify_client.search(q=f"artist:{artist_name}", type="track", limit=10)
-            tracks = results.get("tracks", {}).get("items", [])
-            for track in tracks:
-                if inserted >= max_new:
-                    break
-                title = track["name"]
-                artist_names = ", ".join([a["name"] for a in track["artists"]])
-                popularity = track.get("popularity") or 0
-
-                # Convert artist string to integer ID using lookup table
-                artist_id = get_or_create_lookup_id(conn, 'artists_lookup', 'artist_name', artist_names)
-
-                try:
-                    c.execute("""
-                        INSERT OR IGNORE INTO tracks (title, artist_id, popularity)
-                        VALUES (?, ?, ?)
-                    """, (title, artist_id, popularity))
-                    if c.rowcount:
-                        conn.commit()
-                        inserted += 1
-                        print(f"[Spotify] Inserted track: {title} - {artist_names} (artist_id={artist_id}) ({inserted}/{max_new})")
-                except Exception as e:
-                    print("DB insert error (tracks):", e)
-        except Exception as e:
-            print("Spotify API error:", e)
-        time.sleep(0.2)
-    print(f"[Spotify] Finished run: inserted {inserted} new tracks.")
+    run_sources(conn, [SpotifySource(artist_list, max_new)])
@@ -0,0 +1,130 @@
+"""
+Shared Spotify client-credentials token
+
+SpotifyClientCredentials keeps its token per instance and, by default, in
+./.cache, which every process (spotify_api.py, final_proj.py, sharded
+collectors, pipeline workers) reads and rewrites on its own - so parallel
+workers race on the file and each one authenticates separately.
+
+SharedTokenAuth hands out ONE token to every thread and process:
+  1. a fresh in-memory token is returned without any locking
+  2. otherwise the first thread takes an exclusive file lock
+     (<SPOTIFY_TOKEN_CACHE>.lock) and re-reads the cache file, because
+     another process may already have refreshed it
+  3. only if that token is stale too is a new one requested; it is written
+     to the cache with tmp-file + rename, so readers never see half a file
+
+A token counts as stale SPOTIFY_TOKEN_REFRESH_MARGIN seconds before its
+expires_at (halfway through its lifetime, for short-lived tokens), so
+requests never go out with a token that is about to expire.
+Token requests are counted in si201_auth_token_requests_total{host}.
+
+On platforms without fcntl the file lock is skipped (threads in one
+process still share the token).
+
+SPOTIFY_TOKEN_URL and SPOTIFY_API_PREFIX (config/api_keys.py) redirect the
+token request and every API call, e.g. to a local stub server.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlparse
+import spotipy
+from spotipy.cache_handler import MemoryCacheHandler
+from spotipy.oauth2 import SpotifyClientCredentials
+from config.api_keys import (SPOTIFY_API_PREFIX, SPOTIFY_TOKEN_CACHE, SPOTIFY_TOKEN_REFRESH_MARGIN,
+                             SPOTIFY_TOKEN_URL, SPOTIPY_CLIENT_ID, SPOTIPY_CLIENT_SECRET)
+from monitoring.metrics import AUTH_TOKENS
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+@contextlib.contextmanager
+def _file_lock(path: str):
+    """Exclusive advisory lock on path (created if needed) for the with-block."""
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _read_token(path: str) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_token(path: str, token: dict):
+    tmp = f"{path}.tmp.{os.getpid()}"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)  # the token is a credential
+    with os.fdopen(fd, "w") as f:
+        json.dump(token, f)
+    os.replace(tmp, path)
+
+
+class SharedTokenAuth(SpotifyClientCredentials):
+    """
+    Drop-in auth_manager for spotipy.Spotify that shares one token across
+    threads (in memory) and processes (file-locked cache file).
+    """
+
+    def __init__(self, client_id: str = SPOTIPY_CLIENT_ID, client_secret: str = SPOTIPY_CLIENT_SECRET,
+                 cache_path: str = SPOTIFY_TOKEN_CACHE, refresh_margin: int = SPOTIFY_TOKEN_REFRESH_MARGIN,
+                 token_url: str = SPOTIFY_TOKEN_URL, **kwargs):
+        # MemoryCacheHandler keeps spotipy from writing its own ./.cache file
+        super().__init__(client_id=client_id, client_secret=client_secret,
+                         cache_handler=MemoryCacheHandler(), **kwargs)
+        self.OAUTH_TOKEN_URL = token_url
+        self.cache_path = cache_path
+        self.refresh_margin = refresh_margin
+        self._token: Optional[dict] = None
+        self._lock = threading.Lock()
+
+    def _fresh(self, token: Optional[dict]) -> bool:
+        if not token:
+            return False
+        # Short-lived tokens are still used for half their lifetime
+        margin = min(self.refresh_margin, token.get("expires_in", self.refresh_margin) / 2)
+        return token.get("expires_at", 0) - time.time() > margin
+
+    def get_access_token(self, as_dict: bool = False, check_cache: bool = True):
+        token = self._token
+        if not (check_cache and self._fresh(token)):
+            with self._lock:
+                token = self._token
+                if not (check_cache and self._fresh(token)):
+                    token = self._token = self._refresh(check_cache)
+        return token if as_dict else token["access_token"]
+
+    def _refresh(self, check_cache: bool) -> dict:
+        with _file_lock(self.cache_path + ".lock"):
+            if check_cache:
+                token = _read_token(self.cache_path)
+                if self._fresh(token):
+                    return token
+            token = self._add_custom_values_to_token_info(self._request_access_token())
+            AUTH_TOKENS.inc(host=urlparse(self.OAUTH_TOKEN_URL).netloc)
+            _write_token(self.cache_path, token)
+            return token
+
+
+def make_spotify_client() -> Optional[spotipy.Spotify]:
+    """spotipy client using the shared token, or None without credentials."""
+    if not (SPOTIPY_CLIENT_ID and SPOTIPY_CLIENT_SECRET):
+        return None
+    client = spotipy.Spotify(auth_manager=SharedTokenAuth())
+    client.prefix = SPOTIFY_API_PREFIX
+    return client
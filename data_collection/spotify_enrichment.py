@@ -0,0 +1,169 @@
+"""
+Spotify enrichment through the batch endpoints
+
+Search results only carry title, artist names and popularity. Artist
+genres/followers and track audio features need extra calls, which per item
+would cost one request per artist and one per track. SpotifySource stores
+the Spotify IDs while ingesting (tracks.spotify_ref, track_artists), so this
+stage can instead ask for many IDs at once:
+
+  GET /artists?ids=        up to 50 artists per request  -> artist_details, artist_genres
+  GET /audio-features?ids= up to 100 tracks per request  -> audio_features
+
+Only missing rows are requested (artists also when older than
+REFRESH_STALE_HOURS["tracks"]), so re-running is cheap. Tracks Spotify has
+no audio features for are stored with NULL features and not asked for again.
+
+Spotify has closed /audio-features to newly registered apps; a 403 from it
+is logged once and the stage skips audio features for that run.
+
+Point SPOTIFY_API_PREFIX / SPOTIFY_TOKEN_URL (config/api_keys.py) at a
+local server to run this against a stub.
+
+Example:
+    enrich_spotify(conn)
+"""
+import sqlite3
+import time
+import warnings
+from typing import Dict, List, Tuple
+from spotipy.exceptions import SpotifyException
+from config.api_keys import REFRESH_STALE_HOURS, SPOTIFY_ARTIST_BATCH, SPOTIFY_AUDIO_FEATURES_BATCH
+from database.db_helper import get_or_create_lookup_ids
+from data_collection.spotify_api import spotify_client
+from monitoring.instrumentation import timed
+from monitoring.metrics import ROWS_INSERTED
+from monitoring.structured_logging import get_logger
+
+
+log = get_logger("spotify")
+
+AUDIO_FEATURE_COLUMNS = ("danceability", "energy", "valence", "acousticness", "tempo", "loudness")
+
+
+def pending_artists(conn: sqlite3.Connection,
+                    max_age_hours: int = REFRESH_STALE_HOURS["tracks"]) -> List[Tuple[int, str]]:
+    """(artist_ref, Spotify ID) of linked artists without details, or with stale ones."""
+    c = conn.cursor()
+    c.execute("""
+        SELECT DISTINCT s.id, s.spotify_id
+        FROM track_artists ta
+        INNER JOIN spotify_ids_lookup s ON s.id = ta.artist_ref
+        LEFT JOIN artist_details d ON d.artist_ref = ta.artist_ref
+        WHERE d.artist_ref IS NULL OR d.updated_at < ?
+    """, (int(time.time()) - max_age_hours * 3600,))
+    return c.fetchall()
+
+
+def pending_tracks(conn: sqlite3.Connection) -> List[Tuple[int, str]]:
+    """(track_ref, Spotify ID) of tracks that have no audio_features row yet."""
+    c = conn.cursor()
+    c.execute("""
+        SELECT DISTINCT s.id, s.spotify_id
+        FROM tracks t
+        INNER JOIN spotify_ids_lookup s ON s.id = t.spotify_ref
+        LEFT JOIN audio_features f ON f.track_ref = t.spotify_ref
+        WHERE f.track_ref IS NULL
+    """)
+    return c.fetchall()
+
+
+def _batches(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def enrich_artists(conn: sqlite3.Connection, client=spotify_client,
+                   batch_size: int = SPOTIFY_ARTIST_BATCH) -> Dict[str, int]:
+    """
+    Fill artist_details and artist_genres for pending artists, batch_size IDs
+    per request, committing after every batch.
+
+    Returns:
+        {"artists": rows written, "requests": API calls made}
+    """
+    pending = pending_artists(conn)
+    c = conn.cursor()
+    written = requests_made = 0
+    for batch in _batches(pending, batch_size):
+        refs = {spotify_id: ref for ref, spotify_id in batch}
+        try:
+            with timed("http.api.spotify.com"):
+                results = client.artists(list(refs))
+            requests_made += 1
+        except SpotifyException as e:
+            log.warning("[Spotify] Artist batch failed: %s", e, extra={"event": "error"})
+            continue
+        artists = [a for a in results.get("artists", []) if a and a.get("id") in refs]
+        names = get_or_create_lookup_ids(conn, "artists_lookup", "artist_name", (a.get("name") for a in artists))
+        genres = get_or_create_lookup_ids(conn, "artist_genres_lookup", "genre_name",
+                                          (g for a in artists for g in a.get("genres", [])))
+        now = int(time.time())
+        c.executemany("""
+            INSERT INTO artist_details (artist_ref, name_id, followers, popularity, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(artist_ref) DO UPDATE SET
+                name_id = excluded.name_id,
+                followers = excluded.followers,
+                popularity = excluded.popularity,
+                updated_at = excluded.updated_at
+        """, [(refs[a["id"]], names.get(a.get("name")), (a.get("followers") or {}).get("total"),
+               a.get("popularity"), now) for a in artists])
+        c.executemany("INSERT OR IGNORE INTO artist_genres (artist_ref, genre_id) VALUES (?, ?)",
+                      [(refs[a["id"]], genres[g]) for a in artists for g in a.get("genres", [])])
+        conn.commit()
+        written += len(artists)
+        ROWS_INSERTED.inc(len(artists), table="artist_details")
+    log.info("[Spotify] Artist details: %d pending, %d written in %d requests.", len(pending), written,
+             requests_made, extra={"event": "enriched", "table": "artist_details", "requests": requests_made})
+    return {"artists": written, "requests": requests_made}
+
+
+def enrich_audio_features(conn: sqlite3.Connection, client=spotify_client,
+                          batch_size: int = SPOTIFY_AUDIO_FEATURES_BATCH) -> Dict[str, int]:
+    """
+    Fill audio_features for pending tracks, batch_size IDs per request,
+    committing after every batch.
+
+    Returns:
+        {"tracks": rows written, "requests": API calls made}
+    """
+    pending = pending_tracks(conn)
+    c = conn.cursor()
+    written = requests_made = 0
+    for batch in _batches(pending, batch_size):
+        refs = {spotify_id: ref for ref, spotify_id in batch}
+        try:
+            with timed("http.api.spotify.com"), warnings.catch_warnings():
+                warnings.simplefilter("ignore", DeprecationWarning)  # spotipy flags the endpoint
+                results = client.audio_features(list(refs))
+            requests_made += 1
+        except SpotifyException as e:
+            if e.http_status == 403:
+                log.warning("[Spotify] Audio features not available to this app. Skipping audio features.",
+                            extra={"event": "error"})
+                break
+            log.warning("[Spotify] Audio features batch failed: %s", e, extra={"event": "error"})
+            continue
+        # One entry per requested ID, None where Spotify has no features
+        features = {f["id"]: f for f in results or [] if f}
+        now = int(time.time())
+        c.executemany(f"""
+            INSERT OR REPLACE INTO audio_features (track_ref, {', '.join(AUDIO_FEATURE_COLUMNS)}, updated_at)
+            VALUES (?, {', '.join('?' for _ in AUDIO_FEATURE_COLUMNS)}, ?)
+        """, [(ref, *(features.get(spotify_id, {}).get(col) for col in AUDIO_FEATURE_COLUMNS), now)
+              for spotify_id, ref in refs.items()])
+        conn.commit()
+        written += len(refs)
+        ROWS_INSERTED.inc(len(refs), table="audio_features")
+    log.info("[Spotify] Audio features: %d pending, %d written in %d requests.", len(pending), written,
+             requests_made, extra={"event": "enriched", "table": "audio_features", "requests": requests_made})
+    return {"tracks": written, "requests": requests_made}
+
+
+def enrich_spotify(conn: sqlite3.Connection, client=spotify_client) -> Dict[str, Dict[str, int]]:
+    """Run both enrichment steps for everything collected so far."""
+    if client is None:
+        log.warning("Spotify client not initialized. Skipping Spotify enrichment.")
+        return {}
+    return {"artists": enrich_artists(conn, client), "audio_features": enrich_audio_features(conn, client)}
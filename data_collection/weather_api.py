@@ -11,9 +11,11 @@ This eliminates ALL duplicate strings in weather data.
 import requests
 import sqlite3
 import time
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from config.api_keys import WEATHER_BASE
-from database.db_helper import get_or_create_lookup_id
+from data_collection.records import WeatherPeriod
+from data_collection.sources import Source, run_sources
+from monitoring.instrumentation import timed
 
 
 # City coordinates for weather data collection
@@ -43,7 +45,99 @@ CITY_COORDS = {
 }
 
 
-def fetch_weather_for_cities(conn: sqlite3.Connection, cities: List[str], max_new_per_run: int = 25):
+HEADERS = {"User-Agent": "SI201-Project (student@example.edu)"}
+
+
+def fetch_forecast_periods(lat: float, lon: float) -> Optional[List[dict]]:
+    """
+    Resolve a coordinate to its Weather.gov grid point and return the
+    forecast periods, or None if either request fails.
+    """
+    points_url = f"{WEATHER_BASE}/points/{lat},{lon}"
+    with timed("http.api.weather.gov"):
+        r = requests.get(points_url, headers=HEADERS, timeout=10)
+    if r.status_code != 200:
+        return None
+    points = r.json()
+    grid = points.get("properties", {}).get("gridId")
+    grid_x = points.get("properties", {}).get("gridX")
+    grid_y = points.get("properties", {}).get("gridY")
+    if not (grid and grid_x is not None and grid_y is not None):
+        return None
+    forecast_url = f"{WEATHER_BASE}/gridpoints/{grid}/{grid_x},{grid_y}/forecast"
+    with timed("http.api.weather.gov"):
+        fr = requests.get(forecast_url, headers=HEADERS, timeout=10)
+    if fr.status_code != 200:
+        return None
+    return fr.json().get("properties", {}).get("periods", [])
+
+
+class WeatherSource(Source):
+    """
+    Forecast periods (one row per date) for each city. Cities are names from
+    CITY_COORDS or (name, lat, lon) tuples, e.g. streamed from a file.
+    """
+
+    name = "Weather"
+    host = "api.weather.gov"
+    table = "weather"
+    columns = ("city_id", "date_id", "temperature_high", "temperature_low", "wind_speed", "forecast_id", "updated_at")
+    lookups = {
+        "city": ("cities_lookup", "city_name", "city_id"),
+        "date": ("dates_lookup", "date_value", "date_id"),
+        "short_forecast": ("forecasts_lookup", "forecast_description", "forecast_id"),
+    }
+
+    def __init__(self, cities: Iterable[Union[str, Tuple[str, float, float]]] = (), max_new: int = 25):
+        super().__init__(max_new)
+        self.cities = cities
+        self.coords: Dict[str, Tuple[float, float]] = {}
+
+    def discover(self, conn: sqlite3.Connection) -> Iterator[Tuple[str, float, float]]:
+        # Lazy, so a streamed city file is never loaded whole
+        for city in self.cities:
+            if isinstance(city, str):
+                if city not in CITY_COORDS:
+                    continue
+                item = (city, *CITY_COORDS[city])
+            else:
+                item = tuple(city)
+            self.coords[item[0]] = (item[1], item[2])
+            yield item
+
+    def resolve_lookups(self, conn: sqlite3.Connection, rows: List[WeatherPeriod]):
+        super().resolve_lookups(conn, rows)
+        # Keep each city's coordinates next to its name, so refresh mode can re-poll it
+        cities = {row["city_id"]: self.coords[row["city"]] for row in rows if row["city"] in self.coords}
+        conn.executemany("UPDATE cities_lookup SET latitude = ?, longitude = ? WHERE id = ?",
+                         ((lat, lon, city_id) for city_id, (lat, lon) in cities.items()))
+
+    async def fetch(self, item: Tuple[str, float, float]) -> Optional[tuple]:
+        city, lat, lon = item
+        points = await self.get_json(f"{WEATHER_BASE}/points/{lat},{lon}", headers=HEADERS)
+        if points is None:
+            return None
+        props = points.get("properties", {})
+        grid, grid_x, grid_y = props.get("gridId"), props.get("gridX"), props.get("gridY")
+        if not (grid and grid_x is not None and grid_y is not None):
+            return None
+        forecast = await self.get_json(f"{WEATHER_BASE}/gridpoints/{grid}/{grid_x},{grid_y}/forecast",
+                                       headers=HEADERS)
+        if forecast is None:
+            return None
+        return city, forecast.get("properties", {}).get("periods", [])
+
+    def parse(self, payload: tuple) -> List[WeatherPeriod]:
+        city, periods = payload
+        now = int(time.time())
+        return [WeatherPeriod.from_payload(city, p, now) for p in periods]
+
+    def describe(self, row: WeatherPeriod) -> str:
+        return f"{row['city']} (city_id={row['city_id']}) date_id={row['date_id']} forecast_id={row['forecast_id']}"
+
+
+def fetch_weather_for_cities(conn: sqlite3.Connection, cities: Iterable[Union[str, Tuple[str, float, float]]],
+                             max_new_per_run: int = 25):
     """
     Fetch weather data from Weather.gov API (limited to 25 new entries per run).
 
@@ -55,65 +149,7 @@ def fetch_weather_for_cities(conn: sqlite3.Connection, cities: List[str], max_ne
 
     Args:
         conn: Database connection
-        cities: List of city names to fetch weather for
+        cities: City names from CITY_COORDS and/or (name, lat, lon) tuples (any iterable)
         max_new_per_run: Maximum number of new weather records to insert (default 25)
     """
-    headers = {"User-Agent": "SI201-Project (student@example.edu)"}
-    inserted = 0
-    c = conn.cursor()
-
-    for city in cities:
-        if inserted >= max_new_per_run:
-            break
-        if city not in CITY_COORDS:
-            continue
-        lat, lon = CITY_COORDS[city]
-
-        # Convert city string to integer ID using lookup table
-        city_id = get_or_create_lookup_id(conn, 'cities_lookup', 'city_name', city)
-
-        try:
-            points_url = f"{WEATHER_BASE}/points/{lat},{lon}"
-            r = requests.get(points_url, headers=headers, timeout=10)
-            if r.status_code != 200:
-                continue
-            points = r.json()
-            grid = points.get("properties", {}).get("gridId")
-            grid_x = points.get("properties", {}).get("gridX")
-            grid_y = points.get("properties", {}).get("gridY")
-            if not (grid and grid_x is not None and grid_y is not None):
-                continue
-            forecast_url = f"{WEATHER_BASE}/gridpoints/{grid}/{grid_x},{grid_y}/forecast"
-            fr = requests.get(forecast_url, headers=headers, timeout=10)
-            if fr.status_code != 200:
-                continue
-            periods = fr.json().get("properties", {}).get("periods", [])
-            for p in periods:
-                if inserted >= max_new_per_run:
-                    break
-                date_str = p.get("startTime", "").split("T")[0]
-                temp = p.get("temperature")
-                short_forecast_str = p.get("shortForecast")
-                wind_speed = p.get("windSpeed", None)
-                temperature_high = temp
-                temperature_low = temp
-
-                # Convert date and forecast strings to integer IDs using lookup tables
-                date_id = get_or_create_lookup_id(conn, 'dates_lookup', 'date_value', date_str)
-                forecast_id = get_or_create_lookup_id(conn, 'forecasts_lookup', 'forecast_description', short_forecast_str)
-
-                try:
-                    c.execute("""
-                        INSERT OR IGNORE INTO weather (city_id, date_id, temperature_high, temperature_low, wind_speed, forecast_id)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    """, (city_id, date_id, temperature_high, temperature_low, wind_speed, forecast_id))
-                    if c.rowcount:
-                        conn.commit()
-                        inserted += 1
-                        print(f"[Weather] Inserted {city} (city_id={city_id}) date_id={date_id} forecast_id={forecast_id} ({inserted}/{max_new_per_run})")
-                except Exception as e:
-                    print("DB error (weather)", e)
-            time.sleep(0.25)
-        except Exception as e:
-            print("Weather API error:", e)
-    print(f"[Weather] Finished run: inserted {inserted} new rows.")
+    run_sources(conn, [WeatherSource(cities, max_new_per_run)])
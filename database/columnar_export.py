@@ -0,0 +1,289 @@
+"""
+Columnar export/import of the database (Parquet or Arrow IPC)
+
+Exports stream every table out of SQLite in fixed-size chunks with
+cursor.fetchmany(), so memory stays bounded no matter how big a table is.
+One file per table is written into the output directory:
+  - <table>.parquet   (fmt="parquet")
+  - <table>.arrows    (fmt="arrow", Arrow IPC stream format)
+
+STRING-TO-INTEGER MAPPING:
+  - resolve_lookups=False (default): data tables keep their integer *_id
+    columns and the lookup tables are exported too, so the snapshot is an
+    exact copy of the schema.
+  - resolve_lookups=True: each *_id column is replaced by the looked-up
+    string (e.g. type_id -> type_name), stored as a dictionary-encoded
+    column so repeated strings are still only stored once per chunk.
+
+import_snapshot() bulk-loads either kind of snapshot back into the
+create_tables() schema with executemany, re-interning resolved strings
+through the lookup tables. The target does not have to be empty: ids are
+only meaningful inside the database they were exported from, so they are
+remapped by natural key on the way in:
+  - lookup ids: each exported lookup row is interned by its string and
+    every *_id column is translated to the target's id for that string
+  - row ids (tracks.track_id, weather.id): rows are inserted without them
+    and the target's id is looked up by (title, artist_id) / (city_id,
+    date_id), so track_artists and the *_history tables follow their row
+  - *_history ids are left to AUTOINCREMENT; rows already present are skipped
+
+Requires the optional dependency pyarrow (pip install pyarrow).
+"""
+import os
+import sqlite3
+from typing import Dict, List, Optional
+from database.db_helper import (
+    DATA_TABLES, HISTORY_TABLES, LOOKUP_COLUMNS, LOOKUP_TABLES, get_or_create_lookup_ids
+)
+from monitoring.structured_logging import get_logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+log = get_logger("db")
+
+FILE_EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrows"}
+
+# Tables whose integer row id is assigned per database -> (id column, natural key)
+ROW_KEYS = {
+    "tracks": ("track_id", ("title", "artist_id")),
+    "weather": ("id", ("city_id", "date_id")),
+}
+
+# Columns holding one of those row ids -> table they point into
+ROW_REFERENCES = {
+    "track_artists": {"track_id": "tracks"},
+    "tracks_history": {"track_id": "tracks"},
+    "weather_history": {"weather_id": "weather"},
+}
+
+
+def _existing_tables(conn: sqlite3.Connection, tables: List[str]) -> List[str]:
+    c = conn.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    present = {row[0] for row in c.fetchall()}
+    return [t for t in tables if t in present]
+
+
+def _arrow_type(conn: sqlite3.Connection, table: str, column: str):
+    """
+    Pick an Arrow type from the values actually stored in a column.
+
+    SQLite columns are loosely typed (e.g. weather.wind_speed is declared
+    REAL but holds strings like "10 mph"), so declared types can't be trusted.
+    """
+    c = conn.cursor()
+    c.execute(f"SELECT DISTINCT typeof({column}) FROM {table}")
+    kinds = {row[0] for row in c.fetchall()} - {"null"}
+    if kinds <= {"integer"}:
+        return pa.int64()
+    if kinds <= {"integer", "real"}:
+        return pa.float64()
+    if kinds == {"blob"}:
+        return pa.binary()
+    return pa.string()
+
+
+def _export_query(conn: sqlite3.Connection, table: str, resolve_lookups: bool):
+    """Build the SELECT for one table and the Arrow schema of its result."""
+    c = conn.cursor()
+    c.execute(f"PRAGMA table_info({table})")
+    columns = [row[1] for row in c.fetchall()]
+    lookups = LOOKUP_COLUMNS.get(table, {}) if resolve_lookups else {}
+
+    select, joins, fields = [], [], []
+    for i, column in enumerate(columns):
+        if column in lookups:
+            lookup_table = lookups[column]
+            name_column = LOOKUP_TABLES[lookup_table]
+            select.append(f"l{i}.{name_column}")
+            joins.append(f"LEFT JOIN {lookup_table} l{i} ON t.{column} = l{i}.id")
+            fields.append(pa.field(name_column, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            select.append(f"t.{column}")
+            fields.append(pa.field(column, _arrow_type(conn, table, column)))
+    q = f"SELECT {', '.join(select)} FROM {table} t {' '.join(joins)}"
+    return q, pa.schema(fields)
+
+
+def _to_batch(rows: List[tuple], schema) -> "pa.RecordBatch":
+    arrays = []
+    for i, field in enumerate(schema):
+        values = [row[i] for row in rows]
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        elif pa.types.is_string(field.type):
+            arrays.append(pa.array([v if v is None or isinstance(v, str) else str(v) for v in values],
+                                   type=pa.string()))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def export_table(conn: sqlite3.Connection, table: str, path: str, fmt: str = "parquet",
+                 resolve_lookups: bool = False, chunk_size: int = 50000) -> int:
+    """Stream one table to a Parquet or Arrow file. Returns the row count."""
+    q, schema = _export_query(conn, table, resolve_lookups)
+    c = conn.cursor()
+    c.execute(q)
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(path, schema)
+    else:
+        writer = pa.ipc.new_stream(path, schema)
+    total = 0
+    try:
+        while True:
+            rows = c.fetchmany(chunk_size)
+            if not rows:
+                break
+            writer.write_batch(_to_batch(rows, schema))
+            total += len(rows)
+    finally:
+        writer.close()
+    return total
+
+
+def export_snapshot(conn: sqlite3.Connection, out_dir: str, fmt: str = "parquet",
+                    resolve_lookups: bool = False, chunk_size: int = 50000) -> Optional[Dict[str, int]]:
+    """
+    Export every table into out_dir, one file per table.
+
+    Args:
+        conn: Database connection
+        out_dir: Directory to write the snapshot into (created if missing)
+        fmt: "parquet" or "arrow"
+        resolve_lookups: Replace *_id columns with dictionary-encoded strings
+        chunk_size: Rows fetched from SQLite per record batch
+
+    Returns:
+        Dict of table name -> rows exported, or None if pyarrow is missing
+    """
+    if pa is None:
+        log.warning("pyarrow not installed. Skipping columnar export.")
+        return None
+    if fmt not in FILE_EXTENSIONS:
+        raise ValueError(f"Unknown export format: {fmt} (expected one of {list(FILE_EXTENSIONS)})")
+    os.makedirs(out_dir, exist_ok=True)
+
+    tables = DATA_TABLES + HISTORY_TABLES
+    if not resolve_lookups:
+        tables = list(LOOKUP_TABLES) + tables
+    counts = {}
+    for table in _existing_tables(conn, tables):
+        path = os.path.join(out_dir, table + FILE_EXTENSIONS[fmt])
+        counts[table] = export_table(conn, table, path, fmt, resolve_lookups, chunk_size)
+        log.info("[Export] %s: %d rows -> %s", table, counts[table], path)
+    return counts
+
+
+def _iter_batches(path: str, batch_size: int):
+    if path.endswith(".parquet"):
+        yield from pq.ParquetFile(path).iter_batches(batch_size=batch_size)
+    else:
+        with pa.ipc.open_stream(path) as reader:
+            yield from reader
+
+
+def _remap(values: list, mapping: Dict[int, int]) -> list:
+    """Old ids -> target ids; ids missing from mapping become None (the row is then skipped)."""
+    return [None if v is None else mapping.get(v) for v in values]
+
+
+def _import_lookup(conn: sqlite3.Connection, table: str, data: dict, id_map: Dict[int, int]):
+    """Intern one batch of an exported lookup table, recording exported id -> target id."""
+    name_column = LOOKUP_TABLES[table]
+    ids = get_or_create_lookup_ids(conn, table, name_column, data[name_column])
+    for old_id, name in zip(data["id"], data[name_column]):
+        if name is not None:
+            id_map[old_id] = ids[name]
+
+
+def import_table(conn: sqlite3.Connection, table: str, path: str, batch_size: int = 50000,
+                 id_maps: Optional[Dict[str, Dict[int, int]]] = None) -> int:
+    """
+    Bulk-load one exported file into table with INSERT OR IGNORE.
+
+    Resolved string columns (e.g. type_name) are interned back into their
+    lookup tables in bulk and replaced by the integer *_id column. Integer
+    id columns are translated through id_maps (table -> {exported id: target
+    id}), which importing a lookup table or a ROW_KEYS table fills in; ids
+    of tables that are not in id_maps are kept as they are.
+    """
+    id_maps = {} if id_maps is None else id_maps
+    name_to_id_column = {LOOKUP_TABLES[lookup]: (id_column, lookup)
+                         for id_column, lookup in LOOKUP_COLUMNS.get(table, {}).items()}
+    references = {**LOOKUP_COLUMNS.get(table, {}), **ROW_REFERENCES.get(table, {})}
+    row_key = ROW_KEYS.get(table)
+    c = conn.cursor()
+    total = 0
+    for batch in _iter_batches(path, batch_size):
+        data = batch.to_pydict()
+        total += batch.num_rows
+        if table in LOOKUP_TABLES:
+            _import_lookup(conn, table, data, id_maps.setdefault(table, {}))
+            continue
+        for column, parent in references.items():
+            if column in data and parent in id_maps:
+                data[column] = _remap(data[column], id_maps[parent])
+        for name_column in [n for n in list(data) if n in name_to_id_column]:
+            id_column, lookup = name_to_id_column[name_column]
+            ids = get_or_create_lookup_ids(conn, lookup, name_column, data[name_column])
+            data[id_column] = [ids.get(v) for v in data.pop(name_column)]
+        old_ids = data.pop(row_key[0], None) if row_key else None
+        if table in HISTORY_TABLES:
+            data.pop("id", None)
+
+        columns = list(data)
+        rows = list(zip(*(data[col] for col in columns)))
+        placeholders = ", ".join("?" for _ in columns)
+        if table in HISTORY_TABLES:
+            # No natural key to conflict on, so skip rows that are already there
+            match = " AND ".join(f"{col} IS ?" for col in columns)
+            c.executemany(f"""
+                INSERT INTO {table} ({', '.join(columns)}) SELECT {placeholders}
+                WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE {match})
+            """, (row + row for row in rows))
+        else:
+            c.executemany(f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+
+        if old_ids is not None:
+            id_column, key_columns = row_key
+            id_map = id_maps.setdefault(table, {})
+            match = " AND ".join(f"{col} = ?" for col in key_columns)
+            for old_id, key in zip(old_ids, zip(*(data[col] for col in key_columns))):
+                c.execute(f"SELECT {id_column} FROM {table} WHERE {match}", key)
+                found = c.fetchone()
+                if found is not None:
+                    id_map[old_id] = found[0]
+    conn.commit()
+    return total
+
+
+def import_snapshot(conn: sqlite3.Connection, in_dir: str, batch_size: int = 50000) -> Optional[Dict[str, int]]:
+    """
+    Load a snapshot written by export_snapshot() into the create_tables()
+    schema, which may already hold data. Tables are loaded lookups first,
+    then data, then history, so every id column can be remapped (see the
+    module docstring).
+
+    Returns:
+        Dict of table name -> rows read, or None if pyarrow is missing
+    """
+    if pa is None:
+        log.warning("pyarrow not installed. Skipping columnar import.")
+        return None
+    counts = {}
+    id_maps: Dict[str, Dict[int, int]] = {}
+    for table in list(LOOKUP_TABLES) + DATA_TABLES + HISTORY_TABLES:
+        for ext in FILE_EXTENSIONS.values():
+            path = os.path.join(in_dir, table + ext)
+            if os.path.exists(path):
+                counts[table] = import_table(conn, table, path, batch_size, id_maps)
+                log.info("[Import] %s: %d rows <- %s", table, counts[table], path)
+                break
+    return counts
@@ -12,36 +12,112 @@ TABLE NAMING CONVENTION:
 ALL LOOKUP TABLES end with "_lookup" suffix - these store unique strings ONCE
 ALL DATA TABLES have simple names - these store only integer references
 
-LOOKUP TABLES (7 total):
+LOOKUP TABLES (9 total):
   - types_lookup        : Pokemon types ("fire", "water", etc.)
   - artists_lookup      : Spotify artist names
-  - cities_lookup       : Weather city names
-  - genres_lookup       : Movie genres
+  - cities_lookup       : Weather city names (with their coordinates, for refreshes)
+  - genres_lookup       : Movie genres (OMDb)
+  - artist_genres_lookup: Spotify artist genres ("pop", "k-pop", etc.)
   - forecasts_lookup    : Weather forecast descriptions
   - dates_lookup        : Dates (eliminate duplicate date strings)
   - box_office_lookup   : Box office values (eliminate duplicate "$" strings)
+  - spotify_ids_lookup  : Spotify track/artist IDs (base-62 strings)
 
-DATA TABLES (5 total):
+DATA TABLES (9 total):
   - pokemon            : Pokemon data (references types_lookup)
   - pokemon_stats      : Pokemon stats (references pokemon)
-  - tracks             : Spotify tracks (references artists_lookup)
+  - tracks             : Spotify tracks (references artists_lookup, spotify_ids_lookup)
   - weather            : Weather data (references cities_lookup, forecasts_lookup, dates_lookup)
   - movies             : Movie data (references genres_lookup, box_office_lookup)
+  - track_artists      : Track -> Spotify artist links (references tracks, spotify_ids_lookup)
+  - artist_details     : Spotify artist followers/popularity (references spotify_ids_lookup)
+  - artist_genres      : Spotify artist genres (references spotify_ids_lookup, artist_genres_lookup)
+  - audio_features     : Spotify track audio features (references spotify_ids_lookup)
+
+HISTORY TABLES (3 total, append-only):
+  - tracks_history     : Previous popularity values (references tracks)
+  - weather_history    : Previous forecast temperatures (references weather)
+  - movies_history     : Previous IMDb ratings (references movies)
 
 All data tables store ONLY integers, no duplicate strings!
 ================================================================================
 """
+import os
 import sqlite3
+from typing import Dict, Iterable
 from config.api_keys import DB_PATH
+from database.existence import track_title_hash
+from monitoring.instrumentation import ENABLED as INSTRUMENTATION_ENABLED, InstrumentedConnection, timed
+from monitoring.metrics import LOOKUP_REQUESTS
+from monitoring.structured_logging import get_logger
+
+
+log = get_logger("db")
+
+
+# Lookup tables and the string column each one stores
+LOOKUP_TABLES = {
+    "types_lookup": "type_name",
+    "artists_lookup": "artist_name",
+    "cities_lookup": "city_name",
+    "genres_lookup": "genre_name",
+    "artist_genres_lookup": "genre_name",
+    "forecasts_lookup": "forecast_description",
+    "dates_lookup": "date_value",
+    "box_office_lookup": "box_office_value",
+    "spotify_ids_lookup": "spotify_id",
+}
+
+# Data tables in dependency order (parents before children)
+DATA_TABLES = ["pokemon", "pokemon_stats", "tracks", "weather", "movies",
+               "track_artists", "artist_details", "artist_genres", "audio_features"]
+
+HISTORY_TABLES = ["tracks_history", "weather_history", "movies_history"]
+
+# Integer ID columns in each data table -> lookup table they reference
+LOOKUP_COLUMNS = {
+    "pokemon": {"type_id": "types_lookup"},
+    "tracks": {"artist_id": "artists_lookup", "spotify_ref": "spotify_ids_lookup"},
+    "weather": {"city_id": "cities_lookup", "date_id": "dates_lookup", "forecast_id": "forecasts_lookup"},
+    "movies": {"genre_id": "genres_lookup", "box_office_id": "box_office_lookup"},
+    "track_artists": {"artist_ref": "spotify_ids_lookup"},
+    "artist_details": {"artist_ref": "spotify_ids_lookup", "name_id": "artists_lookup"},
+    "artist_genres": {"artist_ref": "spotify_ids_lookup", "genre_id": "artist_genres_lookup"},
+    "audio_features": {"track_ref": "spotify_ids_lookup"},
+}
+
+
+def create_connection(db_path: str = DB_PATH, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    Create a database connection with Row factory.
 
-
-def create_connection(db_path: str = DB_PATH) -> sqlite3.Connection:
-    """Create a database connection with Row factory."""
-    conn = sqlite3.connect(db_path)
+    Pass check_same_thread=False only when the caller serializes access
+    itself (e.g. the dashboard server shares one connection behind a lock).
+    """
+    factory = InstrumentedConnection if INSTRUMENTATION_ENABLED else sqlite3.Connection
+    conn = sqlite3.connect(db_path, check_same_thread=check_same_thread, factory=factory)
     conn.row_factory = sqlite3.Row
+    attach_shards(conn, db_path)
     return conn
 
 
+def attach_shards(conn: sqlite3.Connection, db_path: str):
+    """
+    ATTACH the databases listed in the file's attached_shards table, if it
+    has one (shard and federation files, see database/sharding.py). Shard
+    paths are stored relative to the directory of db_path.
+    """
+    c = conn.cursor()
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'attached_shards'")
+    if c.fetchone() is None:
+        return
+    base = os.path.dirname(os.path.abspath(db_path))
+    c.execute("SELECT alias, path FROM attached_shards ORDER BY alias")
+    for alias, path in c.fetchall():
+        c.execute("ATTACH DATABASE ? AS " + alias, (os.path.join(base, path),))
+
+
+@timed("db.get_or_create_lookup_id")
 def get_or_create_lookup_id(conn: sqlite3.Connection, table: str, name_column: str, name_value: str) -> int:
     """
     Get existing ID or create new entry in lookup table.
@@ -72,35 +148,85 @@ def get_or_create_lookup_id(conn: sqlite3.Connection, table: str, name_column: s
     row = c.fetchone()
 
     if row:
+        LOOKUP_REQUESTS.inc(table=table, result="hit")
         return row["id"]
 
     # Create new entry
+    LOOKUP_REQUESTS.inc(table=table, result="miss")
     c.execute(f"INSERT INTO {table} ({name_column}) VALUES (?)", (name_value,))
     conn.commit()
     return c.lastrowid
 
 
+@timed("db.get_or_create_lookup_ids")
+def get_or_create_lookup_ids(conn: sqlite3.Connection, table: str, name_column: str,
+                             name_values: Iterable[str]) -> Dict[str, int]:
+    """
+    Batch version of get_or_create_lookup_id.
+
+    Interns many strings at once (one executemany plus chunked SELECTs) and
+    returns a dict mapping each string to its integer ID. Does not commit.
+
+    Example:
+        ids = get_or_create_lookup_ids(conn, 'types_lookup', 'type_name', ['fire', 'water'])
+        # {'fire': 1, 'water': 2}
+    """
+    distinct = list({v for v in name_values if v is not None})
+    c = conn.cursor()
+    c.executemany(f"INSERT OR IGNORE INTO {table} ({name_column}) VALUES (?)",
+                  ((v,) for v in distinct))
+    created = max(c.rowcount, 0)
+    LOOKUP_REQUESTS.inc(len(distinct) - created, table=table, result="hit")
+    LOOKUP_REQUESTS.inc(created, table=table, result="miss")
+    ids = {}
+    # Stay well below SQLite's bound-parameter limit
+    for start in range(0, len(distinct), 500):
+        chunk = distinct[start:start + 500]
+        placeholders = ", ".join("?" for _ in chunk)
+        c.execute(f"SELECT id, {name_column} FROM {table} WHERE {name_column} IN ({placeholders})", chunk)
+        for row in c.fetchall():
+            ids[row[1]] = row[0]
+    return ids
+
+
+def add_column_if_missing(conn: sqlite3.Connection, table: str, column: str, column_type: str):
+    """
+    Add a column to an existing table (used to migrate databases created
+    before the column existed). Does nothing if the column is already there.
+    """
+    c = conn.cursor()
+    # table_xinfo also lists generated columns
+    c.execute(f"PRAGMA table_xinfo({table})")
+    if column not in [row["name"] for row in c.fetchall()]:
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
 def create_tables(conn: sqlite3.Connection):
     """
     Create all required database tables.
 
-    7 LOOKUP TABLES (store unique strings):
+    9 LOOKUP TABLES (store unique strings):
       - types_lookup, artists_lookup, cities_lookup, genres_lookup,
-        forecasts_lookup, dates_lookup, box_office_lookup
+        artist_genres_lookup, forecasts_lookup, dates_lookup,
+        box_office_lookup, spotify_ids_lookup
+
+    9 DATA TABLES (store only integers):
+      - pokemon, pokemon_stats, tracks, weather, movies,
+        track_artists, artist_details, artist_genres, audio_features
 
-    5 DATA TABLES (store only integers):
-      - pokemon, pokemon_stats, tracks, weather, movies
+    3 HISTORY TABLES (append-only change log for volatile metrics):
+      - tracks_history, weather_history, movies_history
     """
     c = conn.cursor()
 
-    print("\n" + "="*80)
-    print("CREATING DATABASE TABLES")
-    print("="*80)
+    log.info("="*80)
+    log.info("CREATING DATABASE TABLES")
+    log.info("="*80)
 
     # ==================== LOOKUP TABLES ====================
     # These tables store actual strings - each string appears EXACTLY ONCE
 
-    print("\nCreating LOOKUP TABLES (store unique strings):")
+    log.info("Creating LOOKUP TABLES (store unique strings):")
 
     c.execute("""
     CREATE TABLE IF NOT EXISTS types_lookup (
@@ -108,7 +234,7 @@ def create_tables(conn: sqlite3.Connection):
         type_name TEXT NOT NULL UNIQUE
     )
     """)
-    print("  ✓ types_lookup - Pokemon types")
+    log.info("  ✓ types_lookup - Pokemon types")
 
     c.execute("""
     CREATE TABLE IF NOT EXISTS artists_lookup (
@@ -116,15 +242,20 @@ def create_tables(conn: sqlite3.Connection):
         artist_name TEXT NOT NULL UNIQUE
     )
     """)
-    print("  ✓ artists_lookup - Spotify artists")
+    log.info("  ✓ artists_lookup - Spotify artists")
 
     c.execute("""
     CREATE TABLE IF NOT EXISTS cities_lookup (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
-        city_name TEXT NOT NULL UNIQUE
+        city_name TEXT NOT NULL UNIQUE,
+        latitude REAL,
+        longitude REAL
     )
     """)
-    print("  ✓ cities_lookup - Weather cities")
+    # Cities streamed from a file are not in CITY_COORDS; the refresher reads these
+    add_column_if_missing(conn, "cities_lookup", "latitude", "REAL")
+    add_column_if_missing(conn, "cities_lookup", "longitude", "REAL")
+    log.info("  ✓ cities_lookup - Weather cities")
 
     c.execute("""
     CREATE TABLE IF NOT EXISTS genres_lookup (
@@ -132,7 +263,15 @@ def create_tables(conn: sqlite3.Connection):
         genre_name TEXT NOT NULL UNIQUE
     )
     """)
-    print("  ✓ genres_lookup - Movie genres")
+    log.info("  ✓ genres_lookup - Movie genres")
+
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS artist_genres_lookup (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        genre_name TEXT NOT NULL UNIQUE
+    )
+    """)
+    log.info("  ✓ artist_genres_lookup - Spotify artist genres")
 
     c.execute("""
     CREATE TABLE IF NOT EXISTS forecasts_lookup (
@@ -140,7 +279,7 @@ def create_tables(conn: sqlite3.Connection):
         forecast_description TEXT NOT NULL UNIQUE
     )
     """)
-    print("  ✓ forecasts_lookup - Weather forecast descriptions")
+    log.info("  ✓ forecasts_lookup - Weather forecast descriptions")
 
     c.execute("""
     CREATE TABLE IF NOT EXISTS dates_lookup (
@@ -148,7 +287,7 @@ def create_tables(conn: sqlite3.Connection):
         date_value TEXT NOT NULL UNIQUE
     )
     """)
-    print("  ✓ dates_lookup - Date strings")
+    log.info("  ✓ dates_lookup - Date strings")
 
     c.execute("""
     CREATE TABLE IF NOT EXISTS box_office_lookup (
@@ -156,12 +295,20 @@ def create_tables(conn: sqlite3.Connection):
         box_office_value TEXT NOT NULL UNIQUE
     )
     """)
-    print("  ✓ box_office_lookup - Box office revenue strings")
+    log.info("  ✓ box_office_lookup - Box office revenue strings")
+
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS spotify_ids_lookup (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        spotify_id TEXT NOT NULL UNIQUE
+    )
+    """)
+    log.info("  ✓ spotify_ids_lookup - Spotify track/artist IDs")
 
     # ==================== DATA TABLES ====================
     # These tables store ONLY integers (IDs that reference lookup tables)
 
-    print("\nCreating DATA TABLES (store only integer references):")
+    log.info("Creating DATA TABLES (store only integer references):")
 
     c.execute("""
     CREATE TABLE IF NOT EXISTS pokemon (
@@ -174,7 +321,7 @@ def create_tables(conn: sqlite3.Connection):
         FOREIGN KEY(type_id) REFERENCES types_lookup(id)
     )
     """)
-    print("  ✓ pokemon - References types_lookup via type_id")
+    log.info("  ✓ pokemon - References types_lookup via type_id")
 
     c.execute("""
     CREATE TABLE IF NOT EXISTS pokemon_stats (
@@ -183,10 +330,19 @@ def create_tables(conn: sqlite3.Connection):
         attack INTEGER,
         defense INTEGER,
         speed INTEGER,
+        total_stats INTEGER GENERATED ALWAYS AS (hp + attack + defense + speed) STORED,
         FOREIGN KEY(pokemon_id) REFERENCES pokemon(id)
     )
     """)
-    print("  ✓ pokemon_stats - All integer columns")
+    # Older databases: SQLite can only ALTER in a VIRTUAL generated column,
+    # but the index below stores the value either way
+    add_column_if_missing(conn, "pokemon_stats", "total_stats",
+                          "INTEGER GENERATED ALWAYS AS (hp + attack + defense + speed) VIRTUAL")
+    # Lets "top N by total stats" walk the index instead of sorting every row;
+    # pokemon_id breaks ties so OFFSET paging is stable
+    c.execute("DROP INDEX IF EXISTS idx_pokemon_stats_total")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_pokemon_stats_total_id ON pokemon_stats(total_stats DESC, pokemon_id)")
+    log.info("  ✓ pokemon_stats - All integer columns (indexed total_stats)")
 
     c.execute("""
     CREATE TABLE IF NOT EXISTS tracks (
@@ -194,11 +350,12 @@ def create_tables(conn: sqlite3.Connection):
         title TEXT NOT NULL,
         artist_id INTEGER NOT NULL,
         popularity INTEGER,
+        updated_at INTEGER,
         UNIQUE(title, artist_id),
         FOREIGN KEY(artist_id) REFERENCES artists_lookup(id)
     )
     """)
-    print("  ✓ tracks - References artists_lookup via artist_id")
+    log.info("  ✓ tracks - References artists_lookup via artist_id")
 
     c.execute("""
     CREATE TABLE IF NOT EXISTS weather (
@@ -209,13 +366,14 @@ def create_tables(conn: sqlite3.Connection):
         temperature_low REAL,
         wind_speed REAL,
         forecast_id INTEGER,
+        updated_at INTEGER,
         UNIQUE(city_id, date_id),
         FOREIGN KEY(city_id) REFERENCES cities_lookup(id),
         FOREIGN KEY(date_id) REFERENCES dates_lookup(id),
         FOREIGN KEY(forecast_id) REFERENCES forecasts_lookup(id)
     )
     """)
-    print("  ✓ weather - References cities_lookup, dates_lookup, forecasts_lookup")
+    log.info("  ✓ weather - References cities_lookup, dates_lookup, forecasts_lookup")
 
     c.execute("""
     CREATE TABLE IF NOT EXISTS movies (
@@ -226,17 +384,195 @@ def create_tables(conn: sqlite3.Connection):
         runtime INTEGER,
         imdb_rating REAL,
         box_office_id INTEGER,
+        updated_at INTEGER,
         FOREIGN KEY(genre_id) REFERENCES genres_lookup(id),
         FOREIGN KEY(box_office_id) REFERENCES box_office_lookup(id)
     )
     """)
-    print("  ✓ movies - References genres_lookup, box_office_lookup")
+    log.info("  ✓ movies - References genres_lookup, box_office_lookup")
+
+    # Databases created before refresh mode existed lack updated_at.
+    # Rows with updated_at = NULL are treated as stale by the refresher.
+    for table in ("tracks", "weather", "movies"):
+        add_column_if_missing(conn, table, "updated_at", "INTEGER")
+        # The refresher's stale-row scan is a range query on updated_at
+        c.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_updated_at ON {table}(updated_at)")
+
+    # Spotify enrichment (see data_collection/spotify_enrichment.py): the
+    # Spotify ID of each track, collected during ingest, drives the batch calls
+    add_column_if_missing(conn, "tracks", "spotify_ref", "INTEGER REFERENCES spotify_ids_lookup(id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_tracks_spotify_ref ON tracks(spotify_ref)")
+
+    # 64-bit hash of normalized title + artist names, so the Spotify collector
+    # checks for duplicates with an integer index probe (see SpotifySource.write)
+    add_column_if_missing(conn, "tracks", "title_hash", "INTEGER")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_tracks_title_hash ON tracks(title_hash)")
+    c.execute("""
+        SELECT t.track_id, t.title, a.artist_name FROM tracks t
+        INNER JOIN artists_lookup a ON a.id = t.artist_id
+        WHERE t.title_hash IS NULL
+    """)
+    c.executemany("UPDATE tracks SET title_hash = ? WHERE track_id = ?",
+                  [(track_title_hash(title, artist), track_id) for track_id, title, artist in c.fetchall()])
+
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS track_artists (
+        track_id INTEGER NOT NULL,
+        artist_ref INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        PRIMARY KEY(track_id, artist_ref),
+        FOREIGN KEY(track_id) REFERENCES tracks(track_id),
+        FOREIGN KEY(artist_ref) REFERENCES spotify_ids_lookup(id)
+    )
+    """)
+    log.info("  ✓ track_artists - References tracks, spotify_ids_lookup")
+
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS artist_details (
+        artist_ref INTEGER PRIMARY KEY,
+        name_id INTEGER,
+        followers INTEGER,
+        popularity INTEGER,
+        updated_at INTEGER,
+        FOREIGN KEY(artist_ref) REFERENCES spotify_ids_lookup(id),
+        FOREIGN KEY(name_id) REFERENCES artists_lookup(id)
+    )
+    """)
+    log.info("  ✓ artist_details - References spotify_ids_lookup, artists_lookup")
+
+    artist_genres_ddl = """
+    CREATE TABLE IF NOT EXISTS artist_genres (
+        artist_ref INTEGER NOT NULL,
+        genre_id INTEGER NOT NULL,
+        PRIMARY KEY(artist_ref, genre_id),
+        FOREIGN KEY(artist_ref) REFERENCES spotify_ids_lookup(id),
+        FOREIGN KEY(genre_id) REFERENCES artist_genres_lookup(id)
+    )
+    """
+    c.execute(artist_genres_ddl)
+    # artist_genres used to point into genres_lookup, mixing artist genres with
+    # movie genres; move existing rows to artist_genres_lookup and drop the
+    # strings that no movie uses from genres_lookup
+    c.execute("PRAGMA foreign_key_list(artist_genres)")
+    if any(row[2] == "genres_lookup" for row in c.fetchall()):
+        c.execute("ALTER TABLE artist_genres RENAME TO artist_genres_old")
+        c.execute(artist_genres_ddl)
+        c.execute("""
+            INSERT OR IGNORE INTO artist_genres_lookup (genre_name)
+            SELECT g.genre_name FROM artist_genres_old ag
+            INNER JOIN genres_lookup g ON g.id = ag.genre_id
+            ORDER BY g.id
+        """)
+        c.execute("""
+            INSERT OR IGNORE INTO artist_genres (artist_ref, genre_id)
+            SELECT ag.artist_ref, n.id FROM artist_genres_old ag
+            INNER JOIN genres_lookup g ON g.id = ag.genre_id
+            INNER JOIN artist_genres_lookup n ON n.genre_name = g.genre_name
+        """)
+        c.execute("""
+            DELETE FROM genres_lookup
+            WHERE id IN (SELECT genre_id FROM artist_genres_old)
+              AND id NOT IN (SELECT genre_id FROM movies WHERE genre_id IS NOT NULL)
+        """)
+        c.execute("DROP TABLE artist_genres_old")
+        log.info("  ✓ artist_genres - Moved genres from genres_lookup to artist_genres_lookup")
+    log.info("  ✓ artist_genres - References spotify_ids_lookup, artist_genres_lookup")
+
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS audio_features (
+        track_ref INTEGER PRIMARY KEY,
+        danceability REAL,
+        energy REAL,
+        valence REAL,
+        acousticness REAL,
+        tempo REAL,
+        loudness REAL,
+        updated_at INTEGER,
+        FOREIGN KEY(track_ref) REFERENCES spotify_ids_lookup(id)
+    )
+    """)
+    log.info("  ✓ audio_features - References spotify_ids_lookup via track_ref")
+
+    # ==================== HISTORY TABLES ====================
+    # Append-only log of previous values, filled by triggers whenever a
+    # refresh changes a volatile metric (see data_collection/refresh.py)
+
+    log.info("Creating HISTORY TABLES (append-only change log):")
+
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS tracks_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        track_id INTEGER NOT NULL,
+        old_popularity INTEGER,
+        new_popularity INTEGER,
+        changed_at INTEGER NOT NULL,
+        FOREIGN KEY(track_id) REFERENCES tracks(track_id)
+    )
+    """)
+    c.execute("""
+    CREATE TRIGGER IF NOT EXISTS tracks_popularity_history
+    AFTER UPDATE OF popularity ON tracks
+    WHEN OLD.popularity IS NOT NEW.popularity
+    BEGIN
+        INSERT INTO tracks_history (track_id, old_popularity, new_popularity, changed_at)
+        VALUES (NEW.track_id, OLD.popularity, NEW.popularity, CAST(strftime('%s', 'now') AS INTEGER));
+    END
+    """)
+    log.info("  ✓ tracks_history - References tracks via track_id")
+
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS weather_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        weather_id INTEGER NOT NULL,
+        old_temperature_high REAL,
+        old_temperature_low REAL,
+        new_temperature_high REAL,
+        new_temperature_low REAL,
+        changed_at INTEGER NOT NULL,
+        FOREIGN KEY(weather_id) REFERENCES weather(id)
+    )
+    """)
+    c.execute("""
+    CREATE TRIGGER IF NOT EXISTS weather_temperature_history
+    AFTER UPDATE OF temperature_high, temperature_low ON weather
+    WHEN OLD.temperature_high IS NOT NEW.temperature_high
+      OR OLD.temperature_low IS NOT NEW.temperature_low
+    BEGIN
+        INSERT INTO weather_history (weather_id, old_temperature_high, old_temperature_low,
+                                     new_temperature_high, new_temperature_low, changed_at)
+        VALUES (NEW.id, OLD.temperature_high, OLD.temperature_low,
+                NEW.temperature_high, NEW.temperature_low, CAST(strftime('%s', 'now') AS INTEGER));
+    END
+    """)
+    log.info("  ✓ weather_history - References weather via weather_id")
+
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS movies_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        imdb_id TEXT NOT NULL,
+        old_imdb_rating REAL,
+        new_imdb_rating REAL,
+        changed_at INTEGER NOT NULL,
+        FOREIGN KEY(imdb_id) REFERENCES movies(imdb_id)
+    )
+    """)
+    c.execute("""
+    CREATE TRIGGER IF NOT EXISTS movies_rating_history
+    AFTER UPDATE OF imdb_rating ON movies
+    WHEN OLD.imdb_rating IS NOT NEW.imdb_rating
+    BEGIN
+        INSERT INTO movies_history (imdb_id, old_imdb_rating, new_imdb_rating, changed_at)
+        VALUES (NEW.imdb_id, OLD.imdb_rating, NEW.imdb_rating, CAST(strftime('%s', 'now') AS INTEGER));
+    END
+    """)
+    log.info("  ✓ movies_history - References movies via imdb_id")
 
     conn.commit()
 
-    print("\n" + "="*80)
-    print("DATABASE SCHEMA COMPLETE")
-    print("="*80)
-    print("7 LOOKUP TABLES: Store unique strings (NO DUPLICATES)")
-    print("5 DATA TABLES: Store only integer references")
-    print("="*80 + "\n")
+    log.info("="*80)
+    log.info("DATABASE SCHEMA COMPLETE")
+    log.info("="*80)
+    log.info("9 LOOKUP TABLES: Store unique strings (NO DUPLICATES)")
+    log.info("9 DATA TABLES: Store only integer references")
+    log.info("3 HISTORY TABLES: Append-only log of refreshed metrics")
+    log.info("="*80)
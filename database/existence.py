@@ -0,0 +1,200 @@
+"""
+Batched existence checks for the data collectors
+
+Instead of running one "SELECT 1 ... LIMIT 1" per candidate, the collectors
+load every known key for their candidate range in ONE query and then test
+membership in memory. This lets each collector compute its work list up front,
+before any HTTP calls are made.
+
+Three flavours are provided:
+  - load_existing_keys   : known keys as a Python set (any key type)
+  - load_existing_bitmap : known keys as an IdBitmap (dense integer ids)
+  - filter_new_keys      : temp-table anti-join for very large candidate lists
+
+BloomFilter is the fixed-memory option for key streams of unknown size
+(e.g. deduplicating input files, or tracks seen across searches): it never
+forgets a key it has seen, but may rarely claim to have seen one it has not.
+"""
+import hashlib
+import math
+import sqlite3
+from typing import Iterable, List, Optional, Set
+
+
+class IdBitmap:
+    """
+    Compact bitmap over a dense integer key range [lo, hi].
+
+    Uses one bit per id, so the full national Pokedex (~1000 ids) fits in
+    about 128 bytes instead of a set of Python ints.
+    """
+
+    __slots__ = ("lo", "hi", "_bits")
+
+    def __init__(self, lo: int, hi: int):
+        if hi < lo:
+            raise ValueError(f"Invalid id range: {lo}..{hi}")
+        self.lo = lo
+        self.hi = hi
+        self._bits = bytearray((hi - lo) // 8 + 1)
+
+    def add(self, key: int):
+        """Mark an id as present (ids outside the range are ignored)."""
+        if self.lo <= key <= self.hi:
+            offset = key - self.lo
+            self._bits[offset >> 3] |= 1 << (offset & 7)
+
+    def __contains__(self, key: int) -> bool:
+        if not (self.lo <= key <= self.hi):
+            return False
+        offset = key - self.lo
+        return bool(self._bits[offset >> 3] & (1 << (offset & 7)))
+
+    def __len__(self) -> int:
+        return sum(bin(b).count("1") for b in self._bits)
+
+    def missing(self) -> List[int]:
+        """Return all ids in the range that are NOT present, in order."""
+        return [key for key in range(self.lo, self.hi + 1) if key not in self]
+
+
+def hash64(value) -> int:
+    """Stable signed 64-bit hash of a string (or of repr() for other values); fits an SQLite INTEGER."""
+    data = value.encode("utf-8") if isinstance(value, str) else repr(value).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little", signed=True)
+
+
+def normalize_text(value: str) -> str:
+    """Case- and whitespace-insensitive form used for hashed keys."""
+    return " ".join(value.split()).casefold()
+
+
+def track_title_hash(title: str, artist: str) -> int:
+    """hash64 of normalized (title, artist) - the tracks.title_hash value."""
+    return hash64(f"{normalize_text(title)}\x1f{normalize_text(artist)}")
+
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set of keys.
+
+    Sized for capacity keys at a false-positive rate of error_rate (about
+    1.8 MB for a million keys at 0.1%); memory does not grow as keys are
+    added. Keys are hashed once with hash64() and the bit positions derived
+    from its two 32-bit halves (double hashing).
+    """
+
+    __slots__ = ("size", "hashes", "count", "_bits")
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError(f"Invalid Bloom filter parameters: capacity={capacity}, error_rate={error_rate}")
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def add_hash(self, h: int) -> bool:
+        """Add a key by its hash64(); True if it was not (probably) present before."""
+        bits, size = self._bits, self.size
+        h1, h2 = h & 0xFFFFFFFF, ((h >> 32) & 0xFFFFFFFF) | 1
+        new = False
+        for _ in range(self.hashes):
+            pos = h1 % size
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                bits[pos >> 3] |= mask
+                new = True
+            h1 += h2
+        self.count += new
+        return new
+
+    def contains_hash(self, h: int) -> bool:
+        bits, size = self._bits, self.size
+        h1, h2 = h & 0xFFFFFFFF, ((h >> 32) & 0xFFFFFFFF) | 1
+        for _ in range(self.hashes):
+            pos = h1 % size
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+            h1 += h2
+        return True
+
+    def add(self, key) -> bool:
+        """Add key; True if it was not (probably) present before."""
+        return self.add_hash(hash64(key))
+
+    def __contains__(self, key) -> bool:
+        return self.contains_hash(hash64(key))
+
+    def __len__(self) -> int:
+        """Number of keys added as new (slightly low once false positives occur)."""
+        return self.count
+
+
+def load_existing_keys(conn: sqlite3.Connection, table: str, key_column: str,
+                       where_clause: Optional[str] = None, params=()) -> Set:
+    """
+    Load all known values of key_column from table in a single query.
+
+    Args:
+        conn: Database connection
+        table: Data table name (e.g., 'movies')
+        key_column: Column holding the natural key (e.g., 'imdb_id')
+        where_clause: Optional filter to narrow the candidate range
+        params: Parameters for where_clause
+
+    Returns:
+        Set of existing key values
+
+    Example:
+        known = load_existing_keys(conn, 'movies', 'imdb_id')
+        if imdb_id in known: ...
+    """
+    c = conn.cursor()
+    q = f"SELECT {key_column} FROM {table}"
+    if where_clause:
+        q += f" WHERE {where_clause}"
+    c.execute(q, params)
+    return {row[0] for row in c.fetchall()}
+
+
+def load_existing_bitmap(conn: sqlite3.Connection, table: str, id_column: str,
+                         lo: int, hi: int) -> IdBitmap:
+    """
+    Load known integer ids in [lo, hi] into an IdBitmap with one range query.
+
+    Example:
+        known = load_existing_bitmap(conn, 'pokemon', 'id', 1, 151)
+        todo = known.missing()   # ids still to fetch
+    """
+    bitmap = IdBitmap(lo, hi)
+    c = conn.cursor()
+    c.execute(f"SELECT {id_column} FROM {table} WHERE {id_column} BETWEEN ? AND ?", (lo, hi))
+    for row in c.fetchall():
+        bitmap.add(row[0])
+    return bitmap
+
+
+def filter_new_keys(conn: sqlite3.Connection, table: str, key_column: str,
+                    candidates: Iterable) -> List:
+    """
+    Return the candidates that are NOT yet in table, preserving input order.
+
+    Candidates are bulk-loaded into a TEMP table and resolved with a single
+    anti-join, so SQLite does the membership test instead of Python. Prefer
+    this over load_existing_keys when the table is much larger than the
+    candidate list.
+    """
+    c = conn.cursor()
+    c.execute("DROP TABLE IF EXISTS temp._candidate_keys")
+    c.execute("CREATE TEMP TABLE _candidate_keys (pos INTEGER PRIMARY KEY, key_value)")
+    c.executemany("INSERT INTO temp._candidate_keys (key_value) VALUES (?)",
+                  ((key,) for key in candidates))
+    c.execute(f"""
+        SELECT ck.key_value FROM temp._candidate_keys ck
+        WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.{key_column} = ck.key_value)
+        ORDER BY ck.pos
+    """)
+    new_keys = [row[0] for row in c.fetchall()]
+    c.execute("DROP TABLE temp._candidate_keys")
+    return new_keys
@@ -0,0 +1,198 @@
+"""
+Read-only federated view over several project database files
+
+The repo ships three snapshots with overlapping rows in two schemas:
+  - si201_project.db      : integer *_id columns + lookup tables (current)
+  - si201_project_old.db  : legacy schema with the strings inline
+  - archive.db            : legacy schema
+
+open_federated() ATTACHes them all (read-only, nothing is copied) into an
+in-memory connection and defines TEMP views under the current table names
+(pokemon, types_lookup, tracks, artists_lookup, weather, ...), so the
+existing calculations/ functions run across every file unchanged.
+
+DEDUPLICATION:
+Rows are matched on a natural key and the first file in the list wins:
+  pokemon / pokemon_stats : id / pokemon_id
+  movies                  : imdb_id
+  tracks                  : (title, artist)
+  weather                 : (city, date)
+
+Each file is first normalized to a "canonical" row with the lookup strings
+spelled out (canonical_select()); the views union those, keep one row per
+key, and re-intern the strings into view-local ids. The ids are therefore
+only stable within one federated connection.
+
+Example:
+    conn = open_federated(["si201_project.db", "si201_project_old.db", "archive.db"])
+    calculate_avg_base_exp_by_type(conn)
+"""
+import os
+import sqlite3
+from typing import Dict, List, Optional, Sequence
+from config.api_keys import FEDERATED_DB_PATHS
+from database.db_helper import LOOKUP_COLUMNS, LOOKUP_TABLES
+
+
+# Columns each view exposes, in the current schema's names and order
+VIEW_COLUMNS = {
+    "pokemon": ["id", "name", "base_experience", "height", "weight", "type_id"],
+    "pokemon_stats": ["pokemon_id", "hp", "attack", "defense", "speed"],
+    "tracks": ["track_id", "title", "artist_id", "popularity"],
+    "weather": ["id", "city_id", "date_id", "temperature_high", "temperature_low", "wind_speed", "forecast_id"],
+    "movies": ["imdb_id", "title", "year", "genre_id", "runtime", "imdb_rating", "box_office_id"],
+}
+
+# Natural key each table is deduplicated on (canonical column names)
+DEDUP_KEYS = {
+    "pokemon": ["id"],
+    "pokemon_stats": ["pokemon_id"],
+    "tracks": ["title", "artist"],
+    "weather": ["city", "date"],
+    "movies": ["imdb_id"],
+}
+
+# Row ids that only exist per file; the views number the merged rows instead
+SURROGATE_KEYS = {"tracks": "track_id", "weather": "id"}
+
+# Legacy column holding the string for a lookup column, where the name differs
+LEGACY_NAMES = {
+    "pokemon": {"type": "primary_type"},
+    "weather": {"forecast": "short_forecast"},
+}
+
+
+def canonical_name(column: str) -> str:
+    """type_id -> type, box_office_id -> box_office (the string a lookup id stands for)."""
+    return column[:-len("_id")]
+
+
+def canonical_columns(table: str) -> List[str]:
+    """Columns of canonical rows: lookup ids replaced by their strings, surrogate ids dropped."""
+    lookups = LOOKUP_COLUMNS.get(table, {})
+    return [canonical_name(col) if col in lookups else col
+            for col in VIEW_COLUMNS[table] if col != SURROGATE_KEYS.get(table)]
+
+
+def table_columns(conn: sqlite3.Connection, schema: str, table: str) -> List[str]:
+    c = conn.cursor()
+    c.execute(f"PRAGMA {schema}.table_info({table})")
+    return [row[1] for row in c.fetchall()]
+
+
+def canonical_select(conn: sqlite3.Connection, schema: str, table: str,
+                     key_probe: bool = False) -> Optional[str]:
+    """
+    SELECT producing canonical rows of schema.table, or None if the file has
+    no such table. Works for both the lookup-id and the legacy schema.
+
+    key_probe=True selects only the DEDUP_KEYS columns and INNER JOINs their
+    lookups, so "does this file have (city, date)?" can start from the
+    lookups' name indexes instead of scanning the table.
+    """
+    present = table_columns(conn, schema, table)
+    if not present:
+        return None
+    lookups = {col: lookup for col, lookup in LOOKUP_COLUMNS.get(table, {}).items()
+               if col in VIEW_COLUMNS[table]}
+    uses_ids = all(col in present for col in lookups)
+    selects, joins = [], []
+    for col in VIEW_COLUMNS[table]:
+        if col == SURROGATE_KEYS.get(table):
+            continue
+        if key_probe and (canonical_name(col) if col in lookups else col) not in DEDUP_KEYS[table]:
+            continue
+        if col not in lookups:
+            selects.append(f"d.{col}" if col in present else f"NULL AS {col}")
+            continue
+        name = canonical_name(col)
+        if uses_ids:
+            lookup = lookups[col]
+            alias = f"l{len(joins)}"
+            joins.append(f"{'' if key_probe else 'LEFT '}JOIN {schema}.{lookup} {alias} ON {alias}.id = d.{col}")
+            selects.append(f"{alias}.{LOOKUP_TABLES[lookup]} AS {name}")
+        else:
+            legacy = LEGACY_NAMES.get(table, {}).get(name, name)
+            selects.append(f"d.{legacy} AS {name}" if legacy in present else f"NULL AS {name}")
+    return f"SELECT {', '.join(selects)} FROM {schema}.{table} d {' '.join(joins)}".rstrip()
+
+
+def attach_read_only(conn: sqlite3.Connection, paths: Sequence[str], prefix: str = "f") -> List[str]:
+    """ATTACH each path read-only as <prefix>0, <prefix>1, ...; returns the schema names."""
+    schemas = []
+    for i, path in enumerate(paths):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        schema = f"{prefix}{i}"
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (f"file:{os.path.abspath(path)}?mode=ro",))
+        schemas.append(schema)
+    return schemas
+
+
+def _create_views(conn: sqlite3.Connection, schemas: List[str]):
+    c = conn.cursor()
+    # 1. Deduplicated canonical rows per table (first schema wins)
+    for table in VIEW_COLUMNS:
+        parts = [f"SELECT {priority} AS src, * FROM ({sql})"
+                 for priority, sql in enumerate(canonical_select(conn, s, table) for s in schemas) if sql]
+        columns = ", ".join(canonical_columns(table))
+        if not parts:
+            nulls = ", ".join(f"NULL AS {col}" for col in canonical_columns(table))
+            c.execute(f"CREATE TEMP VIEW canonical_{table} AS SELECT {nulls} WHERE 0")
+            continue
+        c.execute(f"""
+            CREATE TEMP VIEW canonical_{table} AS
+            SELECT {columns} FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY {', '.join(DEDUP_KEYS[table])} ORDER BY src) AS rn
+                FROM ({' UNION ALL '.join(parts)})
+            ) WHERE rn = 1
+        """)
+
+    # 2. Lookup tables: every distinct string, numbered (only those the views use)
+    sources: Dict[str, List[str]] = {}
+    for table, columns in VIEW_COLUMNS.items():
+        lookups = LOOKUP_COLUMNS.get(table, {})
+        for col in columns:
+            if col in lookups:
+                sources.setdefault(lookups[col], []).append(
+                    f"SELECT {canonical_name(col)} AS v FROM canonical_{table}")
+    for lookup, name_column in LOOKUP_TABLES.items():
+        if lookup not in sources:
+            continue
+        c.execute(f"""
+            CREATE TEMP VIEW {lookup} AS
+            SELECT ROW_NUMBER() OVER (ORDER BY v) AS id, v AS {name_column}
+            FROM (SELECT DISTINCT v FROM ({' UNION ALL '.join(sources[lookup])}) WHERE v IS NOT NULL)
+        """)
+
+    # 3. Data tables under their usual names, strings mapped back to ids
+    for table, columns in VIEW_COLUMNS.items():
+        lookups = LOOKUP_COLUMNS.get(table, {})
+        selects, joins = [], []
+        for col in columns:
+            if col == SURROGATE_KEYS.get(table):
+                keys = ", ".join(f"d.{k}" for k in DEDUP_KEYS[table])
+                selects.append(f"ROW_NUMBER() OVER (ORDER BY {keys}) AS {col}")
+            elif col in lookups:
+                alias = f"l{len(joins)}"
+                lookup = lookups[col]
+                joins.append(f"LEFT JOIN {lookup} {alias} "
+                             f"ON {alias}.{LOOKUP_TABLES[lookup]} = d.{canonical_name(col)}")
+                selects.append(f"{alias}.id AS {col}")
+            else:
+                selects.append(f"d.{col}")
+        if table == "pokemon_stats":
+            selects.append("d.hp + d.attack + d.defense + d.speed AS total_stats")
+        c.execute(f"CREATE TEMP VIEW {table} AS SELECT {', '.join(selects)} "
+                  f"FROM canonical_{table} d {' '.join(joins)}")
+
+
+def open_federated(paths: Sequence[str] = FEDERATED_DB_PATHS) -> sqlite3.Connection:
+    """
+    In-memory connection with every file in paths attached read-only and
+    the deduplicating views defined. Earlier paths win on duplicate keys.
+    """
+    conn = sqlite3.connect(":memory:", uri=True)
+    conn.row_factory = sqlite3.Row
+    _create_views(conn, attach_read_only(conn, paths))
+    return conn
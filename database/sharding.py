@@ -0,0 +1,197 @@
+"""
+Per-source database shards with an ATTACH-based federation
+
+With one si201_project.db, every collector shares a single SQLite write
+lock, so a long weather transaction blocks Spotify inserts. In sharded mode
+each source gets its own file and the lookup tables get a shared one:
+
+    shards/
+        lookups.db      <- the 9 *_lookup tables
+        pokemon.db      <- pokemon, pokemon_stats
+        tracks.db       <- tracks, tracks_history and the Spotify enrichment tables
+        weather.db      <- weather, weather_history
+        movies.db       <- movies, movies_history
+        federation.db   <- no tables of its own; ATTACHes all of the above
+
+Every shard keeps the exact DDL create_tables() produces (history triggers
+included, since each trigger only touches its own shard).
+
+HOW EXISTING CODE KEEPS WORKING:
+Each file lists what it needs in an attached_shards table, and
+create_connection() ATTACHes those databases on open:
+
+  - a source shard attaches lookups.db, so a collector connected to
+    pokemon.db resolves "types_lookup" to lookups.types_lookup
+  - federation.db attaches every shard, so "SELECT ... FROM pokemon JOIN
+    types_lookup" in the calculations and visualizations runs unchanged
+
+SQLite resolves an unqualified table name by searching temp, main and then
+the attached databases, so no views are needed - and unlike views, the
+attached tables keep their rowid, which the snapshot fingerprints use.
+
+Collectors write to different files, so they can run concurrently from
+separate processes (see run_sources_sharded() in data_collection/sources.py).
+They only contend on lookups.db, for the short INSERT OR IGNORE that interns
+new strings.
+
+Example:
+    create_shards()
+    conn = create_connection(federation_path())
+"""
+import logging
+import os
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+from config.api_keys import SHARD_DIR
+from database.db_helper import LOOKUP_TABLES, create_connection, create_tables
+from monitoring.structured_logging import get_logger
+
+
+log = get_logger("db")
+
+# Shard name -> tables it holds
+SHARDS: Dict[str, List[str]] = {
+    "lookups": list(LOOKUP_TABLES),
+    "pokemon": ["pokemon", "pokemon_stats"],
+    "tracks": ["tracks", "tracks_history", "track_artists", "artist_details", "artist_genres",
+               "audio_features"],
+    "weather": ["weather", "weather_history"],
+    "movies": ["movies", "movies_history"],
+}
+
+FEDERATION_FILE = "federation.db"
+
+
+def shard_path(shard: str, shard_dir: str = SHARD_DIR) -> str:
+    return os.path.join(shard_dir, f"{shard}.db")
+
+
+def federation_path(shard_dir: str = SHARD_DIR) -> str:
+    return os.path.join(shard_dir, FEDERATION_FILE)
+
+
+def shard_for_table(table: str) -> str:
+    """Name of the shard that holds table."""
+    for shard, tables in SHARDS.items():
+        if table in tables:
+            return shard
+    raise KeyError(f"No shard holds table {table}")
+
+
+def _schema_by_shard() -> Tuple[Dict[str, List[Tuple[str, str]]], Dict[str, List[Tuple[str, str]]]]:
+    """
+    (name, DDL) pairs for each shard and (column, type) pairs for each
+    table, taken from an in-memory create_tables() run.
+    """
+    template = create_connection(":memory:")
+    level = log.level
+    log.setLevel(logging.WARNING)  # skip the table-creation banner
+    try:
+        create_tables(template)
+    finally:
+        log.setLevel(level)
+    c = template.cursor()
+    # Tables first, then their indexes and triggers
+    c.execute("""
+        SELECT name, tbl_name, sql FROM sqlite_master
+        WHERE sql IS NOT NULL AND name != 'sqlite_sequence'
+        ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END, rowid
+    """)
+    schema: Dict[str, List[Tuple[str, str]]] = {shard: [] for shard in SHARDS}
+    for name, table, sql in c.fetchall():
+        schema[shard_for_table(table)].append((name, sql))
+    columns = {table: [(row["name"], row["type"]) for row in c.execute(f"PRAGMA table_info({table})")]
+               for tables in SHARDS.values() for table in tables}
+    template.close()
+    return schema, columns
+
+
+def _write_attachments(conn: sqlite3.Connection, shards: List[str]):
+    conn.execute("CREATE TABLE IF NOT EXISTS attached_shards (alias TEXT PRIMARY KEY, path TEXT NOT NULL)")
+    conn.executemany("INSERT OR REPLACE INTO attached_shards VALUES (?, ?)",
+                     ((shard, f"{shard}.db") for shard in shards))
+
+
+def create_shards(shard_dir: str = SHARD_DIR, source_db: Optional[str] = None):
+    """
+    Create the shard files, their attachment lists and federation.db.
+    Existing shards keep their data; only objects and columns they are
+    missing (such as a lookup table or column added since they were
+    created) are added.
+
+    Args:
+        shard_dir: Directory for the shard files
+        source_db: Optional single-file database whose rows are copied into
+                   the new shards (INSERT OR IGNORE, so re-running is safe)
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    schema, columns = _schema_by_shard()
+    for shard, statements in schema.items():
+        conn = sqlite3.connect(shard_path(shard, shard_dir))
+        # WAL lets the federation read while a collector is writing
+        conn.execute("PRAGMA journal_mode=WAL")
+        c = conn.cursor()
+        c.execute("SELECT name FROM sqlite_master")
+        existing = {row[0] for row in c.fetchall()}
+        for name, sql in statements:
+            if name not in existing:
+                c.execute(sql)
+        for table in SHARDS[shard]:
+            have = {row[1] for row in c.execute(f"PRAGMA table_info({table})")}
+            for column, column_type in columns[table]:
+                if column not in have:
+                    c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+        if shard != "lookups":
+            _write_attachments(conn, ["lookups"])
+        conn.commit()
+        conn.close()
+
+    conn = sqlite3.connect(federation_path(shard_dir))
+    _write_attachments(conn, list(SHARDS))
+    conn.commit()
+    conn.close()
+
+    if source_db:
+        copy_into_shards(source_db, shard_dir)
+    log.info("✓ Shards ready in %s/ (%s)", shard_dir, ", ".join(SHARDS))
+
+
+def copy_into_shards(source_db: str, shard_dir: str = SHARD_DIR) -> Dict[str, int]:
+    """
+    Copy every table of a single-file database into its shard.
+
+    Returns:
+        {table: rows copied}
+    """
+    copied = {}
+    for shard, tables in SHARDS.items():
+        conn = sqlite3.connect(shard_path(shard, shard_dir))
+        conn.execute("ATTACH DATABASE ? AS source", (source_db,))
+        c = conn.cursor()
+        for table in tables:
+            c.execute("SELECT 1 FROM source.sqlite_master WHERE type = 'table' AND name = ?", (table,))
+            if c.fetchone() is None:
+                continue
+            # hidden != 0 marks generated columns, which cannot be inserted
+            c.execute(f"PRAGMA main.table_xinfo({table})")
+            columns = [row[1] for row in c.fetchall() if row[6] == 0]
+            c.execute(f"PRAGMA source.table_info({table})")
+            available = {row[1] for row in c.fetchall()}
+            columns = ", ".join(col for col in columns if col in available)
+            c.execute(f"INSERT OR IGNORE INTO main.{table} ({columns}) SELECT {columns} FROM source.{table}")
+            copied[table] = c.rowcount
+        conn.commit()
+        conn.execute("DETACH DATABASE source")
+        conn.close()
+    log.info("✓ Copied %d rows from %s into %s/", sum(copied.values()), source_db, shard_dir)
+    return copied
+
+
+def open_shard(table: str, shard_dir: str = SHARD_DIR) -> sqlite3.Connection:
+    """Connection to the shard holding table, with lookups.db attached."""
+    return create_connection(shard_path(shard_for_table(table), shard_dir))
+
+
+def open_federation(shard_dir: str = SHARD_DIR) -> sqlite3.Connection:
+    """Connection that sees every shard's tables under their usual names."""
+    return create_connection(federation_path(shard_dir))
@@ -0,0 +1,243 @@
+"""
+Memory-mapped columnar snapshot cache for the analytics path
+
+After ingest, write_snapshot() dumps every numeric column of each data table
+into its own NumPy .npy file:
+
+    si201_project.db.snapshot/
+        manifest.json              <- fingerprint + dtype per table/column
+        pokemon/base_experience.npy
+        pokemon/type_id.npy
+        ...
+
+The calculations and visualizations then call load_columns(), which
+memory-maps those files (np.load(mmap_mode="r")) instead of re-querying
+SQLite and building sqlite3.Row objects.
+
+INVALIDATION:
+Each table's snapshot stores a fingerprint (row count, max rowid and a
+TOTAL() of every column). If the live table no longer matches, that table's
+snapshot is rewritten before it is mapped. Within one process the fingerprint query is
+skipped while PRAGMA data_version (of main and every attached database) and
+conn.total_changes are unchanged.
+
+STRING-TO-INTEGER MAPPING:
+Only integer/real columns are snapshotted. Strings stay in the lookup tables;
+callers group by the integer *_id arrays and resolve names with lookup_names().
+
+numpy is optional: if it is missing, load_columns() returns None and callers
+fall back to their SQL queries.
+"""
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from database.db_helper import DATA_TABLES, LOOKUP_TABLES
+from monitoring.structured_logging import get_logger
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+log = get_logger("db")
+
+# (connection id, table) -> (connection, (data_versions, total_changes), fingerprint)
+# Holding the connection keeps its id from being reused by a newer one while
+# the entry exists; the LRU bound keeps that from leaking connections.
+_fingerprints: "OrderedDict[Tuple[int, str], Tuple]" = OrderedDict()
+_FINGERPRINT_ENTRIES = 64
+_fingerprints_lock = threading.Lock()
+
+
+def database_file(conn: sqlite3.Connection) -> str:
+    c = conn.cursor()
+    c.execute("PRAGMA database_list")
+    for row in c.fetchall():
+        if row[1] == "main":
+            return row[2]
+    return ""
+
+
+def snapshot_dir_for(conn: sqlite3.Connection) -> Optional[str]:
+    """Snapshot directory next to the database file (None for in-memory DBs)."""
+    db_file = database_file(conn)
+    return db_file + ".snapshot" if db_file else None
+
+
+def table_fingerprint(conn: sqlite3.Connection, table: str) -> List:
+    """
+    Row count, max rowid and a TOTAL() per column, computed in one scan.
+    The column totals catch in-place updates (e.g. a refreshed popularity).
+    """
+    c = conn.cursor()
+    c.execute(f"PRAGMA table_info({table})")
+    totals = "".join(f", TOTAL({row[1]})" for row in c.fetchall())
+    c.execute(f"SELECT COUNT(*), MAX(rowid){totals} FROM {table}")
+    return list(c.fetchone())
+
+
+def cached_fingerprint(conn: sqlite3.Connection, table: str) -> List:
+    """
+    table_fingerprint(), but only re-scanned when PRAGMA data_version (commits
+    by other connections) or conn.total_changes (writes by this one) moved.
+    data_version is per database file, so it is read for every attached
+    schema too (a federation's tables all live in attached shards).
+    """
+    c = conn.cursor()
+    c.execute("PRAGMA database_list")
+    schemas = [row[1] for row in c.fetchall()]
+    versions = []
+    for schema in schemas:
+        c.execute(f"PRAGMA {schema}.data_version")
+        versions.append(c.fetchone()[0])
+    version = (tuple(versions), conn.total_changes)
+    key = (id(conn), table)
+    with _fingerprints_lock:
+        cached = _fingerprints.get(key)
+    if cached is None or cached[0] is not conn or cached[1] != version:
+        cached = (conn, version, table_fingerprint(conn, table))
+    with _fingerprints_lock:
+        _fingerprints[key] = cached
+        _fingerprints.move_to_end(key)
+        while len(_fingerprints) > _FINGERPRINT_ENTRIES:
+            _fingerprints.popitem(last=False)
+    return cached[2]
+
+
+def _read_manifest(snapshot_dir: str) -> Dict:
+    path = os.path.join(snapshot_dir, "manifest.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_manifest(snapshot_dir: str, manifest: Dict):
+    path = os.path.join(snapshot_dir, "manifest.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def write_table_snapshot(conn: sqlite3.Connection, table: str, snapshot_dir: str) -> Dict:
+    """
+    Write every numeric column of table to <snapshot_dir>/<table>/<column>.npy.
+
+    Integer columns without NULLs are stored as int64; everything else numeric
+    is stored as float64 with NULL -> NaN. Returns the manifest entry.
+    """
+    c = conn.cursor()
+    c.execute(f"PRAGMA table_info({table})")
+    columns = [row[1] for row in c.fetchall()]
+    fingerprint = table_fingerprint(conn, table)
+
+    table_dir = os.path.join(snapshot_dir, table)
+    os.makedirs(table_dir, exist_ok=True)
+    dtypes = {}
+    for column in columns:
+        c.execute(f"SELECT DISTINCT typeof({column}) FROM {table}")
+        kinds = {row[0] for row in c.fetchall()}
+        if not kinds - {"null"} or kinds - {"integer", "real", "null"}:
+            continue
+        dtype = "int64" if kinds == {"integer"} else "float64"
+        c.execute(f"SELECT {column} FROM {table} ORDER BY rowid")
+        values = [row[0] for row in c.fetchall()]
+        if dtype == "float64":
+            values = [np.nan if v is None else v for v in values]
+        path = os.path.join(table_dir, column + ".npy")
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, np.asarray(values, dtype=dtype))
+        os.replace(path + ".tmp", path)
+        dtypes[column] = dtype
+    return {"fingerprint": fingerprint, "columns": dtypes}
+
+
+def write_snapshot(conn: sqlite3.Connection, snapshot_dir: Optional[str] = None,
+                   tables: Optional[List[str]] = None):
+    """
+    Snapshot the data tables (all of them, or just tables). Call once after
+    ingest; daemon jobs pass the tables they wrote.
+    """
+    if np is None:
+        log.warning("numpy not installed. Skipping snapshot.")
+        return
+    snapshot_dir = snapshot_dir or snapshot_dir_for(conn)
+    if snapshot_dir is None:
+        return
+    os.makedirs(snapshot_dir, exist_ok=True)
+    manifest = _read_manifest(snapshot_dir)
+    for table in DATA_TABLES if tables is None else [t for t in tables if t in DATA_TABLES]:
+        manifest[table] = write_table_snapshot(conn, table, snapshot_dir)
+    _write_manifest(snapshot_dir, manifest)
+    log.info("✓ Saved columnar snapshot: %s", snapshot_dir)
+
+
+def load_columns(conn: sqlite3.Connection, table: str, columns: List[str]) -> Optional[Dict[str, "np.ndarray"]]:
+    """
+    Memory-map the requested columns of table from the snapshot.
+
+    Returns None (so the caller falls back to SQL) if numpy is missing, no
+    snapshot has been written for this database, or a column isn't numeric.
+    A stale table snapshot is rewritten before being mapped.
+    """
+    if np is None:
+        return None
+    snapshot_dir = snapshot_dir_for(conn)
+    if snapshot_dir is None:
+        return None
+    manifest = _read_manifest(snapshot_dir)
+    if table not in manifest:
+        return None
+
+    if cached_fingerprint(conn, table) != manifest[table]["fingerprint"]:
+        manifest[table] = write_table_snapshot(conn, table, snapshot_dir)
+        _write_manifest(snapshot_dir, manifest)
+
+    if any(col not in manifest[table]["columns"] for col in columns):
+        return None
+    return {col: np.load(os.path.join(snapshot_dir, table, col + ".npy"), mmap_mode="r")
+            for col in columns}
+
+
+def lookup_names(conn: sqlite3.Connection, lookup_table: str) -> Dict[int, str]:
+    """Map every id in a lookup table to its string."""
+    c = conn.cursor()
+    c.execute(f"SELECT id, {LOOKUP_TABLES[lookup_table]} FROM {lookup_table}")
+    return {row[0]: row[1] for row in c.fetchall()}
+
+
+def sort_by_mean_desc(results: List[Tuple]) -> List[Tuple]:
+    """
+    Order (name, mean, ...) rows like the SQL fallbacks' ORDER BY mean DESC,
+    name DESC: NULL means last, ties in reverse name order.
+    """
+    return sorted(results, key=lambda r: (r[1] is not None, r[1], r[0]), reverse=True)
+
+
+def grouped_mean(keys: "np.ndarray", values: "np.ndarray") -> List[Tuple[int, Optional[float], int]]:
+    """
+    SQL-style "GROUP BY key: AVG(value), COUNT(*)" over NumPy arrays.
+
+    Rows with a NULL (NaN) key are dropped. NaN values are ignored by the
+    average, like AVG(); the count includes them, like COUNT(*).
+    Returns (key, avg or None, count) tuples ordered by key.
+    """
+    keys = np.asarray(keys)
+    values = np.asarray(values, dtype="float64")
+    if keys.dtype.kind == "f":
+        keep = ~np.isnan(keys)
+        keys, values = keys[keep].astype("int64"), values[keep]
+    if keys.size == 0:
+        return []
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, minlength=uniq.size)
+    present = ~np.isnan(values)
+    sums = np.bincount(inverse[present], weights=values[present], minlength=uniq.size)
+    n_values = np.bincount(inverse[present], minlength=uniq.size)
+    return [(int(k), float(s / n) if n else None, int(cnt))
+            for k, s, n, cnt in zip(uniq, sums, n_values, counts)]
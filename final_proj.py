@@ -16,9 +16,12 @@ import spotipy
 # Visualization
 import matplotlib.pyplot as plt
 
-# Spotify
+# Spotify (token shared with the modular collectors)
 import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
+from data_collection.spotify_auth import SharedTokenAuth
+
+# Batched existence checks (shared with the modular collectors)
+from database.existence import load_existing_bitmap, load_existing_keys
 
 DB_PATH = "si201_project.db"
 
@@ -30,7 +33,7 @@ SPOTIPY_CLIENT_SECRET = os.getenv("SPOTIPY_CLIENT_SECRET", "2535128eadda464c8890
 # ----------------- Spotify client ------------------------
 spotify_client = None
 if SPOTIPY_CLIENT_ID and SPOTIPY_CLIENT_SECRET:
-    auth_manager = SpotifyClientCredentials(client_id=SPOTIPY_CLIENT_ID, client_secret=SPOTIPY_CLIENT_SECRET)
+    auth_manager = SharedTokenAuth(client_id=SPOTIPY_CLIENT_ID, client_secret=SPOTIPY_CLIENT_SECRET)
     spotify_client = spotipy.Spotify(auth_manager=auth_manager)
 else:
     print("Spotify credentials not set. Skipping Spotify fetch.")
@@ -104,23 +107,15 @@ def create_tables(conn: sqlite3.Connection):
     """)
     conn.commit()
 
-def already_exists(conn: sqlite3.Connection, table: str, where_clause: str, params=()) -> bool:
-    c = conn.cursor()
-    q = f"SELECT 1 FROM {table} WHERE {where_clause} LIMIT 1"
-    c.execute(q, params)
-    return c.fetchone() is not None
-
 # ----------------- PokeAPI functions ------------------------
 POKEAPI_BASE = "https://pokeapi.co/api/v2"
 
 def fetch_pokemon_up_to_limit(conn: sqlite3.Connection, target_new: int = 25, max_id: int = 151):
     inserted = 0
     c = conn.cursor()
-    for pid in range(1, max_id + 1):
+    for pid in load_existing_bitmap(conn, "pokemon", "id", 1, max_id).missing():
         if inserted >= target_new:
             break
-        if already_exists(conn, "pokemon", "id = ?", (pid,)):
-            continue
         url = f"{POKEAPI_BASE}/pokemon/{pid}"
         try:
             resp = requests.get(url, timeout=10)
@@ -284,6 +279,7 @@ def fetch_movies_by_title_list(conn: sqlite3.Connection, title_list: List[str],
         return
     inserted = 0
     c = conn.cursor()
+    known_ids = load_existing_keys(conn, "movies", "imdb_id")
     for title in title_list:
         if inserted >= max_new:
             break
@@ -296,7 +292,7 @@ def fetch_movies_by_title_list(conn: sqlite3.Connection, title_list: List[str],
             if data.get("Response") == "False":
                 continue
             imdb_id = data.get("imdbID")
-            if not imdb_id or already_exists(conn, "movies", "imdb_id = ?", (imdb_id,)):
+            if not imdb_id or imdb_id in known_ids:
                 continue
             title_ret = data.get("Title")
             year = None
@@ -322,6 +318,7 @@ def fetch_movies_by_title_list(conn: sqlite3.Connection, title_list: List[str],
                 VALUES (?, ?, ?, ?, ?, ?, ?)
             """, (imdb_id, title_ret, year, genre, runtime, imdb_rating, box_office))
             conn.commit()
+            known_ids.add(imdb_id)
             inserted += 1
             print(f"[OMDb] Inserted {title_ret} ({inserted}/{max_new})")
             time.sleep(0.2)
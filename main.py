@@ -12,161 +12,406 @@ Ariana wrote functions for OMDB, Weather API
 Kevin wrote functions for Spotipy
 """
 
+import argparse
+from typing import Dict, Optional
+
 # Database imports
+from config.api_keys import (FEDERATED_DB_PATHS, OMDB_API_KEY, OMDB_SEARCH_TERMS, SCHEDULE_INTERVALS,
+                             SCHEDULE_MAX_NEW, SHARD_DIR)
 from database.db_helper import create_connection, create_tables
+from database.columnar_export import export_snapshot, import_snapshot
+from database.federated import open_federated
+from database.sharding import create_shards, open_federation
+from database.snapshot_cache import write_snapshot
 
 # Data collection imports
-from data_collection.pokemon_api import fetch_pokemon_up_to_limit
-from data_collection.spotify_api import fetch_tracks_for_artist_list
-from data_collection.weather_api import fetch_weather_for_cities, CITY_COORDS
-from data_collection.omdb_api import fetch_movies_by_title_list
+from data_collection.pokemon_api import PokemonSource
+from data_collection.spotify_api import SpotifySource, spotify_client
+from data_collection.spotify_enrichment import enrich_spotify
+from data_collection.weather_api import WeatherSource, CITY_COORDS
+from data_collection.omdb_api import OmdbSearchSource, OmdbSource
+from data_collection.input_files import stream_inputs
+from data_collection.sources import run_sources, run_sources_sharded
+from data_collection.pipeline import run_pipeline
+from data_collection.raw_store import replay
+from data_collection.refresh import (refresh_stale_metrics, refresh_track_popularity,
+                                     refresh_movie_ratings, refresh_weather_forecasts)
+from data_collection.scheduler import Job, Scheduler
 
 # Calculation imports
 from calculations.pokemon_calculations import calculate_avg_base_exp_by_type, calculate_pokemon_with_stats_join
 from calculations.spotify_calculations import calculate_avg_popularity_per_artist
 from calculations.weather_calculations import calculate_temp_variability_by_city
 from calculations.movies_calculations import calculate_runtime_rating_correlation
+from calculations.federated_calculations import federated_calculations
 from calculations.file_writer import write_calculations_to_file
+from calculations.result_cache import cache_stats
 
 # Visualization imports
 from visualizations.pokemon_viz import visualize_avg_base_exp_by_type
 from visualizations.spotify_viz import visualize_avg_popularity_per_artist
 from visualizations.weather_viz import visualize_temp_high_low_by_city
 from visualizations.movies_viz import visualize_runtime_vs_rating
+from visualizations.dashboard_server import serve_dashboard
+
+# Instrumentation
+from monitoring.instrumentation import profiling_session, write_summary
+from monitoring.metrics import serve_metrics
+from monitoring.structured_logging import configure_logging, flush_logging, get_logger
+
+
+log = get_logger("main")
+
+
+# Spotify tracks - Expanded to 20 artists to ensure 100+ tracks
+ARTIST_LIST = [
+    # Original 10
+    "Taylor Swift", "Adele", "Drake", "Beyonce", "Ed Sheeran",
+    "Billie Eilish", "The Beatles", "Kanye West", "Kendrick Lamar", "Rihanna",
+    # Added 10 more popular artists
+    "Ariana Grande", "Justin Bieber", "Post Malone", "The Weeknd", "Bruno Mars",
+    "Coldplay", "Eminem", "Lady Gaga", "Dua Lipa", "Harry Styles"
+]
+
+# OMDb movies - Expanded list to reach 100+ for BONUS credit (30 points)
+TITLE_LIST = [
+    # Top rated classics
+    "The Shawshank Redemption", "The Godfather", "The Dark Knight", "Pulp Fiction",
+    "Forrest Gump", "Fight Club", "Inception", "Interstellar", "The Matrix",
+    "Goodfellas", "The Silence of the Lambs", "Saving Private Ryan", "Schindler's List",
+    # Action & Adventure
+    "The Lord of the Rings: The Return of the King", "Gladiator", "The Departed",
+    "The Prestige", "The Lion King", "Back to the Future", "Terminator 2",
+    "Die Hard", "Raiders of the Lost Ark", "Mad Max: Fury Road", "Blade Runner",
+    # Sci-Fi & Fantasy
+    "Star Wars", "The Empire Strikes Back", "Return of the Jedi", "Avatar",
+    "E.T. the Extra-Terrestrial", "Jurassic Park", "The Terminator",
+    "Aliens", "The Thing", "Arrival", "Dune", "Her",
+    # Drama
+    "The Green Mile", "Good Will Hunting", "A Beautiful Mind", "Shawshank Redemption",
+    "12 Angry Men", "Casablanca", "It's a Wonderful Life", "The Sixth Sense",
+    "American Beauty", "Requiem for a Dream", "The Pianist", "Whiplash",
+    # Thrillers & Mystery
+    "Se7en", "Shutter Island", "Gone Girl", "Zodiac", "Memento",
+    "The Usual Suspects", "Prisoners", "No Country for Old Men", "There Will Be Blood",
+    # Comedy
+    "The Big Lebowski", "Groundhog Day", "Superbad", "The Hangover",
+    "Ferris Bueller's Day Off", "Anchorman", "Step Brothers", "Tropic Thunder",
+    # Horror
+    "The Shining", "Get Out", "A Quiet Place", "The Conjuring", "Hereditary",
+    "It", "The Exorcist", "Psycho", "Alien", "Jaws",
+    # Recent Blockbusters
+    "Avengers: Endgame", "Joker", "Parasite", "1917", "Oppenheimer",
+    "Everything Everywhere All at Once", "Top Gun: Maverick", "Spider-Man: No Way Home",
+    "The Batman", "Black Panther", "Wonder Woman", "Deadpool",
+    # More classics
+    "The Godfather Part II", "One Flew Over the Cuckoo's Nest", "Citizen Kane",
+    "Vertigo", "Apocalypse Now", "Taxi Driver", "Raging Bull", "The Graduate",
+    "Chinatown", "2001: A Space Odyssey", "Clockwork Orange", "Full Metal Jacket",
+    # Animated
+    "Toy Story", "Finding Nemo", "Spirited Away", "WALL-E", "Up", "Inside Out",
+    "Coco", "The Incredibles", "Ratatouille", "Shrek", "How to Train Your Dragon",
+    # War & Historical
+    "Dunkirk", "Hacksaw Ridge", "Braveheart", "Black Hawk Down", "Platoon",
+    "Full Metal Jacket", "Inglourious Basterds", "Paths of Glory",
+    # Crime & Gangster
+    "The Irishman", "Casino", "Once Upon a Time in America", "Scarface",
+    "Heat", "Reservoir Dogs", "Snatch", "Lock Stock and Two Smoking Barrels"
+]
 
+REPORT_FILES = {
+    "text": "calculations_output.txt",
+    "csv": "calculations_output.csv",
+    "jsonl": "calculations_output.jsonl",
+    "markdown": "calculations_output.md",
+}
+
+
+def example_run(report_format: str = "text", pipeline: bool = False, sharded: bool = False,
+                discover: bool = False, input_files: Optional[Dict[str, str]] = None):
+    """
+    Main execution function that runs all data collection, calculations, and visualizations.
+
+    Args:
+        report_format: One of REPORT_FILES
+        pipeline: Collect through the staged fetch/parse/write pipeline
+        sharded: Collect into per-source shards (one process each) and run the
+                 calculations over their federation (database/sharding.py)
+        discover: Enumerate Pokemon through the PokeAPI list/type endpoints
+                  (whole national dex) instead of probing ids 1..151, and
+                  movies through OMDb search instead of TITLE_LIST
+        input_files: Optional {"artists" | "titles" | "cities": path} to stream
+                     instead of ARTIST_LIST / TITLE_LIST / CITY_COORDS
+                     (data_collection/input_files.py)
+    """
+    input_files = input_files or {}
+    artists = stream_inputs(input_files["artists"]) if "artists" in input_files else ARTIST_LIST
+    titles = stream_inputs(input_files["titles"]) if "titles" in input_files else TITLE_LIST
+    cities = (stream_inputs(input_files["cities"], fields=["name", "lat", "lon"])
+              if "cities" in input_files else list(CITY_COORDS.keys()))
 
-def example_run():
-    """Main execution function that runs all data collection, calculations, and visualizations."""
     # Initialize database
-    conn = create_connection()
-    create_tables(conn)
+    if sharded:
+        create_shards()
+        conn = open_federation()
+    else:
+        conn = create_connection()
+        create_tables(conn)
 
     # ==================== DATA COLLECTION ====================
-    print("\n" + "=" * 80)
-    print("STARTING DATA COLLECTION")
-    print("=" * 80)
-
-    # Pokémon data collection
-    print("\n[1/4] Fetching Pokemon data...")
-    fetch_pokemon_up_to_limit(conn, target_new=25, max_id=151)
-
-    # Spotify tracks - Expanded to 20 artists to ensure 100+ tracks
-    print("\n[2/4] Fetching Spotify tracks...")
-    artist_list = [
-        # Original 10
-        "Taylor Swift", "Adele", "Drake", "Beyonce", "Ed Sheeran",
-        "Billie Eilish", "The Beatles", "Kanye West", "Kendrick Lamar", "Rihanna",
-        # Added 10 more popular artists
-        "Ariana Grande", "Justin Bieber", "Post Malone", "The Weeknd", "Bruno Mars",
-        "Coldplay", "Eminem", "Lady Gaga", "Dua Lipa", "Harry Styles"
-    ]
-    fetch_tracks_for_artist_list(conn, artist_list, max_new=25)
-
-    # Weather data collection
-    print("\n[3/4] Fetching weather data...")
-    cities = list(CITY_COORDS.keys())
-    fetch_weather_for_cities(conn, cities, max_new_per_run=25)
-
-    # OMDb movies - Expanded list to reach 100+ for BONUS credit (30 points)
-    print("\n[4/4] Fetching movie data...")
-    title_list = [
-        # Top rated classics
-        "The Shawshank Redemption", "The Godfather", "The Dark Knight", "Pulp Fiction",
-        "Forrest Gump", "Fight Club", "Inception", "Interstellar", "The Matrix",
-        "Goodfellas", "The Silence of the Lambs", "Saving Private Ryan", "Schindler's List",
-        # Action & Adventure
-        "The Lord of the Rings: The Return of the King", "Gladiator", "The Departed",
-        "The Prestige", "The Lion King", "Back to the Future", "Terminator 2",
-        "Die Hard", "Raiders of the Lost Ark", "Mad Max: Fury Road", "Blade Runner",
-        # Sci-Fi & Fantasy
-        "Star Wars", "The Empire Strikes Back", "Return of the Jedi", "Avatar",
-        "E.T. the Extra-Terrestrial", "Jurassic Park", "The Terminator",
-        "Aliens", "The Thing", "Arrival", "Dune", "Her",
-        # Drama
-        "The Green Mile", "Good Will Hunting", "A Beautiful Mind", "Shawshank Redemption",
-        "12 Angry Men", "Casablanca", "It's a Wonderful Life", "The Sixth Sense",
-        "American Beauty", "Requiem for a Dream", "The Pianist", "Whiplash",
-        # Thrillers & Mystery
-        "Se7en", "Shutter Island", "Gone Girl", "Zodiac", "Memento",
-        "The Usual Suspects", "Prisoners", "No Country for Old Men", "There Will Be Blood",
-        # Comedy
-        "The Big Lebowski", "Groundhog Day", "Superbad", "The Hangover",
-        "Ferris Bueller's Day Off", "Anchorman", "Step Brothers", "Tropic Thunder",
-        # Horror
-        "The Shining", "Get Out", "A Quiet Place", "The Conjuring", "Hereditary",
-        "It", "The Exorcist", "Psycho", "Alien", "Jaws",
-        # Recent Blockbusters
-        "Avengers: Endgame", "Joker", "Parasite", "1917", "Oppenheimer",
-        "Everything Everywhere All at Once", "Top Gun: Maverick", "Spider-Man: No Way Home",
-        "The Batman", "Black Panther", "Wonder Woman", "Deadpool",
-        # More classics
-        "The Godfather Part II", "One Flew Over the Cuckoo's Nest", "Citizen Kane",
-        "Vertigo", "Apocalypse Now", "Taxi Driver", "Raging Bull", "The Graduate",
-        "Chinatown", "2001: A Space Odyssey", "Clockwork Orange", "Full Metal Jacket",
-        # Animated
-        "Toy Story", "Finding Nemo", "Spirited Away", "WALL-E", "Up", "Inside Out",
-        "Coco", "The Incredibles", "Ratatouille", "Shrek", "How to Train Your Dragon",
-        # War & Historical
-        "Dunkirk", "Hacksaw Ridge", "Braveheart", "Black Hawk Down", "Platoon",
-        "Full Metal Jacket", "Inglourious Basterds", "Paths of Glory",
-        # Crime & Gangster
-        "The Irishman", "Casino", "Once Upon a Time in America", "Scarface",
-        "Heat", "Reservoir Dogs", "Snatch", "Lock Stock and Two Smoking Barrels"
-    ]
-    fetch_movies_by_title_list(conn, title_list, max_new=25)
+    log.info("=" * 80)
+    log.info("STARTING DATA COLLECTION")
+    log.info("=" * 80)
+
+    # All four APIs run concurrently on one event loop (data_collection/sources.py)
+    log.info("Fetching Pokemon, Spotify, weather and movie data...")
+    sources = [PokemonSource(target_new=25, max_id=None if discover else 151, list_discovery=discover),
+               WeatherSource(cities, 25)]
+    if spotify_client is not None:
+        sources.append(SpotifySource(artists, max_new=25))
+    if OMDB_API_KEY:
+        sources.append(OmdbSearchSource(OMDB_SEARCH_TERMS, max_new=25) if discover
+                       else OmdbSource(titles, max_new=25))
+    if sharded:
+        run_sources_sharded(sources)
+    elif pipeline:
+        run_pipeline(conn, sources)
+    else:
+        run_sources(conn, sources)
+
+    # Artist details and audio features for the new tracks, in batch requests
+    if spotify_client is not None:
+        enrich_spotify(conn)
+
+    # Snapshot numeric columns so calculations/visualizations can memory-map them
+    write_snapshot(conn)
 
     # ==================== CALCULATIONS ====================
-    print("\n" + "=" * 80)
-    print("RUNNING CALCULATIONS")
-    print("=" * 80)
+    log.info("=" * 80)
+    log.info("RUNNING CALCULATIONS")
+    log.info("=" * 80)
 
-    print("\n--- Pokémon ---")
-    print("Avg base exp by type:", calculate_avg_base_exp_by_type(conn))
+    log.info("--- Pokémon ---")
+    log.info("Avg base exp by type: %s", calculate_avg_base_exp_by_type(conn))
 
-    print("\n--- Spotify ---")
-    print("Avg track popularity per artist:", calculate_avg_popularity_per_artist(conn))
+    log.info("--- Spotify ---")
+    log.info("Avg track popularity per artist: %s", calculate_avg_popularity_per_artist(conn))
 
-    print("\n--- Weather ---")
-    print("Temperature variability by city:", calculate_temp_variability_by_city(conn))
+    log.info("--- Weather ---")
+    log.info("Temperature variability by city: %s", calculate_temp_variability_by_city(conn))
 
-    print("\n--- Movies ---")
-    print("Runtime vs IMDb rating correlation:", calculate_runtime_rating_correlation(conn))
+    log.info("--- Movies ---")
+    log.info("Runtime vs IMDb rating correlation: %s", calculate_runtime_rating_correlation(conn))
 
-    print("\n--- Pokemon JOIN Query (Top 5) ---")
-    join_results = calculate_pokemon_with_stats_join(conn)
-    for pid, name, ptype, base_exp, hp, attack, defense, speed, total in join_results[:5]:
-        print(f"  {name} ({ptype}): HP={hp}, Atk={attack}, Def={defense}, Spd={speed}, Total={total}")
+    log.info("--- Pokemon JOIN Query (Top 5) ---")
+    join_results = calculate_pokemon_with_stats_join(conn, limit=5)
+    for pid, name, ptype, base_exp, hp, attack, defense, speed, total in join_results:
+        log.info("  %s (%s): HP=%s, Atk=%s, Def=%s, Spd=%s, Total=%s", name, ptype, hp, attack, defense, speed, total)
 
     # Write calculations to file (REQUIRED)
-    print("\n" + "=" * 80)
-    print("WRITING CALCULATIONS TO FILE")
-    print("=" * 80)
-    write_calculations_to_file(conn)
+    log.info("=" * 80)
+    log.info("WRITING CALCULATIONS TO FILE")
+    log.info("=" * 80)
+    write_calculations_to_file(conn, REPORT_FILES[report_format], fmt=report_format)
 
     # ==================== VISUALIZATIONS ====================
-    print("\n" + "=" * 80)
-    print("CREATING VISUALIZATIONS")
-    print("=" * 80)
+    log.info("=" * 80)
+    log.info("CREATING VISUALIZATIONS")
+    log.info("=" * 80)
     visualize_avg_base_exp_by_type(conn)
     visualize_avg_popularity_per_artist(conn)
     visualize_temp_high_low_by_city(conn)
     visualize_runtime_vs_rating(conn)
 
     # ==================== COMPLETION ====================
-    print("\n" + "=" * 80)
-    print("ALL TASKS COMPLETED SUCCESSFULLY!")
-    print("=" * 80)
-    print("\nGenerated files:")
-    print("  - calculations_output.txt")
-    print("  - pokemon_base_exp_by_type.png")
-    print("  - spotify_popularity_by_artist.png")
-    print("  - weather_temperature_by_city.png")
-    print("  - movies_runtime_vs_rating.png")
-    print("\nDatabase: si201_project.db")
-    print("=" * 80)
+    log.info("=" * 80)
+    log.info("ALL TASKS COMPLETED SUCCESSFULLY!")
+    log.info("=" * 80)
+    log.info("Generated files:")
+    log.info("  - %s", REPORT_FILES[report_format])
+    log.info("  - pokemon_base_exp_by_type.png")
+    log.info("  - spotify_popularity_by_artist.png")
+    log.info("  - weather_temperature_by_city.png")
+    log.info("  - movies_runtime_vs_rating.png")
+    log.info("Database: %s", f"{SHARD_DIR}/*.db" if sharded else "si201_project.db")
+    stats = cache_stats()
+    log.info("Calculation cache: %d memory hits, %d disk hits, %d misses (hit rate %.0f%%)",
+             stats["memory_hits"], stats["disk_hits"], stats["misses"], stats["hit_rate"] * 100)
+    write_summary()
+    log.info("=" * 80)
+
+    conn.close()
+
+
+def refresh_run():
+    """Re-poll only stale volatile metrics (popularity, ratings, forecasts)."""
+    conn = create_connection()
+    create_tables(conn)
+
+    log.info("=" * 80)
+    log.info("REFRESHING STALE METRICS")
+    log.info("=" * 80)
+    refresh_stale_metrics(conn)
 
     conn.close()
 
 
+def daemon_run():
+    """
+    Long-running collection: one warm process, each source on its own
+    jittered interval (SCHEDULE_INTERVALS). Stops cleanly on SIGTERM/Ctrl+C.
+    Pokemon are enumerated through the PokeAPI list endpoints, so the
+    weekly job keeps working past the original 151.
+    """
+    conn = create_connection()
+    create_tables(conn)
+    cities = list(CITY_COORDS.keys())
+    hours = 3600
+
+    def weather():
+        run_sources(conn, [WeatherSource(cities, SCHEDULE_MAX_NEW)])
+        refresh_weather_forecasts(conn)
+
+    def movies():
+        run_sources(conn, [OmdbSource(TITLE_LIST, max_new=SCHEDULE_MAX_NEW)])
+        refresh_movie_ratings(conn)
+
+    def spotify_tracks():
+        run_sources(conn, [SpotifySource(ARTIST_LIST, max_new=SCHEDULE_MAX_NEW)])
+        enrich_spotify(conn)
+
+    def pokemon():
+        run_sources(conn, [PokemonSource(target_new=SCHEDULE_MAX_NEW, max_id=None, list_discovery=True)])
+
+    jobs = [Job("weather", SCHEDULE_INTERVALS["weather"] * hours, weather, tables=["weather"])]
+    if spotify_client is not None:
+        jobs.append(Job("spotify_popularity", SCHEDULE_INTERVALS["spotify_popularity"] * hours,
+                        lambda: refresh_track_popularity(conn), tables=["tracks"]))
+        jobs.append(Job("spotify_tracks", SCHEDULE_INTERVALS["spotify_tracks"] * hours, spotify_tracks,
+                        tables=["tracks", "track_artists", "artist_details", "artist_genres", "audio_features"]))
+    if OMDB_API_KEY:
+        jobs.append(Job("movies", SCHEDULE_INTERVALS["movies"] * hours, movies, tables=["movies"]))
+    jobs.append(Job("pokemon", SCHEDULE_INTERVALS["pokemon"] * hours, pokemon, tables=["pokemon", "pokemon_stats"]))
+    # Keep the mmap snapshot current, rewriting only what the job wrote
+    scheduler = Scheduler(jobs, after_job=lambda job: write_snapshot(conn, tables=job.tables))
+    scheduler.install_signal_handlers()
+
+    log.info("=" * 80)
+    log.info("DAEMON MODE (SIGTERM or Ctrl+C to stop)")
+    log.info("=" * 80)
+    try:
+        scheduler.run()
+    finally:
+        conn.close()
+        write_summary()
+        flush_logging()
+
+
+def replay_run(rebuild: bool = False):
+    """Re-parse the raw payload archive into the database (no network)."""
+    conn = create_connection()
+    create_tables(conn)
+    replay(conn, rebuild=rebuild)
+    conn.close()
+
+
+def federated_run():
+    """
+    Run the calculations across every file in FEDERATED_DB_PATHS (read-only,
+    deduplicated; see database/federated.py).
+    """
+    log.info("=" * 80)
+    log.info("FEDERATED CALCULATIONS (%s)", ", ".join(FEDERATED_DB_PATHS))
+    log.info("=" * 80)
+
+    # Aggregates: partial sums per file in parallel, merged here
+    results = federated_calculations()
+    log.info("--- Pokémon ---")
+    log.info("Avg base exp by type: %s", results["avg_base_exp_by_type"])
+    log.info("--- Spotify ---")
+    log.info("Avg track popularity per artist: %s", results["avg_popularity_per_artist"])
+    log.info("--- Weather ---")
+    log.info("Temperature variability by city: %s", results["temp_variability_by_city"])
+    log.info("--- Movies ---")
+    log.info("Runtime vs IMDb rating correlation: %s", results["runtime_rating_correlation"])
+
+    # Row-level queries go through the deduplicating views
+    conn = open_federated()
+    log.info("--- Pokemon JOIN Query (Top 5) ---")
+    for pid, name, ptype, base_exp, hp, attack, defense, speed, total in calculate_pokemon_with_stats_join(conn, 5):
+        log.info("  %s (%s): HP=%s, Atk=%s, Def=%s, Spd=%s, Total=%s", name, ptype, hp, attack, defense, speed, total)
+    conn.close()
+    write_summary()
+
+
+def export_run(out_dir: str, fmt: str, resolve_lookups: bool):
+    """Export every table to Parquet/Arrow files in out_dir."""
+    conn = create_connection()
+    export_snapshot(conn, out_dir, fmt=fmt, resolve_lookups=resolve_lookups)
+    conn.close()
+
+
+def import_run(in_dir: str):
+    """Bulk-load a Parquet/Arrow snapshot into the database."""
+    conn = create_connection()
+    create_tables(conn)
+    import_snapshot(conn, in_dir)
+    conn.close()
+
+
 if __name__ == "__main__":
-    example_run()
+    parser = argparse.ArgumentParser(description="SI 201 Final Project pipeline")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--refresh", action="store_true", help="re-poll stale popularity, ratings and forecasts")
+    mode.add_argument("--export", metavar="DIR", help="export all tables to columnar files in DIR")
+    mode.add_argument("--import", dest="import_dir", metavar="DIR", help="bulk-load a columnar snapshot from DIR")
+    mode.add_argument("--daemon", action="store_true", help="keep collecting on per-source schedules")
+    mode.add_argument("--replay", action="store_true", help="re-parse archived raw payloads (no network)")
+    mode.add_argument("--serve", action="store_true", help="run the local chart dashboard")
+    mode.add_argument("--federated", action="store_true",
+                      help="run the calculations across all shipped database files")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="with --replay: clear the replayed sources' tables so every row is re-derived")
+    parser.add_argument("--port", type=int, default=8000, help="dashboard port")
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet", help="export file format")
+    parser.add_argument("--report-format", choices=list(REPORT_FILES), default="text",
+                        help="format of the calculations report")
+    parser.add_argument("--resolve-lookups", action="store_true", help="export lookup strings instead of IDs")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="collect through the staged fetch/parse/write pipeline")
+    parser.add_argument("--sharded", action="store_true",
+                        help="collect into per-source shard files, one process per source")
+    parser.add_argument("--discover", action="store_true",
+                        help="enumerate Pokemon and movies via list/search endpoints instead of fixed ids/titles")
+    parser.add_argument("--artists", metavar="FILE", help="stream artist names from a .csv/.jsonl/.txt(.gz) file")
+    parser.add_argument("--titles", metavar="FILE", help="stream movie titles from a .csv/.jsonl/.txt(.gz) file")
+    parser.add_argument("--cities", metavar="FILE",
+                        help="stream cities (name, lat, lon columns) from a .csv/.jsonl(.gz) file")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this port while running")
+    parser.add_argument("--profile", choices=["cprofile", "tracemalloc"],
+                        help="capture a cProfile or tracemalloc report (also: SI201_PROFILE)")
+    args = parser.parse_args()
+    configure_logging()
+
+    if args.metrics_port:
+        serve_metrics(port=args.metrics_port)
+
+    if args.refresh:
+        refresh_run()
+    elif args.export:
+        export_run(args.export, args.format, args.resolve_lookups)
+    elif args.import_dir:
+        import_run(args.import_dir)
+    elif args.replay:
+        replay_run(args.rebuild)
+    elif args.daemon:
+        daemon_run()
+    elif args.federated:
+        federated_run()
+    elif args.serve:
+        serve_dashboard(port=args.port)
+    else:
+        with profiling_session(args.profile):
+            input_files = {name: path for name, path in
+                           (("artists", args.artists), ("titles", args.titles), ("cities", args.cities)) if path}
+            example_run(args.report_format, args.pipeline, args.sharded, args.discover, input_files)
@@ -0,0 +1,240 @@
+"""
+Hot-path instrumentation
+
+Lightweight timers that answer "where did the run spend its time?":
+  - timed(name)       context manager AND decorator, records wall time
+  - throttle(src, s)  time.sleep() that is recorded as sleep.<src>
+  - InstrumentedConnection / InstrumentedCursor
+                      sqlite3 subclasses that time every execute,
+                      executemany and commit (used by create_connection)
+
+Every measurement goes into a named Histogram. summary() returns count,
+total, mean, p50, p95, p99 and max per name, and write_summary() saves it
+as JSON (main.py does this at the end of example_run).
+
+Metric names used across the project:
+  http.<host>              one HTTP call (PokeAPI, Spotify, Weather.gov, OMDb)
+  sleep.<source>           rate-limit pauses in the collectors
+  db.execute / db.executemany / db.commit
+  db.get_or_create_lookup_id
+  calc.<function>          each calculation (cache hits included)
+  render.<file>            each savefig
+
+PROFILING:
+Set SI201_PROFILE=cprofile or SI201_PROFILE=tracemalloc (or pass --profile to
+main.py) to wrap the run in profiling_session(), which writes profile.pstats
+or tracemalloc_top.json next to the summary.
+
+http.* and db.commit timings are also forwarded to the Prometheus metrics in
+monitoring/metrics.py.
+
+Set SI201_INSTRUMENT=0 to turn all timers into no-ops.
+"""
+import contextlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+from monitoring.metrics import observe_timing
+from monitoring.structured_logging import get_logger
+
+
+log = get_logger("instrumentation")
+
+ENABLED = os.getenv("SI201_INSTRUMENT", "1") == "1"
+MAX_SAMPLES = 10000
+
+
+class Histogram:
+    """
+    Latency samples for one metric name.
+
+    Keeps every sample up to MAX_SAMPLES, then switches to reservoir sampling
+    so memory stays bounded; count/total/max stay exact.
+    """
+
+    __slots__ = ("count", "total", "max", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: List[float] = []
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(value)
+        else:
+            slot = random.randrange(self.count)
+            if slot < MAX_SAMPLES:
+                self.samples[slot] = value
+
+    def percentile(self, pct: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "total_s": self.total,
+            "mean_s": self.total / self.count if self.count else 0.0,
+            "p50_s": self.percentile(50),
+            "p95_s": self.percentile(95),
+            "p99_s": self.percentile(99),
+            "max_s": self.max,
+        }
+
+
+_histograms: Dict[str, Histogram] = {}
+_lock = threading.Lock()
+
+
+def record(name: str, seconds: float):
+    """Add one measurement to the named histogram."""
+    if not ENABLED:
+        return
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.add(seconds)
+    observe_timing(name, seconds)
+
+
+class timed(contextlib.ContextDecorator):
+    """
+    Time a block or a function.
+
+    Example:
+        with timed("http.pokeapi.co"):
+            resp = requests.get(url, timeout=10)
+
+        @timed("db.get_or_create_lookup_id")
+        def get_or_create_lookup_id(...): ...
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._local = threading.local()
+
+    def __enter__(self):
+        self._local.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self._local.start)
+        return False
+
+
+def throttle(source: str, seconds: float):
+    """Rate-limit pause that shows up as sleep.<source> in the summary."""
+    start = time.perf_counter()
+    time.sleep(seconds)
+    record(f"sleep.{source}", time.perf_counter() - start)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times execute() and executemany()."""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record("db.execute", time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record("db.executemany", time.perf_counter() - start)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors are InstrumentedCursors and whose commits are timed."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            record("db.commit", time.perf_counter() - start)
+
+
+def summary() -> Dict[str, Dict[str, float]]:
+    """Per-metric count/total/mean/p50/p95/p99/max, sorted by name."""
+    with _lock:
+        return {name: _histograms[name].summary() for name in sorted(_histograms)}
+
+
+def write_summary(path: str = "instrumentation_summary.json") -> str:
+    """Save summary() as JSON and return the path."""
+    with open(path, "w") as f:
+        json.dump(summary(), f, indent=2)
+    log.info("✓ Saved instrumentation summary: %s", path)
+    return path
+
+
+def reset():
+    """Forget all measurements."""
+    with _lock:
+        _histograms.clear()
+
+
+@contextlib.contextmanager
+def profiling_session(mode: Optional[str] = None, out_dir: str = "."):
+    """
+    Optionally profile the wrapped block.
+
+    Args:
+        mode: "cprofile", "tracemalloc" or None (defaults to $SI201_PROFILE)
+        out_dir: Where profile.pstats / tracemalloc_top.json are written
+    """
+    mode = mode or os.getenv("SI201_PROFILE")
+    if mode == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            path = os.path.join(out_dir, "profile.pstats")
+            profiler.dump_stats(path)
+            log.info("✓ Saved cProfile stats: %s", path)
+    elif mode == "tracemalloc":
+        import tracemalloc
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            top = [{"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                   for stat in snapshot.statistics("lineno")[:25]]
+            path = os.path.join(out_dir, "tracemalloc_top.json")
+            with open(path, "w") as f:
+                json.dump({"current_bytes": current, "peak_bytes": peak, "top": top}, f, indent=2)
+            log.info("✓ Saved tracemalloc report: %s", path)
+    else:
+        yield
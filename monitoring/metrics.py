@@ -0,0 +1,301 @@
+"""
+Prometheus-style metrics
+
+A small in-process registry of counters, gauges and histograms with
+labels, rendered in the Prometheus text exposition format (version 0.0.4).
+No client library needed - serve_metrics() exposes REGISTRY on
+http://<host>:<port>/metrics from a background thread, and the dashboard
+server answers /metrics too.
+
+Metrics used across the project:
+  si201_rows_inserted_total{table}            rows written by the collectors
+  si201_lookup_requests_total{table,result}   get_or_create_lookup_id hit/miss
+  si201_dedupe_checks_total{table,result}     pre-insert duplicate checks (new/duplicate/false_positive)
+  si201_http_request_seconds{host}            every timed("http.<host>") block
+  si201_http_retries_total{host}              retried HTTP requests
+  si201_db_commit_seconds                     every commit on an instrumented connection
+  si201_queue_depth{queue}                    current size of internal queues
+  si201_pipeline_items_total{stage,source}    throughput of each ingest pipeline stage
+  si201_auth_token_requests_total{host}       OAuth token requests (shared token cache misses)
+  si201_job_runs_total{job,status}            daemon-mode job runs
+  si201_job_seconds{job}                      daemon-mode job duration
+
+Timing metrics are fed from monitoring/instrumentation.py (record() calls
+observe_timing()), so anything already wrapped in timed() shows up here.
+
+Example:
+    from monitoring.metrics import ROWS_INSERTED
+    ROWS_INSERTED.inc(table="pokemon")
+"""
+import bisect
+import logging
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Plain logging.getLogger: structured_logging imports this module
+log = logging.getLogger("si201.metrics")
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple = ()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down. Either set() it, or register a callback
+    with track() that is read at scrape time (used for queue depths).
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def track(self, fn: Callable[[], float], **labels):
+        """Report fn() as this gauge's value at scrape time."""
+        with self._lock:
+            self._functions[self._key(labels)] = fn
+
+    def untrack(self, **labels):
+        with self._lock:
+            self._functions.pop(self._key(labels), None)
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        with self._lock:
+            fn = self._functions.get(key)
+            return fn() if fn else self._values.get(key, 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, fn in functions.items():
+            try:
+                values[key] = fn()
+            except Exception:
+                continue
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}"
+                for key, v in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram (Prometheus semantics: _bucket, _sum, _count)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # key -> [per-bucket counts, sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry[2] if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(e[0]), e[1], e[2])) for key, e in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                labels = _format_labels(self.label_names, key, (("le", _format_value(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Holds metrics by name and renders them all for /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+ROWS_INSERTED = REGISTRY.counter("si201_rows_inserted_total", "Rows inserted by the collectors", ["table"])
+LOOKUP_REQUESTS = REGISTRY.counter("si201_lookup_requests_total",
+                                   "get_or_create_lookup_id calls (hit = string already interned)",
+                                   ["table", "result"])
+DEDUPE_CHECKS = REGISTRY.counter("si201_dedupe_checks_total",
+                                 "Rows checked against the in-process Bloom filter before insert",
+                                 ["table", "result"])
+HTTP_SECONDS = REGISTRY.histogram("si201_http_request_seconds", "HTTP request latency", ["host"])
+HTTP_RETRIES = REGISTRY.counter("si201_http_retries_total", "HTTP requests that were retried", ["host"])
+DB_COMMIT_SECONDS = REGISTRY.histogram("si201_db_commit_seconds", "SQLite commit latency")
+QUEUE_DEPTH = REGISTRY.gauge("si201_queue_depth", "Items waiting in internal queues", ["queue"])
+PIPELINE_ITEMS = REGISTRY.counter("si201_pipeline_items_total",
+                                  "Items through each pipeline stage (fetch/parse: payloads, write: new rows)",
+                                  ["stage", "source"])
+AUTH_TOKENS = REGISTRY.counter("si201_auth_token_requests_total", "Access tokens requested from an auth server",
+                               ["host"])
+JOB_RUNS = REGISTRY.counter("si201_job_runs_total", "Scheduled job runs (daemon mode)", ["job", "status"])
+JOB_SECONDS = REGISTRY.histogram("si201_job_seconds", "Scheduled job duration", ["job"],
+                                 buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800))
+
+
+def observe_timing(name: str, seconds: float):
+    """Map an instrumentation timer name onto the matching Prometheus metric."""
+    if name.startswith("http."):
+        HTTP_SECONDS.observe(seconds, host=name[len("http."):])
+    elif name == "db.commit":
+        DB_COMMIT_SECONDS.observe(seconds)
+
+
+def make_metrics_handler(registry: Registry = REGISTRY):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0].rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return MetricsHandler
+
+
+def serve_metrics(host: str = "127.0.0.1", port: int = 9201,
+                  registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """
+    Serve /metrics from a daemon thread and return the server
+    (call server.shutdown() to stop it).
+    """
+    server = ThreadingHTTPServer((host, port), make_metrics_handler(registry))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    log.info("✓ Metrics at http://%s:%d/metrics", host, server.server_address[1])
+    return server
@@ -0,0 +1,198 @@
+"""
+Structured, non-blocking logging
+
+Collectors used to print() one line per inserted row. Terminal I/O is
+synchronous, so at high row rates the prints themselves slowed ingest down.
+Every module now logs through get_logger(), and:
+
+  - callers only enqueue records (QueueHandler); a single QueueListener
+    thread does the actual formatting and writing
+  - per-row events ("[PokeAPI] Inserted ...") are DEBUG, so they cost one
+    level check unless DEBUG is switched on
+  - humans see INFO lines plus a sampled progress bar (Progress), at most
+    one update every PROGRESS_INTERVAL seconds
+  - machines get JSON lines (one object per record, extra= fields included)
+    in LOG_JSON_PATH
+
+Importing a module never touches logging configuration: the entry point
+(main.py) calls configure_logging() once. Until then "si201" records
+propagate to the root logger like any library's would.
+
+Settings (config/api_keys.py):
+  SI201_LOG_LEVEL   level written to the JSON log (default INFO; DEBUG adds per-row events)
+  SI201_LOG_JSON    JSON-lines file (default pipeline_log.jsonl, empty to disable)
+  SI201_LOG_CONSOLE console level (default INFO)
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from typing import Optional
+from config.api_keys import LOG_CONSOLE_LEVEL, LOG_JSON_PATH, LOG_LEVEL
+from monitoring.metrics import QUEUE_DEPTH
+
+
+ROOT_LOGGER = "si201"
+PROGRESS_INTERVAL = 0.5
+BAR_WIDTH = 20
+
+# Attributes every LogRecord has; anything else came from extra=
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, message and any extra= fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS:
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: Optional[str] = None, json_path: Optional[str] = None,
+                      console_level: Optional[str] = None):
+    """
+    Install the queue handler on the "si201" logger and start the listener.
+    Safe to call more than once; later calls replace the earlier setup.
+
+    Args:
+        level: JSON log level (default LOG_LEVEL)
+        json_path: JSON-lines output file, "" to disable (default LOG_JSON_PATH)
+        console_level: Console level (default LOG_CONSOLE_LEVEL)
+    """
+    shutdown_logging()
+
+    level = logging.getLevelName((level or LOG_LEVEL).upper())
+    console_level = logging.getLevelName((console_level or LOG_CONSOLE_LEVEL).upper())
+    json_path = LOG_JSON_PATH if json_path is None else json_path
+
+    handlers = []
+    console = logging.StreamHandler(sys.stdout)
+    console.setLevel(console_level)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    handlers.append(console)
+    effective = console_level
+    if json_path:
+        json_file = logging.FileHandler(json_path, mode="a", encoding="utf-8", delay=True)
+        json_file.setLevel(level)
+        json_file.setFormatter(JsonLinesFormatter())
+        handlers.append(json_file)
+        effective = min(effective, level)
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(effective)
+    root.propagate = False
+    _start_listener(handlers)
+
+
+def _start_listener(handlers):
+    """Route "si201" records through a new queue to a listener thread writing to handlers."""
+    global _listener
+    root = logging.getLogger(ROOT_LOGGER)
+    root.handlers.clear()
+    records: "queue.SimpleQueue" = queue.SimpleQueue()
+    root.addHandler(logging.handlers.QueueHandler(records))
+    QUEUE_DEPTH.track(records.qsize, queue="logging")
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def _restart_listener_after_fork():
+    """
+    The listener thread does not survive fork(); start a new one in the
+    child, on a fresh queue. The inherited copy of the parent's queue may
+    still hold records the parent writes itself, so it is dropped.
+    """
+    if _listener is not None:
+        _start_listener(_listener.handlers)
+
+
+def flush_logging():
+    """
+    Block until every queued record has been written. Call before switching
+    back to plain print() output so lines come out in order.
+    """
+    if _listener is not None:
+        _listener.stop()
+        _listener.start()
+
+
+# Flush first, so the child inherits an empty queue and the output stays in order
+os.register_at_fork(before=flush_logging, after_in_child=_restart_listener_after_fork)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under "si201" (e.g. get_logger("pokeapi")); see configure_logging()."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+class Progress:
+    """
+    Sampled progress bar for a collector run.
+
+    Example:
+        progress = Progress(log, "PokeAPI", total=25)
+        for ...:
+            progress.update(inserted)
+        progress.done(inserted)
+
+    Prints e.g. "[PokeAPI] [########------------] 10/25 (6.2 rows/s)" at most
+    once per PROGRESS_INTERVAL seconds, however fast update() is called.
+    """
+
+    def __init__(self, logger: logging.Logger, label: str, total: int,
+                 interval: float = PROGRESS_INTERVAL):
+        self.logger = logger
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.start = time.perf_counter()
+        self._last = 0.0
+        self._shown = None
+
+    def update(self, done: int):
+        now = time.perf_counter()
+        if now - self._last >= self.interval:
+            self._last = now
+            self._emit(done, now)
+
+    def done(self, done: int):
+        if done != self._shown:
+            self._emit(done, time.perf_counter())
+
+    def _emit(self, done: int, now: float):
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        self._shown = done
+        filled = min(BAR_WIDTH, BAR_WIDTH * done // self.total) if self.total else BAR_WIDTH
+        rate = done / (now - self.start) if now > self.start else 0.0
+        self.logger.info("[%s] [%s%s] %d/%d (%.1f rows/s)", self.label, "#" * filled,
+                         "-" * (BAR_WIDTH - filled), done, self.total, rate,
+                         extra={"event": "progress", "done": done, "total": self.total,
+                                "rows_per_s": round(rate, 2)})
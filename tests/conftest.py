@@ -0,0 +1,85 @@
+"""
+Shared fixtures for the test suite.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Tests must not archive payloads into ./raw_payloads or share the real token cache
+os.environ.setdefault("SI201_RAW_STORE", "0")
+
+from data_collection.sources import Source  # noqa: E402
+from database.db_helper import create_connection, create_tables  # noqa: E402
+
+
+class CountingSource(Source):
+    """Pokemon rows 1..n without any HTTP."""
+
+    name = "Counting"
+    host = "test.invalid"
+    table = "pokemon"
+    columns = ("id", "name")
+
+    def __init__(self, n: int):
+        super().__init__(max_new=n)
+        self.n = n
+
+    def discover(self, conn):
+        return range(1, self.n + 1)
+
+    async def fetch(self, item):
+        return item
+
+    def parse(self, item):
+        return [{"id": item, "name": f"mon{item}"}]
+
+
+@pytest.fixture
+def make_db(tmp_path):
+    """Factory for fresh create_tables() databases under tmp_path."""
+    conns = []
+
+    def make(name: str = "si201_project.db"):
+        conn = create_connection(str(tmp_path / name))
+        create_tables(conn)
+        conns.append(conn)
+        return conn
+
+    yield make
+    for conn in conns:
+        conn.close()
+
+
+@pytest.fixture
+def db(make_db):
+    """One fresh database connection."""
+    return make_db()
+
+
+@pytest.fixture
+def limiters(monkeypatch):
+    """Every HostLimiter created during the test, each counting how often it was entered."""
+    import data_collection.sources as sources
+
+    instances = []
+
+    class CountingLimiter(sources.HostLimiter):
+        def __init__(self, host):
+            super().__init__(host)
+            self.entered = 0
+            instances.append(self)
+
+        async def __aenter__(self):
+            self.entered += 1
+            return await super().__aenter__()
+
+    monkeypatch.setattr(sources, "HostLimiter", CountingLimiter)
+    return instances
@@ -0,0 +1,79 @@
+import pytest
+
+from database.db_helper import get_or_create_lookup_id
+
+pytest.importorskip("pyarrow")
+from database.columnar_export import export_snapshot, import_snapshot  # noqa: E402
+
+
+def _pokemon_type(conn, name):
+    return conn.execute("""
+        SELECT t.type_name FROM pokemon p INNER JOIN types_lookup t ON t.id = p.type_id WHERE p.name = ?
+    """, (name,)).fetchone()[0]
+
+
+def _track_artists(conn, title):
+    return [row[0] for row in conn.execute("""
+        SELECT s.spotify_id FROM tracks t
+        INNER JOIN track_artists ta ON ta.track_id = t.track_id
+        INNER JOIN spotify_ids_lookup s ON s.id = ta.artist_ref
+        WHERE t.title = ? ORDER BY ta.position
+    """, (title,))]
+
+
+def _fill_source(conn):
+    grass = get_or_create_lookup_id(conn, "types_lookup", "type_name", "grass")
+    conn.execute("INSERT INTO pokemon (id, name, base_experience, height, weight, type_id) "
+                 "VALUES (1, 'bulbasaur', 64, 7, 69, ?)", (grass,))
+    artist = get_or_create_lookup_id(conn, "artists_lookup", "artist_name", "Source Artist")
+    ref = get_or_create_lookup_id(conn, "spotify_ids_lookup", "spotify_id", "srcArtist")
+    conn.execute("INSERT INTO tracks (track_id, title, artist_id, popularity) VALUES (1, 'Source Song', ?, 50)",
+                 (artist,))
+    conn.execute("INSERT INTO track_artists (track_id, artist_ref, position) VALUES (1, ?, 0)", (ref,))
+    conn.execute("UPDATE tracks SET popularity = 60 WHERE track_id = 1")  # one tracks_history row
+    conn.commit()
+
+
+def _fill_target(conn):
+    # Different strings and rows at the same ids the source uses
+    dragon = get_or_create_lookup_id(conn, "types_lookup", "type_name", "dragon")
+    conn.execute("INSERT INTO pokemon (id, name, base_experience, height, weight, type_id) "
+                 "VALUES (149, 'dragonite', 270, 22, 2100, ?)", (dragon,))
+    artist = get_or_create_lookup_id(conn, "artists_lookup", "artist_name", "Target Artist")
+    ref = get_or_create_lookup_id(conn, "spotify_ids_lookup", "spotify_id", "tgtArtist")
+    conn.execute("INSERT INTO tracks (track_id, title, artist_id, popularity) VALUES (1, 'Target Song', ?, 10)",
+                 (artist,))
+    conn.execute("INSERT INTO track_artists (track_id, artist_ref, position) VALUES (1, ?, 0)", (ref,))
+    conn.commit()
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+@pytest.mark.parametrize("resolve_lookups", [False, True])
+def test_import_into_non_empty_database_remaps_ids(make_db, tmp_path, fmt, resolve_lookups):
+    source, target = make_db("source.db"), make_db("target.db")
+    _fill_source(source)
+    _fill_target(target)
+
+    export_snapshot(source, str(tmp_path / "snap"), fmt=fmt, resolve_lookups=resolve_lookups)
+    import_snapshot(target, str(tmp_path / "snap"))
+
+    assert _pokemon_type(target, "bulbasaur") == "grass"
+    assert _pokemon_type(target, "dragonite") == "dragon"
+    assert _track_artists(target, "Source Song") == ["srcArtist"]
+    assert _track_artists(target, "Target Song") == ["tgtArtist"]
+    source_track = target.execute("SELECT track_id FROM tracks WHERE title = 'Source Song'").fetchone()[0]
+    history = target.execute("SELECT track_id, old_popularity, new_popularity FROM tracks_history").fetchall()
+    assert [tuple(row) for row in history] == [(source_track, 50, 60)]
+
+
+def test_import_is_idempotent(make_db, tmp_path):
+    source, target = make_db("source.db"), make_db("target.db")
+    _fill_source(source)
+    export_snapshot(source, str(tmp_path / "snap"))
+
+    import_snapshot(target, str(tmp_path / "snap"))
+    import_snapshot(target, str(tmp_path / "snap"))
+
+    for table in ("pokemon", "tracks", "track_artists", "tracks_history", "types_lookup"):
+        assert target.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == \
+            source.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0], table
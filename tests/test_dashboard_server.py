@@ -0,0 +1,77 @@
+import http.client
+import socket
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from visualizations.dashboard_server import DashboardData, EventBroadcaster, make_handler
+
+
+@pytest.fixture
+def server(db, tmp_path):
+    data = DashboardData(str(tmp_path / "si201_project.db"))
+    events = EventBroadcaster(data, poll_seconds=0.05, max_clients=2)
+    events.start()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(data, events))
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address[1], events
+    httpd.shutdown()
+    events.stop()
+    httpd.server_close()
+    data.conn.close()
+
+
+def open_stream(port):
+    sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+    sock.sendall(b"GET /api/events HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    received = b""
+    while b"event: update" not in received:
+        received += sock.recv(4096)
+    return sock
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_one_broadcaster_feeds_every_client(server):
+    port, events = server
+    before = threading.active_count()
+    clients = [open_stream(port) for _ in range(2)]
+    assert events.client_count() == 2
+    # Only the two request threads were added; no per-client poller
+    assert threading.active_count() - before == 2
+    for sock in clients:
+        sock.settimeout(5)
+        assert b"keep-alive" in sock.recv(4096)
+        sock.close()
+
+
+def test_closed_clients_are_dropped(server):
+    port, events = server
+    sock = open_stream(port)
+    assert events.client_count() == 1
+    sock.shutdown(socket.SHUT_RDWR)
+    sock.close()
+    assert wait_for(lambda: events.client_count() == 0)
+
+
+def test_clients_beyond_the_cap_are_refused(server):
+    port, events = server
+    clients = [open_stream(port) for _ in range(2)]
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", "/api/events")
+    assert conn.getresponse().status == 503
+    conn.close()
+    for sock in clients:
+        sock.close()
+    assert wait_for(lambda: events.client_count() == 0)
@@ -0,0 +1,100 @@
+import sqlite3
+
+import pytest
+
+from database.db_helper import create_connection, create_tables
+from database.sharding import create_shards, shard_path
+
+
+def lookup(conn, table):
+    return {name for (name,) in conn.execute(f"SELECT genre_name FROM {table}")}
+
+
+def test_artist_genres_are_kept_apart_from_movie_genres(db):
+    enrichment = pytest.importorskip("data_collection.spotify_enrichment")
+
+    class FakeClient:
+        def artists(self, ids):
+            return {"artists": [{"id": i, "name": "Band", "genres": ["drama", "k-pop"]} for i in ids]}
+
+    db.execute("INSERT INTO genres_lookup (genre_name) VALUES ('Drama')")
+    db.execute("INSERT INTO spotify_ids_lookup (spotify_id) VALUES ('artist1')")
+    db.execute("INSERT INTO track_artists (track_id, artist_ref, position) VALUES (1, 1, 0)")
+    db.commit()
+
+    assert enrichment.enrich_artists(db, client=FakeClient())["artists"] == 1
+    assert lookup(db, "genres_lookup") == {"Drama"}
+    assert lookup(db, "artist_genres_lookup") == {"drama", "k-pop"}
+    rows = db.execute("""
+        SELECT l.genre_name FROM artist_genres ag
+        INNER JOIN artist_genres_lookup l ON l.id = ag.genre_id
+    """).fetchall()
+    assert sorted(r[0] for r in rows) == ["drama", "k-pop"]
+
+
+def test_old_artist_genres_move_out_of_genres_lookup(tmp_path):
+    conn = create_connection(str(tmp_path / "old.db"))
+    create_tables(conn)
+    # The schema before artist_genres_lookup existed
+    conn.execute("DROP TABLE artist_genres")
+    conn.execute("""
+        CREATE TABLE artist_genres (
+            artist_ref INTEGER NOT NULL,
+            genre_id INTEGER NOT NULL,
+            PRIMARY KEY(artist_ref, genre_id),
+            FOREIGN KEY(artist_ref) REFERENCES spotify_ids_lookup(id),
+            FOREIGN KEY(genre_id) REFERENCES genres_lookup(id)
+        )
+    """)
+    conn.executemany("INSERT INTO genres_lookup (id, genre_name) VALUES (?, ?)",
+                     [(1, "Drama"), (2, "k-pop"), (3, "indie")])
+    conn.execute("INSERT INTO movies (imdb_id, genre_id) VALUES ('tt1', 1)")
+    conn.executemany("INSERT INTO artist_genres VALUES (?, ?)", [(10, 1), (10, 2), (11, 3)])
+    conn.commit()
+
+    create_tables(conn)
+    create_tables(conn)  # a second run has nothing left to move
+
+    # "Drama" is still used by a movie, the Spotify-only strings are gone
+    assert lookup(conn, "genres_lookup") == {"Drama"}
+    assert lookup(conn, "artist_genres_lookup") == {"Drama", "k-pop", "indie"}
+    rows = conn.execute("""
+        SELECT ag.artist_ref, l.genre_name FROM artist_genres ag
+        INNER JOIN artist_genres_lookup l ON l.id = ag.genre_id
+        ORDER BY ag.artist_ref, l.genre_name
+    """).fetchall()
+    assert [tuple(r) for r in rows] == [(10, "Drama"), (10, "k-pop"), (11, "indie")]
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'artist_genres_old'").fetchone()[0] == 0
+    conn.close()
+
+
+def test_create_shards_adds_missing_lookup_tables(tmp_path):
+    shard_dir = str(tmp_path / "shards")
+    create_shards(shard_dir)
+    lookups = sqlite3.connect(shard_path("lookups", shard_dir))
+    lookups.execute("INSERT INTO genres_lookup (genre_name) VALUES ('Drama')")
+    lookups.execute("DROP TABLE artist_genres_lookup")
+    lookups.commit()
+    lookups.close()
+
+    create_shards(shard_dir)
+    lookups = sqlite3.connect(shard_path("lookups", shard_dir))
+    names = {row[0] for row in lookups.execute("SELECT name FROM sqlite_master")}
+    assert "artist_genres_lookup" in names
+    assert lookups.execute("SELECT genre_name FROM genres_lookup").fetchall() == [("Drama",)]
+    lookups.close()
+
+
+def test_create_shards_adds_missing_columns(tmp_path):
+    shard_dir = str(tmp_path / "shards")
+    create_shards(shard_dir)
+    lookups = sqlite3.connect(shard_path("lookups", shard_dir))
+    lookups.execute("ALTER TABLE cities_lookup DROP COLUMN latitude")
+    lookups.commit()
+    lookups.close()
+
+    create_shards(shard_dir)
+    lookups = sqlite3.connect(shard_path("lookups", shard_dir))
+    columns = [row[1] for row in lookups.execute("PRAGMA table_info(cities_lookup)")]
+    assert "latitude" in columns and "longitude" in columns
+    lookups.close()
@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+
+from calculations.file_writer import Column, Section, write_calculations_to_file
+
+
+def many_rows(conn):
+    for i in range(10_000):
+        yield (i, float(i))
+
+
+def bad_row(conn):
+    yield ("x", "not a number")
+
+
+SECTIONS = [
+    Section("many", "Many rows", [Column("N", 8), Column("Value", 12, ".2f")], many_rows),
+    Section("bad", "Unformattable", [Column("Name", 8), Column("Value", 12, ".2f")], bad_row),
+    Section("more", "More rows", [Column("N", 8), Column("Value", 12, ".2f")], many_rows),
+]
+
+
+def test_none_values_are_left_blank_in_text(db, tmp_path):
+    sections = [Section("avg", "Averages", [Column("Type", 8), Column("Avg", 10, ".2f")],
+                        lambda conn: [("fire", 1.5), ("ghost", None)]),
+                Section("corr", "Correlation", [Column("Correlation", 0, ".6f")],
+                        lambda conn: [(None,)], layout="key_value")]
+    path = tmp_path / "report.txt"
+    write_calculations_to_file(db, str(path), sections=sections)
+
+    lines = path.read_text().splitlines()
+    assert "fire     1.50      " in lines
+    assert "ghost              " in lines
+    assert "Correlation: " in lines
+
+
+def test_writer_error_stops_and_joins_the_producers(db, tmp_path):
+    before = threading.active_count()
+    with pytest.raises(ValueError):
+        write_calculations_to_file(db, str(tmp_path / "report.txt"), sections=SECTIONS, queue_size=2)
+    # Without the stop flag the "more" producer stays blocked on its full queue
+    assert threading.active_count() == before
@@ -0,0 +1,85 @@
+import urllib.request
+
+import pytest
+
+from database.db_helper import get_or_create_lookup_ids
+from monitoring.metrics import CONTENT_TYPE, REGISTRY, Registry, serve_metrics
+
+
+def scrape(registry):
+    server = serve_metrics(port=0, registry=registry)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as resp:
+            assert resp.headers["Content-Type"] == CONTENT_TYPE
+            return resp.read().decode().splitlines()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def sample(lines, name):
+    """Value of the sample line starting with name (labels included), or None."""
+    for line in lines:
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_counter_and_gauge_lines():
+    registry = Registry()
+    rows = registry.counter("test_rows_total", "Rows written", ["table"])
+    depth = registry.gauge("test_queue_depth", "Queued items", ["queue"])
+    rows.inc(table="pokemon")
+    rows.inc(2, table="pokemon")
+    rows.inc(table='say "hi"')
+    depth.set(4, queue="write")
+    depth.track(lambda: 7, queue="parse")
+
+    lines = scrape(registry)
+    assert lines == [
+        "# HELP test_queue_depth Queued items",
+        "# TYPE test_queue_depth gauge",
+        'test_queue_depth{queue="parse"} 7',
+        'test_queue_depth{queue="write"} 4',
+        "# HELP test_rows_total Rows written",
+        "# TYPE test_rows_total counter",
+        'test_rows_total{table="pokemon"} 3',
+        'test_rows_total{table="say \\"hi\\""} 1',
+    ]
+
+
+def test_histogram_lines_are_cumulative():
+    registry = Registry()
+    seconds = registry.histogram("test_seconds", "Latency", buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        seconds.observe(value)
+
+    lines = scrape(registry)
+    assert lines[2:] == [
+        'test_seconds_bucket{le="0.1"} 1',
+        'test_seconds_bucket{le="1"} 2',
+        'test_seconds_bucket{le="+Inf"} 3',
+        "test_seconds_sum 5.55",
+        "test_seconds_count 3",
+    ]
+
+
+def test_registry_reports_lookup_counters(db):
+    hit = 'si201_lookup_requests_total{table="types_lookup",result="hit"}'
+    miss = 'si201_lookup_requests_total{table="types_lookup",result="miss"}'
+    before = scrape(REGISTRY)
+    get_or_create_lookup_ids(db, "types_lookup", "type_name", ["fire", "water"])
+    get_or_create_lookup_ids(db, "types_lookup", "type_name", ["fire"])
+    after = scrape(REGISTRY)
+
+    assert "# TYPE si201_lookup_requests_total counter" in after
+    assert "# TYPE si201_queue_depth gauge" in after
+    assert (sample(after, miss) or 0) - (sample(before, miss) or 0) == 2
+    assert (sample(after, hit) or 0) - (sample(before, hit) or 0) == 1
+
+
+def test_unknown_labels_are_rejected():
+    counter = Registry().counter("test_total", "Test", ["table"])
+    with pytest.raises(ValueError):
+        counter.inc(host="x")
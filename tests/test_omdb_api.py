@@ -0,0 +1,78 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import data_collection.omdb_api as omdb_api
+import data_collection.sources as sources
+from data_collection.omdb_api import OmdbSearchSource
+from data_collection.sources import run_sources
+
+TOTAL_RESULTS = 25
+
+
+@pytest.fixture
+def omdb(monkeypatch):
+    """Stub OMDb: ?s= pages of 10 ids out of TOTAL_RESULTS, ?i= details; the first search page fails once."""
+    seen = []
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def do_GET(self):
+            query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            with lock:
+                seen.append(query)
+                first_try = sum(q.get("s") == "night" and q.get("page") == "1" for q in seen) == 1
+            status = 200
+            if "s" in query and first_try:
+                status, body = 503, {}
+            elif "s" in query:
+                page = int(query["page"])
+                ids = range((page - 1) * 10 + 1, min(page * 10, TOTAL_RESULTS) + 1)
+                body = {"Response": "True", "totalResults": str(TOTAL_RESULTS),
+                        "Search": [{"imdbID": f"tt{n:07d}"} for n in ids]}
+            else:
+                body = {"Response": "True", "imdbID": query["i"], "Title": f"Film {query['i']}", "Year": "2001",
+                        "Genre": "Drama", "Runtime": "90 min", "imdbRating": "7.0", "BoxOffice": "N/A"}
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(omdb_api, "OMDB_BASE", f"http://127.0.0.1:{server.server_address[1]}/")
+    monkeypatch.setattr(omdb_api, "OMDB_API_KEY", "secret")
+    yield seen
+    server.shutdown()
+    server.server_close()
+
+
+def test_search_pages_go_through_the_run_limiter(db, omdb, limiters, monkeypatch):
+    archived = []
+    monkeypatch.setattr(sources, "archive", lambda source, key, payload: archived.append((source, str(key))))
+    db.execute("INSERT INTO movies (imdb_id, title) VALUES ('tt0000001', 'Known')")
+    db.commit()
+
+    source = OmdbSearchSource(["night"], max_new=12)
+    assert run_sources(db, [source]) == {"OMDb": 12}
+
+    searches = [q for q in omdb if "s" in q]
+    assert [q["page"] for q in searches] == ["1", "1", "2"]  # the 503 was retried
+    assert source.search_requests == 2
+    # Every request, search pages included, entered the run's one limiter
+    # (a fetch cancelled once the limit is reached may enter without a request)
+    assert len(limiters) == 1
+    assert limiters[0].entered >= len(omdb) - 1
+    pages = [key for name, key in archived if name == "OMDb-pages"]
+    assert pages == ["night|1|movie|", "night|2|movie|"]
+    assert not any("secret" in key for _, key in archived)
+    assert db.execute("SELECT COUNT(*) FROM movies").fetchone()[0] == 13
@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from conftest import CountingSource
+from data_collection.pipeline import run_pipeline
+from database.db_helper import create_connection
+from database.snapshot_cache import database_file
+
+
+class FailingSinkSource(CountingSource):
+    """Writes its first batch, then the database "fails"."""
+
+    name = "FailingSink"
+
+    def __init__(self, n: int):
+        super().__init__(n)
+        self.writes = 0
+
+    def write(self, conn, rows):
+        self.writes += 1
+        if self.writes > 1:
+            raise RuntimeError("disk full")
+        return super().write(conn, rows)
+
+
+def run_in_thread(db, sources, **kwargs):
+    """run_pipeline() on a daemon thread, so a deadlock fails the test instead of hanging it."""
+    outcome = {}
+    db_file = database_file(db)
+
+    def target():
+        conn = create_connection(db_file)
+        try:
+            outcome["result"] = run_pipeline(conn, sources, **kwargs)
+        except Exception as e:
+            outcome["error"] = e
+        finally:
+            conn.close()
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+    assert not thread.is_alive(), "run_pipeline did not return"
+    return outcome
+
+
+def test_pipeline_inserts_rows(db):
+    outcome = run_in_thread(db, [CountingSource(8)], writer_batch=3)
+    assert outcome == {"result": {"Counting": 8}}
+    assert db.execute("SELECT COUNT(*) FROM pokemon").fetchone()[0] == 8
+
+
+def test_writer_failure_stops_the_pipeline_and_raises(db):
+    # Tiny queues and many items: without draining, the parsers block on put() forever
+    source = FailingSinkSource(500)
+    outcome = run_in_thread(db, [source], parse_workers=2, queue_size=2, writer_batch=5)
+
+    assert isinstance(outcome.get("error"), RuntimeError)
+    assert str(outcome["error"]) == "disk full"
+    # The first batch was committed; the failed one was rolled back
+    assert source.inserted == 5
+    assert db.execute("SELECT COUNT(*) FROM pokemon").fetchone()[0] == 5
+    assert not any(t.name.startswith("pipeline-") for t in threading.enumerate())
+
+
+def test_run_pipeline_needs_a_file_database():
+    conn = create_connection(":memory:")
+    with pytest.raises(ValueError):
+        run_pipeline(conn, [CountingSource(1)])
+    conn.close()
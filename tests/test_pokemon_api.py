@@ -0,0 +1,102 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import data_collection.pokemon_api as pokemon_api
+import data_collection.sources as sources
+from data_collection.pipeline import run_pipeline
+from data_collection.pokemon_api import PokemonSource
+from data_collection.sources import run_sources
+
+IDS = list(range(1, 8))
+TYPES = {"fire": [1, 2, 3], "water": [4, 5], "grass": [6, 7]}
+
+
+@pytest.fixture
+def pokeapi(monkeypatch):
+    """Stub PokeAPI: paged /pokemon list, /type index and members, details; the first /type/fire fails."""
+    seen = {"paths": [], "active": 0, "max_active": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k: int(v[0]) for k, v in parse_qs(url.query).items()}
+            base = f"http://127.0.0.1:{self.server.server_address[1]}"
+            with lock:
+                seen["paths"].append(url.path.rstrip("/"))
+                seen["active"] += 1
+                seen["max_active"] = max(seen["max_active"], seen["active"])
+                first_fire = seen["paths"][-1] == "/type/fire" and seen["paths"].count("/type/fire") == 1
+            time.sleep(0.05)
+            status, body = 200, None
+            if first_fire:
+                status, body = 503, {}
+            elif url.path == "/pokemon":
+                offset, limit = query.get("offset", 0), query["limit"]
+                chunk = IDS[offset:offset + limit]
+                more = offset + limit < len(IDS)
+                body = {"results": [{"url": f"{base}/pokemon/{pid}/"} for pid in chunk],
+                        "next": f"{base}/pokemon?limit={limit}&offset={offset + limit}" if more else None}
+            elif url.path == "/type":
+                body = {"results": [{"name": name, "url": f"{base}/type/{name}/"} for name in TYPES]}
+            elif url.path.startswith("/type/"):
+                members = TYPES[url.path.strip("/").rsplit("/", 1)[1]]
+                body = {"pokemon": [{"slot": 1, "pokemon": {"url": f"{base}/pokemon/{pid}/"}} for pid in members]}
+            else:
+                pid = int(url.path.strip("/").rsplit("/", 1)[1])
+                body = {"id": pid, "name": f"mon{pid}", "base_experience": 100, "height": 1, "weight": 2,
+                        "types": [], "stats": [{"stat": {"name": n}, "base_stat": 10}
+                                               for n in ("hp", "attack", "defense", "speed")]}
+            data = json.dumps(body).encode()
+            with lock:
+                seen["active"] -= 1
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(pokemon_api, "POKEAPI_BASE", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(pokemon_api.list_pokemon_ids, "__defaults__", (3,))
+    yield seen
+    server.shutdown()
+    server.server_close()
+
+
+def test_list_pages_share_the_run_limiter_retries_and_archive(db, pokeapi, limiters, monkeypatch):
+    archived = []
+    monkeypatch.setattr(sources, "archive", lambda source, key, payload: archived.append(source))
+
+    source = PokemonSource(target_new=10, max_id=None, list_discovery=True)
+    assert run_sources(db, [source]) == {"PokeAPI": 7}
+
+    # One limiter for the whole run, entered once per request (the 503 retry happens inside)
+    assert len(limiters) == 1
+    assert limiters[0].entered == len(pokeapi["paths"]) - 1
+    assert pokeapi["paths"].count("/type/fire") == 2
+    assert pokeapi["max_active"] <= limiters[0].concurrency
+    # 3 list pages + type index + 3 type pages, kept apart from the replayable details
+    assert archived.count("PokeAPI-pages") == 7
+    assert archived.count("PokeAPI") == 7
+    rows = db.execute("""
+        SELECT p.id, t.type_name FROM pokemon p INNER JOIN types_lookup t ON t.id = p.type_id ORDER BY p.id
+    """).fetchall()
+    assert [tuple(r) for r in rows] == [(pid, name) for name, ids in TYPES.items() for pid in ids]
+
+
+def test_list_pages_outside_a_run_use_a_private_loop(db, pokeapi, limiters):
+    # run_pipeline() calls discover() before its event loop exists
+    source = PokemonSource(target_new=10, max_id=None, list_discovery=True)
+    assert run_pipeline(db, [source], writer_batch=3) == {"PokeAPI": 7}
+    assert db.execute("SELECT COUNT(*) FROM pokemon WHERE type_id IS NOT NULL").fetchone()[0] == 7
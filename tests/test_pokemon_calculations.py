@@ -0,0 +1,30 @@
+from calculations.pokemon_calculations import JOIN_QUERY, iter_pokemon_with_stats_join
+from database.db_helper import get_or_create_lookup_id
+
+
+def _add(conn, pid, type_id, hp, attack, defense, speed):
+    conn.execute("INSERT INTO pokemon (id, name, base_experience, height, weight, type_id) VALUES (?, ?, 1, 1, 1, ?)",
+                 (pid, f"mon{pid}", type_id))
+    conn.execute("INSERT INTO pokemon_stats (pokemon_id, hp, attack, defense, speed) VALUES (?, ?, ?, ?, ?)",
+                 (pid, hp, attack, defense, speed))
+
+
+def test_ties_are_ordered_by_id_and_pages_do_not_overlap(db):
+    normal = get_or_create_lookup_id(db, "types_lookup", "type_name", "normal")
+    # Inserted out of id order, every total_stats value shared by several Pokemon
+    for pid in (40, 7, 23, 1, 35, 12, 28, 3, 19, 31):
+        _add(db, pid, normal, 10 * (pid % 3), 5, 5, 5)
+    db.commit()
+
+    everything = [row[0] for row in iter_pokemon_with_stats_join(db)]
+    totals = {pid: 15 + 10 * (pid % 3) for pid in everything}
+    assert everything == sorted(totals, key=lambda pid: (-totals[pid], pid))
+
+    pages = [row[0] for offset in range(0, 10, 3) for row in iter_pokemon_with_stats_join(db, limit=3, offset=offset)]
+    assert pages == everything
+
+
+def test_top_k_walks_the_index(db):
+    plan = " ".join(row[3] for row in db.execute("EXPLAIN QUERY PLAN " + JOIN_QUERY, (10, 0)))
+    assert "idx_pokemon_stats_total_id" in plan
+    assert "TEMP B-TREE" not in plan
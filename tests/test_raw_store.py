@@ -0,0 +1,47 @@
+from data_collection.raw_store import RawStore, read_segment, replay
+
+
+def pokemon_payload(pid: int, base_experience: int) -> dict:
+    return {"id": pid, "name": f"mon{pid}", "base_experience": base_experience, "height": 1, "weight": 2,
+            "types": [{"slot": 1, "type": {"name": "fire"}}],
+            "stats": [{"stat": {"name": n}, "base_stat": 10} for n in ("hp", "attack", "defense", "speed")]}
+
+
+def make_store(tmp_path) -> RawStore:
+    store = RawStore(root=str(tmp_path / "raw"))
+    for pid in (1, 2, 3):
+        store.append("PokeAPI", pid, pokemon_payload(pid, 100 + pid))
+    store.close()
+    return store
+
+
+def test_segments_round_trip(tmp_path):
+    store = make_store(tmp_path)
+    records = [record for path in store.segments("PokeAPI") for record in read_segment(path)]
+    assert [r["key"] for r in records] == ["1", "2", "3"]
+    assert store.get("PokeAPI", 2)["base_experience"] == 102
+
+
+def test_replay_only_fills_missing_rows(db, tmp_path):
+    store = make_store(tmp_path)
+    # Stored before base_experience was parsed: replay alone does not touch it
+    db.execute("INSERT INTO pokemon (id, name) VALUES (1, 'mon1')")
+    db.commit()
+
+    assert replay(db, store, processes=1) == {"PokeAPI": 2}
+    rows = db.execute("SELECT id, base_experience FROM pokemon ORDER BY id").fetchall()
+    assert [tuple(r) for r in rows] == [(1, None), (2, 102), (3, 103)]
+
+
+def test_rebuild_rederives_existing_rows(db, tmp_path):
+    store = make_store(tmp_path)
+    db.execute("INSERT INTO pokemon (id, name) VALUES (1, 'mon1')")
+    db.execute("INSERT INTO movies (imdb_id, title) VALUES ('tt1', 'Kept')")
+    db.commit()
+
+    assert replay(db, store, processes=1, rebuild=True) == {"PokeAPI": 3}
+    rows = db.execute("SELECT id, base_experience FROM pokemon ORDER BY id").fetchall()
+    assert [tuple(r) for r in rows] == [(1, 101), (2, 102), (3, 103)]
+    assert db.execute("SELECT COUNT(*) FROM pokemon_stats").fetchone()[0] == 3
+    # Sources that were not replayed keep their tables
+    assert db.execute("SELECT COUNT(*) FROM movies").fetchone()[0] == 1
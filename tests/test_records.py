@@ -0,0 +1,78 @@
+import time
+import tracemalloc
+
+import pytest
+
+from data_collection.records import Movie, Pokemon, Record, Track, WeatherPeriod
+
+N = 20_000
+
+POKEMON = {"id": 25, "name": "pikachu", "base_experience": 112, "height": 4, "weight": 60,
+           "types": [{"type": {"name": "electric"}}],
+           "stats": [{"stat": {"name": n}, "base_stat": v} for n, v in (("hp", 35), ("attack", 55),
+                                                                         ("defense", 40), ("speed", 90))]}
+TRACK = {"name": "Song", "popularity": 50, "id": "abc", "artists": [{"name": "A", "id": "a1"}, {"name": "B", "id": "b2"}]}
+PERIOD = {"startTime": "2031-01-01T06:00", "temperature": 51, "windSpeed": "5 mph", "shortForecast": "Sunny"}
+MOVIE = {"imdbID": "tt1", "Title": "M", "Year": "2001", "Genre": "Drama", "Runtime": "100 min", "imdbRating": "7.1",
+         "BoxOffice": "$1"}
+
+PARSERS = {
+    "Pokemon": lambda: Pokemon.from_payload(POKEMON),
+    "Track": lambda: Track.from_payload(TRACK, 1),
+    "WeatherPeriod": lambda: WeatherPeriod.from_payload("Ann Arbor", PERIOD, 1),
+    "Movie": lambda: Movie.from_payload(MOVIE, 1),
+}
+
+
+def as_dict(record: Record) -> dict:
+    """The flat dict parse() returned before the record types (Pokemon stats inlined)."""
+    row = {}
+    for name in record.__slots__:
+        value = record[name]
+        if isinstance(value, Record):
+            row.update((field, value[field]) for field in value.__slots__[1:])
+        else:
+            row[name] = value
+    return row
+
+
+def bytes_per_row(make) -> float:
+    tracemalloc.start()
+    try:
+        rows = [make() for _ in range(N)]
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(rows) == N
+    return current / N
+
+
+@pytest.mark.parametrize("kind", sorted(PARSERS))
+def test_records_use_less_memory_than_dicts(kind):
+    parse = PARSERS[kind]
+    as_dicts = bytes_per_row(lambda: as_dict(parse()))
+    as_records = bytes_per_row(parse)
+    # Measured savings are 38-63%; leave room for interpreter differences
+    assert as_records < 0.8 * as_dicts, f"{kind}: record {as_records:.0f} B/row, dict {as_dicts:.0f} B/row"
+
+
+def best_of(repeats: int, fn) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def test_params_match_dicts():
+    columns = ("imdb_id", "title", "year", "genre_id", "runtime", "imdb_rating", "box_office_id", "updated_at")
+    records = [PARSERS["Movie"]() for _ in range(N)]
+    dicts = [as_dict(r) for r in records]
+    assert [list(r.params(columns)) for r in records[:10]] == [[d[c] for c in columns] for d in dicts[:10]]
+
+    # One attrgetter call per row against the per-column dict lookups it replaced.
+    # Wall-clock numbers vary too much between machines to fail on; see them with -s.
+    as_dicts = best_of(5, lambda: [[d[c] for c in columns] for d in dicts])
+    as_records = best_of(5, lambda: [r.params(columns) for r in records])
+    print(f"\nparams {as_records * 1e3:.1f} ms, dicts {as_dicts * 1e3:.1f} ms for {N} rows")
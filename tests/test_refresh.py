@@ -0,0 +1,108 @@
+import datetime
+
+import pytest
+
+pytest.importorskip("spotipy")
+import data_collection.refresh as refresh  # noqa: E402
+from data_collection.weather_api import WeatherSource  # noqa: E402
+
+
+def period(date: str, temperature: int) -> dict:
+    return {"startTime": f"{date}T06:00:00", "temperature": temperature, "windSpeed": "5 mph",
+            "shortForecast": "Sunny"}
+
+
+@pytest.fixture
+def today():
+    return datetime.datetime.now(datetime.timezone.utc).date().isoformat()
+
+
+def test_streamed_cities_are_refreshed_with_their_stored_coordinates(db, today, monkeypatch):
+    source = WeatherSource([("Testville, ZZ", 40.5, -80.25)])
+    list(source.discover(db))
+    source.sink(db, source.parse(("Testville, ZZ", [period(today, 50)])))
+    assert tuple(db.execute("SELECT latitude, longitude FROM cities_lookup").fetchone()) == (40.5, -80.25)
+
+    db.execute("UPDATE weather SET updated_at = NULL")
+    db.commit()
+    polled = []
+    monkeypatch.setattr(refresh, "fetch_forecast_periods",
+                        lambda lat, lon: polled.append((lat, lon)) or [period(today, 61)])
+    monkeypatch.setattr(refresh, "throttle", lambda *args: None)
+
+    assert refresh.refresh_weather_forecasts(db) == 1
+    assert polled == [(40.5, -80.25)]
+    assert db.execute("SELECT temperature_high FROM weather").fetchone()[0] == 61
+
+
+def test_cities_without_coordinates_are_stamped(db, today, monkeypatch):
+    db.execute("INSERT INTO cities_lookup (city_name) VALUES ('Nowhere, ZZ')")
+    db.execute("INSERT INTO dates_lookup (date_value) VALUES (?)", (today,))
+    db.execute("INSERT INTO weather (city_id, date_id, temperature_high) VALUES (1, 1, 50)")
+    db.commit()
+    monkeypatch.setattr(refresh, "fetch_forecast_periods", lambda lat, lon: pytest.fail("nothing to poll"))
+
+    assert refresh.refresh_weather_forecasts(db) == 0
+    assert db.execute("SELECT updated_at IS NOT NULL FROM weather").fetchone()[0] == 1
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+def test_movie_refresh_parses_ratings_and_throttles_after_errors(db, monkeypatch):
+    db.executemany("INSERT INTO movies (imdb_id, imdb_rating) VALUES (?, ?)",
+                   [("tt1", 5.0), ("tt2", 5.0), ("tt3", 5.0)])
+    db.commit()
+    responses = {"tt1": FakeResponse(500), "tt2": FakeResponse(200, {"imdbRating": "7.4"}),
+                 "tt3": FakeResponse(200, {"imdbRating": "N/A"})}
+    pauses = []
+    monkeypatch.setattr(refresh, "OMDB_API_KEY", "key")
+    monkeypatch.setattr(refresh.requests, "get", lambda url, params, timeout: responses[params["i"]])
+    monkeypatch.setattr(refresh, "throttle", lambda source, seconds: pauses.append(source))
+
+    assert refresh.refresh_movie_ratings(db) == 2
+    ratings = dict(db.execute("SELECT imdb_id, imdb_rating FROM movies").fetchall())
+    assert ratings == {"tt1": 5.0, "tt2": 7.4, "tt3": None}
+    assert pauses == ["omdb"] * 3  # the 500 was followed by a pause too
+
+
+class FakeSpotify:
+    def __init__(self):
+        self.track_calls = []
+        self.searches = 0
+
+    def tracks(self, ids):
+        self.track_calls.append(len(ids))
+        # Spotify answers null for IDs it no longer knows
+        return {"tracks": [None if i == "gone" else {"id": i, "popularity": 77} for i in ids]}
+
+    def search(self, q, type, limit):
+        self.searches += 1
+        return {"tracks": {"items": [{"name": "Legacy", "popularity": 33}]}}
+
+
+def test_track_refresh_batches_stored_ids(db, monkeypatch):
+    db.execute("INSERT INTO artists_lookup (artist_name) VALUES ('Band')")
+    ids = [f"id{i}" for i in range(119)] + ["gone"]
+    db.executemany("INSERT INTO spotify_ids_lookup (spotify_id) VALUES (?)", [(i,) for i in ids])
+    db.executemany("INSERT INTO tracks (title, artist_id, popularity, spotify_ref) VALUES (?, 1, 1, ?)",
+                   [(f"Song {n}", n + 1) for n in range(len(ids))])
+    db.execute("INSERT INTO tracks (title, artist_id, popularity) VALUES ('Legacy', 1, 1)")
+    db.commit()
+    client = FakeSpotify()
+    monkeypatch.setattr(refresh, "spotify_client", client)
+    monkeypatch.setattr(refresh, "throttle", lambda *args: None)
+
+    assert refresh.refresh_track_popularity(db) == 120
+    assert client.track_calls == [50, 50, 20]
+    assert client.searches == 1  # only the track without a stored ID
+    popularity = dict(db.execute("SELECT title, popularity FROM tracks").fetchall())
+    assert popularity["Song 0"] == 77 and popularity["Legacy"] == 33
+    assert popularity["Song 119"] == 1  # unmatched: stamped, not changed
+    assert db.execute("SELECT COUNT(*) FROM tracks WHERE updated_at IS NULL").fetchone()[0] == 0
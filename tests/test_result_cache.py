@@ -0,0 +1,57 @@
+import pytest
+
+from calculations.result_cache import cached_calculation, clear_memory_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_memory_cache():
+    clear_memory_cache()
+    yield
+    clear_memory_cache()
+
+
+def test_mutating_a_result_does_not_change_later_hits(db):
+    calls = []
+
+    @cached_calculation(tables=["pokemon"])
+    def rows(conn):
+        calls.append(1)
+        return [("fire", 1.0, 2)], {"types": ["fire"]}
+
+    first, extra = rows(db)
+    first.append(("water", 2.0, 1))
+    first.sort(reverse=True)
+    extra["types"].clear()
+
+    second, extra2 = rows(db)
+    assert second == [("fire", 1.0, 2)]
+    assert extra2 == {"types": ["fire"]}
+    assert len(calls) == 1  # still served from the cache
+
+
+def test_cached_arrays_are_read_only(db):
+    np = pytest.importorskip("numpy")
+
+    @cached_calculation(tables=["movies"])
+    def arrays(conn):
+        return np.arange(3.0), np.ones(3)
+
+    xs, _ = arrays(db)
+    with pytest.raises(ValueError):
+        xs[0] = 99.0
+    assert arrays(db)[0].tolist() == [0.0, 1.0, 2.0]
+
+
+def test_movie_columns_are_not_cached_only_the_correlation(db):
+    from calculations import result_cache
+    from calculations.movies_calculations import calculate_runtime_rating_correlation, load_runtime_rating_pairs
+
+    db.executemany("INSERT INTO movies (imdb_id, runtime, imdb_rating) VALUES (?, ?, ?)",
+                   [("tt1", 90, 6.0), ("tt2", 120, 7.5), ("tt3", 150, 8.0)])
+    db.commit()
+    runtimes, _ = load_runtime_rating_pairs(db)
+    assert len(runtimes) == 3
+    assert len(result_cache._memory) == 0
+
+    assert calculate_runtime_rating_correlation(db) > 0
+    assert list(result_cache._memory.values()) == [pytest.approx(calculate_runtime_rating_correlation(db))]
@@ -0,0 +1,12 @@
+from data_collection.scheduler import Job, Scheduler
+
+
+def test_failing_after_job_hook_does_not_stop_the_scheduler():
+    runs = []
+
+    def after_job(job):
+        raise OSError("disk full")
+
+    jobs = [Job("a", 0, lambda: runs.append("a"), jitter=0), Job("b", 0, lambda: runs.append("b"), jitter=0)]
+    Scheduler(jobs, after_job=after_job).run(max_runs=4)
+    assert sorted(runs) == ["a", "a", "b", "b"]
@@ -0,0 +1,61 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from conftest import CountingSource
+from data_collection.sources import run_sources_sharded
+from database.sharding import create_shards, shard_path
+
+
+class SlowSource(CountingSource):
+    """Writes one batch to the weather shard, then blocks for a long time."""
+
+    name = "Slow"
+    table = "weather"
+    columns = ("city_id", "date_id")
+
+    def parse(self, item):
+        return [{"city_id": item, "date_id": item}]
+
+    async def fetch(self, item):
+        if item > 1:
+            await asyncio.sleep(60)
+        return item
+
+
+class BrokenSource(CountingSource):
+    name = "Broken"
+    table = "movies"
+
+    def discover(self, conn):
+        time.sleep(0.5)  # let the sibling get going first
+        raise ValueError("discovery exploded")
+
+
+@pytest.fixture
+def shard_dir(tmp_path):
+    create_shards(str(tmp_path))
+    return str(tmp_path)
+
+
+def _count(shard_dir, shard, table):
+    with sqlite3.connect(shard_path(shard, shard_dir)) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_sharded_run_returns_counts(shard_dir):
+    assert run_sources_sharded([CountingSource(5)], shard_dir, batch_size=2) == {"Counting": 5}
+    assert _count(shard_dir, "pokemon", "pokemon") == 5
+
+
+def test_failed_worker_stops_siblings_and_raises(shard_dir):
+    started = time.monotonic()
+    with pytest.raises(RuntimeError, match=r"shard-movies failed \(Broken: ValueError: discovery exploded\)"
+                                           r"; stopped shard-weather"):
+        run_sources_sharded([SlowSource(3), BrokenSource(3)], shard_dir, batch_size=1)
+    assert time.monotonic() - started < 30  # the 60 s sibling was not waited for
+    # The sibling's committed batch survives and its shard is still readable
+    assert _count(shard_dir, "weather", "weather") == 1
+    assert _count(shard_dir, "movies", "movies") == 0
@@ -0,0 +1,80 @@
+import json
+import math
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip("numpy")
+import calculations.result_cache as result_cache  # noqa: E402
+from calculations.movies_calculations import calculate_runtime_rating_correlation  # noqa: E402
+from calculations.pokemon_calculations import calculate_avg_base_exp_by_type  # noqa: E402
+from calculations.spotify_calculations import calculate_avg_popularity_per_artist  # noqa: E402
+from calculations.weather_calculations import calculate_avg_high_low_by_city  # noqa: E402
+from database.db_helper import create_connection, create_tables  # noqa: E402
+from database.snapshot_cache import snapshot_dir_for, write_snapshot  # noqa: E402
+from tests.conftest import ROOT  # noqa: E402
+
+CALCULATIONS = [calculate_avg_base_exp_by_type, calculate_avg_popularity_per_artist,
+                calculate_avg_high_low_by_city, calculate_runtime_rating_correlation]
+
+
+@pytest.fixture
+def project_db(tmp_path, monkeypatch):
+    """Copy of the shipped database, with the result cache off so every call recomputes."""
+    monkeypatch.setattr(result_cache, "CALC_CACHE_ENABLED", False)
+    path = tmp_path / "si201_project.db"
+    shutil.copy(f"{ROOT}/si201_project.db", path)
+    conn = create_connection(str(path))
+    create_tables(conn)
+    yield conn
+    conn.close()
+
+
+def test_snapshot_results_match_sql(project_db):
+    from_sql = [calc(project_db) for calc in CALCULATIONS]
+    write_snapshot(project_db)
+    from_snapshot = [calc(project_db) for calc in CALCULATIONS]
+
+    for sql, snap in zip(from_sql[:3], from_snapshot[:3]):
+        assert [row[0] for row in snap] == [row[0] for row in sql]  # same order, ties included
+        for sql_row, snap_row in zip(sql, snap):
+            assert snap_row == pytest.approx(sql_row)
+    assert from_snapshot[3] == pytest.approx(from_sql[3])
+
+
+def test_ties_keep_report_order(project_db):
+    # calculations_output.txt lists the two 165.00 types as fairy, electric
+    from_sql = calculate_avg_base_exp_by_type(project_db)
+    write_snapshot(project_db)
+    from_snapshot = calculate_avg_base_exp_by_type(project_db)
+    for rows in (from_sql, from_snapshot):
+        assert [name for name, _, _ in rows[:2]] == ["fairy", "electric"]
+
+
+def test_correlation_on_snapshot_arrays(project_db):
+    write_snapshot(project_db)
+    rows = project_db.execute("SELECT runtime, imdb_rating FROM movies "
+                              "WHERE runtime IS NOT NULL AND imdb_rating IS NOT NULL").fetchall()
+    xs, ys = [r[0] for r in rows], [r[1] for r in rows]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    expected = (sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+                / math.sqrt(sum((x - mx) ** 2 for x in xs) * sum((y - my) ** 2 for y in ys)))
+    assert calculate_runtime_rating_correlation(project_db) == pytest.approx(expected)
+
+
+def test_snapshot_rewrites_only_the_given_tables(project_db):
+    write_snapshot(project_db)
+    manifest_path = os.path.join(snapshot_dir_for(project_db), "manifest.json")
+    with open(manifest_path) as f:
+        before = json.load(f)
+    project_db.execute("UPDATE pokemon SET base_experience = base_experience + 1")
+    project_db.execute("UPDATE movies SET runtime = runtime + 1")
+    project_db.commit()
+
+    write_snapshot(project_db, tables=["pokemon", "pokemon_history_not_a_data_table"])
+    with open(manifest_path) as f:
+        after = json.load(f)
+    assert after["pokemon"] != before["pokemon"]
+    assert after["movies"] == before["movies"]  # left stale for load_columns() to refresh
+    assert set(after) == set(before)
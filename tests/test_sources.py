@@ -0,0 +1,74 @@
+import threading
+import time
+
+import data_collection.sources as sources
+from data_collection.sources import Source, run_sources
+
+
+class RecordingSource(Source):
+    """Pokemon rows 1..n; notes which thread discover() ran on and when."""
+
+    name = "Recording"
+    host = "recording.invalid"
+    table = "pokemon"
+    columns = ("id", "name")
+
+    def __init__(self, n: int, first_id: int = 1, discover_seconds: float = 0.0):
+        super().__init__(max_new=n)
+        self.ids = range(first_id, first_id + n)
+        self.discover_seconds = discover_seconds
+        self.discover_thread = None
+        self.discover_conn = None
+        self.discovered_at = None
+        self.fetched_at = []
+
+    def discover(self, conn):
+        self.discover_thread = threading.current_thread()
+        self.discover_conn = conn
+        # Stands in for a blocking list request
+        time.sleep(self.discover_seconds)
+        conn.execute("SELECT COUNT(*) FROM pokemon").fetchone()
+        self.discovered_at = time.monotonic()
+        return self.ids
+
+    async def fetch(self, item):
+        self.fetched_at.append(time.monotonic())
+        return item
+
+    def parse(self, item):
+        return [{"id": item, "name": f"mon{item}"}]
+
+
+def test_discover_runs_off_the_event_loop(db):
+    slow = RecordingSource(3, first_id=1, discover_seconds=0.5)
+    fast = RecordingSource(3, first_id=100)
+    fast.name = "Fast"
+    fast.host = "fast.invalid"
+
+    assert run_sources(db, [slow, fast]) == {"Recording": 3, "Fast": 3}
+    for source in (slow, fast):
+        assert source.discover_thread is not threading.main_thread()
+        assert source.discover_conn is not db  # the worker opened its own connection
+    # The fast source fetched everything while the slow one was still discovering
+    assert max(fast.fetched_at) < slow.discovered_at
+    assert db.execute("SELECT COUNT(*) FROM pokemon").fetchone()[0] == 6
+
+
+def test_payloads_are_archived_off_the_event_loop(db, monkeypatch):
+    threads = []
+    monkeypatch.setattr(sources, "archive", lambda source, key, payload: threads.append(threading.current_thread()))
+
+    run_sources(db, [RecordingSource(4)])
+    assert len(threads) == 4
+    assert threading.main_thread() not in threads
+
+
+def test_in_memory_databases_discover_on_the_loop():
+    from database.db_helper import create_connection, create_tables
+
+    conn = create_connection(":memory:")
+    create_tables(conn)
+    source = RecordingSource(2)
+    assert run_sources(conn, [source]) == {"Recording": 2}
+    assert source.discover_conn is conn
+    conn.close()
@@ -0,0 +1,64 @@
+import pytest
+
+pytest.importorskip("spotipy")
+from data_collection.records import Track  # noqa: E402
+from data_collection.spotify_api import SpotifySource  # noqa: E402
+from database.db_helper import create_connection  # noqa: E402
+from database.existence import track_title_hash  # noqa: E402
+
+
+def track(title: str, artist_id, spotify_ref, artist_refs=()) -> Track:
+    row = Track(title, "Band", 50, 1, f"sp-{title}", [])
+    row["artist_id"], row["spotify_ref"], row["artist_refs"] = artist_id, spotify_ref, list(artist_refs)
+    row["title_hash"] = track_title_hash(title, "Band")
+    return row
+
+
+@pytest.fixture
+def legacy_tracks(tmp_path):
+    """A tracks row with a NULL artist_id and no Spotify ID, which the INSERT then collides with."""
+    conn = create_connection(str(tmp_path / "legacy.db"))
+    conn.execute("""
+        CREATE TABLE tracks (
+            track_id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, artist_id INTEGER,
+            popularity INTEGER, updated_at INTEGER, spotify_ref INTEGER, title_hash INTEGER,
+            UNIQUE(title))
+    """)
+    conn.execute("CREATE TABLE track_artists (track_id INTEGER, artist_ref INTEGER, position INTEGER, "
+                 "PRIMARY KEY(track_id, artist_ref))")
+    conn.execute("INSERT INTO tracks (title, artist_id) VALUES ('Song', NULL)")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def source_for(conn) -> SpotifySource:
+    source = SpotifySource()
+    source.seen = source.seed_seen(conn)
+    return source
+
+
+def test_backfill_matches_a_null_artist_id(legacy_tracks):
+    c = legacy_tracks.cursor()
+    source = source_for(legacy_tracks)
+    assert source.insert_row(c, track("Song", None, 7, artist_refs=[3])) is False
+    assert tuple(c.execute("SELECT track_id, spotify_ref, title_hash IS NOT NULL FROM tracks").fetchone()) == (1, 7, 1)
+    assert [tuple(r) for r in c.execute("SELECT track_id, artist_ref FROM track_artists")] == [(1, 3)]
+
+
+def test_ignored_insert_without_a_stored_row(db):
+    # tracks.artist_id is NOT NULL now: INSERT OR IGNORE drops the row, and nothing matches it
+    c = db.cursor()
+    source = source_for(db)
+    assert source.insert_row(c, track("Orphan", None, 7, artist_refs=[3])) is False
+    assert c.execute("SELECT COUNT(*) FROM track_artists").fetchone()[0] == 0
+
+
+def test_new_row_links_artists_to_its_own_id(db):
+    db.execute("INSERT INTO tracks (title, artist_id) VALUES ('Older', 1)")
+    c = db.cursor()
+    source = source_for(db)
+    assert source.insert_row(c, track("Fresh", 1, 7, artist_refs=[3, 4])) is True
+    fresh = c.execute("SELECT track_id FROM tracks WHERE title = 'Fresh'").fetchone()[0]
+    rows = c.execute("SELECT track_id, artist_ref FROM track_artists ORDER BY position").fetchall()
+    assert [tuple(r) for r in rows] == [(fresh, 3), (fresh, 4)]
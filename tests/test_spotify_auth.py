@@ -0,0 +1,98 @@
+import json
+import multiprocessing
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("spotipy")
+from data_collection import spotify_auth  # noqa: E402
+from data_collection.spotify_auth import SharedTokenAuth  # noqa: E402
+
+PROCESSES = 4
+THREADS = 8
+
+
+@pytest.fixture
+def token_server():
+    """Stub token endpoint that counts POSTs and answers slowly, to widen any race."""
+    requests_seen = []
+
+    class TokenHandler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            requests_seen.append(time.time())
+            time.sleep(0.3)
+            body = json.dumps({"access_token": f"token-{len(requests_seen)}", "token_type": "Bearer",
+                               "expires_in": 3600}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TokenHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/api/token", requests_seen
+    server.shutdown()
+    server.server_close()
+
+
+def fetch_tokens(cache_path, token_url, start, results):
+    """THREADS threads, one SharedTokenAuth per process, all asking at once."""
+    auth = SharedTokenAuth(client_id="id", client_secret="secret", cache_path=cache_path, token_url=token_url)
+    tokens = []
+
+    def worker():
+        start.wait()
+        tokens.append(auth.get_access_token())
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put(tokens)
+
+
+@pytest.mark.skipif(spotify_auth.fcntl is None, reason="cross-process sharing needs fcntl")
+def test_one_token_request_across_threads_and_processes(tmp_path, token_server):
+    token_url, requests_seen = token_server
+    cache_path = str(tmp_path / "token.json")
+    with open(cache_path, "w") as f:
+        json.dump({"access_token": "expired", "expires_in": 3600, "expires_at": int(time.time()) - 60}, f)
+
+    context = multiprocessing.get_context("fork")
+    start = context.Event()
+    results = context.SimpleQueue()
+    processes = [context.Process(target=fetch_tokens, args=(cache_path, token_url, start, results))
+                 for _ in range(PROCESSES)]
+    for process in processes:
+        process.start()
+    time.sleep(0.2)  # every process is parked on start.wait()
+    start.set()
+    tokens = [token for _ in processes for token in results.get()]
+    for process in processes:
+        process.join(timeout=30)
+        assert process.exitcode == 0
+
+    assert len(requests_seen) == 1
+    assert tokens == ["token-1"] * (PROCESSES * THREADS)
+    with open(cache_path) as f:
+        assert json.load(f)["access_token"] == "token-1"
+
+
+def test_fresh_cache_file_is_reused(tmp_path, token_server):
+    token_url, requests_seen = token_server
+    cache_path = str(tmp_path / "token.json")
+    with open(cache_path, "w") as f:
+        json.dump({"access_token": "cached", "expires_in": 3600, "expires_at": int(time.time()) + 3600}, f)
+
+    auth = SharedTokenAuth(client_id="id", client_secret="secret", cache_path=cache_path, token_url=token_url)
+    assert auth.get_access_token() == "cached"
+    assert requests_seen == []
@@ -0,0 +1,44 @@
+import json
+import logging
+import multiprocessing
+
+import pytest
+
+from monitoring import structured_logging
+from monitoring.structured_logging import configure_logging, flush_logging, get_logger, shutdown_logging
+
+
+@pytest.fixture
+def json_log(tmp_path):
+    path = tmp_path / "log.jsonl"
+    configure_logging(level="INFO", json_path=str(path), console_level="CRITICAL")
+    yield path
+    shutdown_logging()
+    root = logging.getLogger(structured_logging.ROOT_LOGGER)
+    root.handlers.clear()
+    root.propagate = True
+    root.setLevel(logging.NOTSET)
+
+
+def child():
+    get_logger("test").info("from the child")
+    flush_logging()  # children end with os._exit(), which skips atexit
+
+
+def test_forked_children_do_not_repeat_queued_records(json_log):
+    log = get_logger("test")
+    context = multiprocessing.get_context("fork")
+    for round_ in range(3):
+        # Queue records right before the fork, while the listener is still busy
+        for i in range(300):
+            log.info("parent %d.%d", round_, i)
+        process = context.Process(target=child)
+        process.start()
+        process.join(timeout=30)
+        assert process.exitcode == 0
+    shutdown_logging()
+
+    messages = [json.loads(line)["message"] for line in json_log.read_text().splitlines()]
+    assert messages.count("from the child") == 3
+    parent = [m for m in messages if m.startswith("parent")]
+    assert len(parent) == len(set(parent)) == 900
@@ -0,0 +1,322 @@
+"""
+Lightweight dashboard server (stdlib only)
+
+Serves the four chart views as JSON and renders them in the browser with
+Chart.js, so no matplotlib work happens per request:
+
+  GET /                        HTML page (client-side rendering)
+  GET /api/charts              all four charts in one response
+  GET /api/charts/<name>       one chart: pokemon, spotify, weather, movies
+  GET /api/events              Server-Sent Events; sends "update" when data changes
+  GET /metrics                 Prometheus metrics (see monitoring/metrics.py)
+
+Chart data comes from the cached calculation functions (see
+calculations/result_cache.py), which are keyed on table fingerprints, so
+repeat requests are served from memory. Every JSON response carries an ETag
+built from those fingerprints; a matching If-None-Match returns 304.
+
+Run with: python3 main.py --serve [--port 8000]
+"""
+import hashlib
+import json
+import queue
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Set
+from calculations.movies_calculations import load_runtime_rating_pairs
+from calculations.pokemon_calculations import calculate_avg_base_exp_by_type
+from calculations.spotify_calculations import calculate_avg_popularity_per_artist
+from calculations.weather_calculations import calculate_avg_high_low_by_city
+from config.api_keys import CHART_SCATTER_MAX_POINTS, DASHBOARD_MAX_SSE_CLIENTS, DB_PATH
+from database.db_helper import create_connection
+from database.snapshot_cache import cached_fingerprint
+from monitoring.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY
+from monitoring.structured_logging import get_logger
+
+
+log = get_logger("dashboard")
+
+
+def _pokemon_chart(conn: sqlite3.Connection, top_n: int = 12) -> Dict:
+    data = calculate_avg_base_exp_by_type(conn)[:top_n]
+    return {"type": "bar", "title": "Average Base Experience by Pokémon Primary Type",
+            "labels": [d[0] for d in data], "series": {"Average Base Experience": [d[1] for d in data]}}
+
+
+def _spotify_chart(conn: sqlite3.Connection, top_n: int = 12) -> Dict:
+    data = calculate_avg_popularity_per_artist(conn)[:top_n]
+    return {"type": "hbar", "title": "Average Spotify Track Popularity per Artist",
+            "labels": [d[0] for d in data], "series": {"Average Track Popularity": [d[1] for d in data]}}
+
+
+def _weather_chart(conn: sqlite3.Connection) -> Dict:
+    data = calculate_avg_high_low_by_city(conn)
+    return {"type": "line", "title": "Average High and Low Temperatures by City",
+            "labels": [d[0] for d in data],
+            "series": {"Avg High": [d[1] for d in data], "Avg Low": [d[2] for d in data]}}
+
+
+def _movies_chart(conn: sqlite3.Connection) -> Dict:
+    runtimes, ratings = load_runtime_rating_pairs(conn)
+    chart = {"type": "scatter", "title": "Movie Runtime vs. IMDb Rating"}
+    if len(runtimes) <= CHART_SCATTER_MAX_POINTS:
+        # float(): the snapshot path returns NumPy arrays, whose scalars json can't encode
+        chart["points"] = [[float(x), float(y)] for x, y in zip(runtimes, ratings)]
+        return chart
+    # Too many points to ship: send a coarse density grid instead
+    import numpy as np
+    counts, x_edges, y_edges = np.histogram2d(runtimes, ratings, bins=60)
+    xs, ys = np.nonzero(counts)
+    chart["points"] = [[float((x_edges[i] + x_edges[i + 1]) / 2), float((y_edges[j] + y_edges[j + 1]) / 2),
+                        int(counts[i, j])] for i, j in zip(xs, ys)]
+    chart["binned"] = True
+    return chart
+
+
+# chart name -> (builder, tables the ETag depends on)
+CHARTS: Dict[str, tuple] = {
+    "pokemon": (_pokemon_chart, ["pokemon", "types_lookup"]),
+    "spotify": (_spotify_chart, ["tracks", "artists_lookup"]),
+    "weather": (_weather_chart, ["weather", "cities_lookup"]),
+    "movies": (_movies_chart, ["movies"]),
+}
+
+
+class DashboardData:
+    """One shared connection, serialized by a lock, used by every request thread."""
+
+    def __init__(self, db_path: str):
+        self.conn = create_connection(db_path, check_same_thread=False)
+        self.lock = threading.Lock()
+
+    def etag(self, names: List[str]) -> str:
+        with self.lock:
+            fingerprints = [cached_fingerprint(self.conn, t) for name in names for t in CHARTS[name][1]]
+        return '"' + hashlib.sha1(repr(fingerprints).encode()).hexdigest()[:16] + '"'
+
+    def build(self, names: List[str]) -> Dict:
+        with self.lock:
+            return {name: CHARTS[name][0](self.conn) for name in names}
+
+
+class EventBroadcaster:
+    """One thread polls the chart ETag and fans events out to per-client queues.
+
+    Each SSE request thread just waits on its own queue, so polling cost does
+    not grow with the number of clients. Clients are capped at max_clients and
+    are unsubscribed as soon as a write to their socket fails; a client that
+    falls too far behind is sent the None sentinel and disconnected.
+    """
+
+    def __init__(self, data: DashboardData, poll_seconds: float,
+                 max_clients: int = DASHBOARD_MAX_SSE_CLIENTS, backlog: int = 8):
+        self.data = data
+        self.poll_seconds = poll_seconds
+        self.max_clients = max_clients
+        self.backlog = backlog
+        self.clients: Set[queue.Queue] = set()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.last = None
+        self.thread = threading.Thread(target=self._run, name="sse-broadcaster", daemon=True)
+
+    def start(self):
+        self.last = self.data.etag(list(CHARTS))
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        with self.lock:
+            clients, self.clients = self.clients, set()
+        for client in clients:
+            self._close(client)
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def subscribe(self) -> Optional[queue.Queue]:
+        """Register a client; returns None when the server is at max_clients."""
+        client = queue.Queue(maxsize=self.backlog)
+        with self.lock:
+            if len(self.clients) >= self.max_clients:
+                return None
+            self.clients.add(client)
+        client.put(f"event: update\ndata: {self.last}\n\n")
+        return client
+
+    def unsubscribe(self, client: queue.Queue):
+        with self.lock:
+            self.clients.discard(client)
+
+    def client_count(self) -> int:
+        with self.lock:
+            return len(self.clients)
+
+    @staticmethod
+    def _close(client: queue.Queue):
+        while True:
+            try:
+                client.get_nowait()
+            except queue.Empty:
+                break
+        client.put(None)
+
+    def _run(self):
+        while not self.stopped.wait(self.poll_seconds):
+            etag = self.data.etag(list(CHARTS))
+            if etag != self.last:
+                self.last = etag
+                message = f"event: update\ndata: {etag}\n\n"
+            else:
+                message = ": keep-alive\n\n"
+            with self.lock:
+                clients = list(self.clients)
+            for client in clients:
+                try:
+                    client.put_nowait(message)
+                except queue.Full:
+                    self.unsubscribe(client)
+                    self._close(client)
+
+
+def make_handler(data: DashboardData, events: EventBroadcaster) -> Callable:
+    class DashboardHandler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str, headers: Dict[str, str] = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split("?")[0].rstrip("/") or "/"
+            if path == "/":
+                self._send(200, DASHBOARD_HTML.encode(), "text/html; charset=utf-8")
+            elif path == "/api/charts" or path.startswith("/api/charts/"):
+                names = list(CHARTS) if path == "/api/charts" else [path.rsplit("/", 1)[1]]
+                if any(name not in CHARTS for name in names):
+                    self._send(404, b'{"error": "unknown chart"}', "application/json")
+                    return
+                etag = data.etag(names)
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, b"", "application/json", {"ETag": etag})
+                    return
+                body = json.dumps(data.build(names)).encode()
+                self._send(200, body, "application/json", {"ETag": etag, "Cache-Control": "no-cache"})
+            elif path == "/api/events":
+                self._stream_events()
+            elif path == "/metrics":
+                self._send(200, REGISTRY.render().encode(), METRICS_CONTENT_TYPE)
+            else:
+                self._send(404, b"Not found", "text/plain")
+
+        def _stream_events(self):
+            """Relay the shared broadcaster's events until the client goes away."""
+            client = events.subscribe()
+            if client is None:
+                self._send(503, b"Too many event stream clients", "text/plain", {"Retry-After": "30"})
+                return
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                while True:
+                    message = client.get()
+                    if message is None:
+                        return
+                    self.wfile.write(message.encode())
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            finally:
+                events.unsubscribe(client)
+
+    return DashboardHandler
+
+
+def serve_dashboard(db_path: str = DB_PATH, host: str = "127.0.0.1", port: int = 8000,
+                    poll_seconds: float = 5.0):
+    """Start the dashboard server and block until Ctrl+C."""
+    data = DashboardData(db_path)
+    events = EventBroadcaster(data, poll_seconds)
+    events.start()
+    server = ThreadingHTTPServer((host, port), make_handler(data, events))
+    server.daemon_threads = True
+    log.info("✓ Dashboard running at http://%s:%d/ (Ctrl+C to stop)", host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        events.stop()
+        server.server_close()
+        data.conn.close()
+
+
+DASHBOARD_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>SI 201 Dashboard</title>
+<script src="https://cdn.jsdelivr.net/npm/chart.js@4"></script>
+<style>
+  body { font-family: sans-serif; margin: 20px; background: #fafafa; }
+  .grid { display: grid; grid-template-columns: 1fr 1fr; gap: 20px; }
+  .card { background: white; padding: 12px; border: 1px solid #ddd; border-radius: 6px; }
+</style>
+</head>
+<body>
+<h1>SI 201 Final Project Dashboard</h1>
+<p id="status">Loading...</p>
+<div class="grid">
+  <div class="card"><canvas id="pokemon"></canvas></div>
+  <div class="card"><canvas id="spotify"></canvas></div>
+  <div class="card"><canvas id="weather"></canvas></div>
+  <div class="card"><canvas id="movies"></canvas></div>
+</div>
+<script>
+const COLORS = ["steelblue", "coral", "orangered", "dodgerblue", "mediumseagreen"];
+const charts = {};
+let etag = null;
+
+function config(spec) {
+  const title = {display: true, text: spec.title};
+  if (spec.type === "scatter") {
+    const data = spec.points.map(p => ({x: p[0], y: p[1], r: spec.binned ? 2 + Math.sqrt(p[2]) : 4}));
+    return {type: "bubble", data: {datasets: [{label: "Movies", data: data, backgroundColor: "mediumseagreen"}]},
+            options: {plugins: {title: title, legend: {display: false}},
+                      scales: {x: {title: {display: true, text: "Runtime (minutes)"}},
+                               y: {title: {display: true, text: "IMDb Rating"}}}}};
+  }
+  const datasets = Object.entries(spec.series).map(([label, values], i) =>
+      ({label: label, data: values, backgroundColor: COLORS[i], borderColor: COLORS[i]}));
+  return {type: spec.type === "line" ? "line" : "bar", data: {labels: spec.labels, datasets: datasets},
+          options: {indexAxis: spec.type === "hbar" ? "y" : "x", plugins: {title: title}}};
+}
+
+async function refresh() {
+  const headers = etag ? {"If-None-Match": etag} : {};
+  const resp = await fetch("/api/charts", {headers: headers});
+  if (resp.status === 304) return;
+  etag = resp.headers.get("ETag");
+  const specs = await resp.json();
+  for (const [name, spec] of Object.entries(specs)) {
+    if (charts[name]) charts[name].destroy();
+    charts[name] = new Chart(document.getElementById(name), config(spec));
+  }
+  document.getElementById("status").textContent = "Updated " + new Date().toLocaleTimeString();
+}
+
+new EventSource("/api/events").addEventListener("update", refresh);
+refresh();
+</script>
+</body>
+</html>
+"""
@@ -3,29 +3,30 @@ Movies visualization functions
 """
 import sqlite3
 import matplotlib.pyplot as plt
+from calculations.movies_calculations import load_runtime_rating_pairs
+from config.api_keys import CHART_SCATTER_MAX_POINTS
+from visualizations.scalable_rendering import density_raster, save_figure
 
 
-def visualize_runtime_vs_rating(conn: sqlite3.Connection):
-    """Create scatter plot of movie runtime vs IMDb rating."""
-    c = conn.cursor()
-    q = """
-    SELECT runtime, imdb_rating FROM movies
-    WHERE runtime IS NOT NULL AND imdb_rating IS NOT NULL
+def visualize_runtime_vs_rating(conn: sqlite3.Connection, max_points: int = CHART_SCATTER_MAX_POINTS):
     """
-    c.execute(q)
-    rows = c.fetchall()
-    if not rows:
+    Create scatter plot of movie runtime vs IMDb rating.
+
+    Above max_points movies the scatter becomes a rasterized density image
+    so render time stays flat as the movies table grows.
+    """
+    runtimes, ratings = load_runtime_rating_pairs(conn)
+    if len(runtimes) == 0:
         return
-    runtimes = [r["runtime"] for r in rows]
-    ratings = [r["imdb_rating"] for r in rows]
 
-    plt.figure(figsize=(10, 7))
-    plt.scatter(runtimes, ratings, alpha=0.7, s=150, color='mediumseagreen', edgecolors='darkgreen', linewidths=2)
+    fig, ax = plt.subplots(figsize=(10, 7))
+    if len(runtimes) > max_points:
+        density_raster(ax, runtimes, ratings)
+    else:
+        ax.scatter(runtimes, ratings, alpha=0.7, s=150, color='mediumseagreen', edgecolors='darkgreen', linewidths=2)
     plt.xlabel("Runtime (minutes)", fontsize=12)
     plt.ylabel("IMDb Rating", fontsize=12)
     plt.title("Movie Runtime vs. IMDb Rating", fontsize=14, fontweight='bold')
     plt.grid(True, alpha=0.3, linestyle='--')
     plt.tight_layout()
-    plt.savefig("movies_runtime_vs_rating.png", dpi=300, bbox_inches='tight')
-    plt.close()
-    print("✓ Saved visualization: movies_runtime_vs_rating.png")
+    save_figure("movies_runtime_vs_rating.png")
@@ -6,6 +6,7 @@ Uses calculation functions that JOIN with types_lookup table.
 """
 import sqlite3
 import matplotlib.pyplot as plt
+from visualizations.scalable_rendering import save_figure
 from calculations.pokemon_calculations import calculate_avg_base_exp_by_type
 
 
@@ -30,6 +31,4 @@ def visualize_avg_base_exp_by_type(conn: sqlite3.Connection, top_n: int = 12):
     plt.xticks(rotation=45, ha='right')
     plt.grid(axis='y', alpha=0.3, linestyle='--')
     plt.tight_layout()
-    plt.savefig("pokemon_base_exp_by_type.png", dpi=300, bbox_inches='tight')
-    plt.close()
-    print("✓ Saved visualization: pokemon_base_exp_by_type.png")
+    save_figure("pokemon_base_exp_by_type.png")
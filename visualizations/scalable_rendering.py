@@ -0,0 +1,80 @@
+"""
+Scalable rendering helpers for large charts
+
+Small datasets are drawn exactly as before. Above a configurable point count
+(CHART_SCATTER_MAX_POINTS / CHART_LINE_MAX_POINTS in config/api_keys.py)
+the charts switch to:
+  - density_raster(): a 2D histogram computed with NumPy and drawn as one
+    rasterized image instead of one marker per point
+  - lttb_downsample(): Largest-Triangle-Three-Buckets downsampling, which
+    keeps the visual shape of a line series with far fewer vertices
+
+NumPy is only imported by those two helpers, i.e. once a chart is big
+enough to need them.
+
+save_figure() wraps savefig and records how long each chart took to render
+(the render.<filename> timer in monitoring/instrumentation.py).
+"""
+import time
+from typing import Sequence, Tuple
+import matplotlib.pyplot as plt
+from monitoring.instrumentation import record
+from monitoring.structured_logging import get_logger
+
+
+log = get_logger("visualizations")
+
+
+def density_raster(ax, x: Sequence[float], y: Sequence[float], bins: int = 200, cmap: str = "Greens"):
+    """
+    Draw a point cloud as a 2D density image (counts per bin).
+
+    The histogram is computed with np.histogram2d and drawn with a single
+    rasterized pcolormesh, so render time no longer depends on point count.
+    """
+    import numpy as np
+    counts, x_edges, y_edges = np.histogram2d(np.asarray(x, dtype=float), np.asarray(y, dtype=float), bins=bins)
+    counts = np.ma.masked_equal(counts, 0)
+    mesh = ax.pcolormesh(x_edges, y_edges, counts.T, cmap=cmap, rasterized=True)
+    plt.colorbar(mesh, ax=ax, label="Count")
+    return mesh
+
+
+def lttb_downsample(x: Sequence[float], y: Sequence[float], n_out: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Downsample a line series to n_out points with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. Each bucket in between keeps
+    the point forming the largest triangle with the previously kept point and
+    the average of the next bucket.
+    """
+    import numpy as np
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+
+def save_figure(filename: str, dpi: int = 300):
+    """savefig + close, recording the render time for this chart."""
+    start = time.perf_counter()
+    plt.savefig(filename, dpi=dpi, bbox_inches='tight')
+    plt.close()
+    seconds = time.perf_counter() - start
+    record(f"render.{filename}", seconds)
+    log.info("✓ Saved visualization: %s (%.2fs)", filename, seconds)
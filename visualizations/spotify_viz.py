@@ -6,6 +6,7 @@ Uses calculation functions that JOIN with artists_lookup table.
 """
 import sqlite3
 import matplotlib.pyplot as plt
+from visualizations.scalable_rendering import save_figure
 from calculations.spotify_calculations import calculate_avg_popularity_per_artist
 
 
@@ -30,6 +31,4 @@ def visualize_avg_popularity_per_artist(conn: sqlite3.Connection, top_n: int = 1
     plt.title("Average Spotify Track Popularity per Artist", fontsize=14, fontweight='bold')
     plt.grid(axis='x', alpha=0.3, linestyle='--')
     plt.tight_layout()
-    plt.savefig("spotify_popularity_by_artist.png", dpi=300, bbox_inches='tight')
-    plt.close()
-    print("✓ Saved visualization: spotify_popularity_by_artist.png")
+    save_figure("spotify_popularity_by_artist.png")
@@ -6,40 +6,50 @@ JOINs weather table with cities_lookup table to get city names.
 """
 import sqlite3
 import matplotlib.pyplot as plt
+from calculations.weather_calculations import calculate_avg_high_low_by_city
+from config.api_keys import CHART_LINE_MAX_POINTS
+from visualizations.scalable_rendering import lttb_downsample, save_figure
 
 
-def visualize_temp_high_low_by_city(conn: sqlite3.Connection):
+def visualize_temp_high_low_by_city(conn: sqlite3.Connection, max_points: int = CHART_LINE_MAX_POINTS):
     """
     Create line plot of average high and low temperatures by city.
 
     STRING-TO-INTEGER MAPPING:
     JOINs weather table with cities_lookup table to retrieve city names.
+
+    Above max_points cities each series is LTTB-downsampled to max_points,
+    drawn without markers, and only every Nth city gets a tick label.
     """
-    c = conn.cursor()
-    q = """
-    SELECT c.city_name, AVG(w.temperature_high) as avg_high, AVG(w.temperature_low) as avg_low
-    FROM weather w
-    INNER JOIN cities_lookup c ON w.city_id = c.id
-    GROUP BY c.city_name
-    """
-    c.execute(q)
-    rows = c.fetchall()
+    rows = calculate_avg_high_low_by_city(conn)
     if not rows:
         return
-    cities = [r["city_name"] for r in rows]
-    highs = [r["avg_high"] for r in rows]
-    lows = [r["avg_low"] for r in rows]
+    cities = [r[0] for r in rows]
+    highs = [r[1] for r in rows]
+    lows = [r[2] for r in rows]
 
     x = range(len(cities))
     plt.figure(figsize=(12, 6))
-    plt.plot(x, highs, marker="o", label="Avg High", color='orangered', linewidth=2.5, markersize=8)
-    plt.plot(x, lows, marker="s", label="Avg Low", color='dodgerblue', linewidth=2.5, markersize=8)
-    plt.xticks(x, cities, rotation=45, ha='right')
+    if len(cities) > max_points:
+        # Cities without temperatures would break the LTTB triangle areas
+        rows = [r for r in rows if r[1] is not None and r[2] is not None]
+        cities = [r[0] for r in rows]
+        highs = [r[1] for r in rows]
+        lows = [r[2] for r in rows]
+        x = range(len(cities))
+        hx, hy = lttb_downsample(x, highs, max_points)
+        lx, ly = lttb_downsample(x, lows, max_points)
+        plt.plot(hx, hy, label="Avg High", color='orangered', linewidth=1.5, rasterized=True)
+        plt.plot(lx, ly, label="Avg Low", color='dodgerblue', linewidth=1.5, rasterized=True)
+        step = max(1, len(cities) // 40)
+        plt.xticks(x[::step], cities[::step], rotation=45, ha='right', fontsize=7)
+    else:
+        plt.plot(x, highs, marker="o", label="Avg High", color='orangered', linewidth=2.5, markersize=8)
+        plt.plot(x, lows, marker="s", label="Avg Low", color='dodgerblue', linewidth=2.5, markersize=8)
+        plt.xticks(x, cities, rotation=45, ha='right')
     plt.ylabel("Temperature (°F)", fontsize=12)
     plt.title("Average High and Low Temperatures by City", fontsize=14, fontweight='bold')
     plt.legend(fontsize=11)
     plt.grid(True, alpha=0.3, linestyle='--')
     plt.tight_layout()
-    plt.savefig("weather_temperature_by_city.png", dpi=300, bbox_inches='tight')
-    plt.close()
-    print("✓ Saved visualization: weather_temperature_by_city.png")
+    save_figure("weather_temperature_by_city.png")